@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Measures the bounded instance cache on a skewed read workload
+
+A storage of `count` places is saved, then fresh processes reload it
+with each cache setting and get 100000 places, 90% of them from a hot
+1% of the ids. The run reports the gets per second, the cache hit
+rate and evictions, and the resident memory once the workload is done.
+
+Usage: ./benchmarks/bench_cache.py [count]
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+MODES = {
+    'eager': {},
+    'lazy': {'lazy': True},
+    'cache 10000': {'cache_size': 10000},
+    'cache 1000': {'cache_size': 1000},
+    'cache 1000, binary': {'cache_size': 1000, 'format': 'binary'},
+}
+
+
+def rss():
+    """Returns the resident memory of this process in MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(mode, path, gets):
+    """Runs the workload on the storage of mode and prints gets per
+    second, hit rate, evictions and memory"""
+    storage = FileStorage(path, **MODES[mode])
+    storage.reload()
+    ids = [key.partition('.')[2] for key, val in storage.records(Place)]
+    hot = ids[:max(1, len(ids) // 100)]
+    rand = random.Random(0)
+    picks = [rand.choice(hot) if rand.random() < 0.9 else rand.choice(ids)
+             for i in range(gets)]
+    start = time.perf_counter()
+    for id in picks:
+        storage.get(Place, id)
+    elapsed = time.perf_counter() - start
+    metrics = storage.metrics
+    reached = metrics['hits'] + metrics['misses']
+    print(gets / elapsed, metrics['hits'] / reached if reached else -1,
+          metrics['evictions'], rss())
+
+
+def main(count, gets=100000):
+    """Prints the results of each cache setting"""
+    print('{:<19} {:>10} {:>9} {:>10} {:>8}'.format(
+        'mode', 'gets/s', 'hit rate', 'evictions', 'RSS'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        storage = FileStorage(path)
+        for i in range(count):
+            place = Place()
+            place.name = 'Place number {}'.format(i)
+            place.description = 'A lovely place to stay ' * 4
+            place.number_rooms = i % 7
+            storage.new(place)
+        storage.save()
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, '--worker', mode, path,
+                 str(gets)], capture_output=True, text=True, check=True)
+            rate, hit, evictions, memory = map(float, out.stdout.split())
+            print('{:<19} {:>10.0f} {:>9} {:>10.0f} {:>5.0f} MB'.format(
+                mode, rate, '{:.1%}'.format(hit) if hit >= 0 else '-',
+                evictions, memory))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--worker']:
+        worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
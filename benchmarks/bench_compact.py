@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""Measures memory per instance of the regular and compact model classes
+
+Usage: ./benchmarks/bench_compact.py [instances]
+"""
+import os
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.compact import compact  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+
+SAMPLES = {
+    'BaseModel': {},
+    'User': {'email': 'a@b.io', 'password': 'pwd', 'first_name': 'Ada',
+             'last_name': 'Lovelace'},
+    'State': {'name': 'California'},
+    'City': {'state_id': str(uuid.uuid4()), 'name': 'San Francisco'},
+    'Amenity': {'name': 'Wifi'},
+    'Place': {'city_id': str(uuid.uuid4()), 'user_id': str(uuid.uuid4()),
+              'name': 'Loft', 'description': 'Sunny loft', 'number_rooms': 2,
+              'number_bathrooms': 1, 'max_guest': 4, 'price_by_night': 90,
+              'latitude': 37.77, 'longitude': -122.41},
+    'Review': {'place_id': str(uuid.uuid4()), 'user_id': str(uuid.uuid4()),
+               'text': 'Great stay'},
+}
+
+
+def per_instance(cls, name, count):
+    """Returns the bytes allocated per instance of cls"""
+    now = datetime.now().isoformat()
+    rows = []
+    for i in range(count):
+        row = dict(SAMPLES[name], id=str(uuid.uuid4()), created_at=now,
+                   updated_at=now, __class__=name)
+        rows.append(row)
+    tracemalloc.start()
+    objs = [cls(**dict(row)) for row in rows]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return size / count
+
+
+def main(count):
+    """Prints bytes per instance for each model class"""
+    print('{:<10} {:>9} {:>9} {:>7}'.format('class', 'regular', 'compact',
+                                            'saved'))
+    for name, cls in FileStorage.classes().items():
+        regular = per_instance(cls, name, count)
+        slotted = per_instance(compact(cls), name, count)
+        print('{:<10} {:>9.0f} {:>9.0f} {:>6.0%}'.format(
+            name, regular, slotted, 1 - slotted / regular))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
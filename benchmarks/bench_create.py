@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+"""Measures bulk creation of new objects registered in FileStorage
+
+Compares the storage key derived from a full to_dict() call, as
+FileStorage.new() used to do, with the cached per-class prefix.
+
+Usage: ./benchmarks/bench_create.py [objects]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models import storage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def main(count):
+    """Prints creation throughput and key derivation cost"""
+    start = time.perf_counter()
+    objs = [Place() for i in range(count)]
+    elapsed = time.perf_counter() - start
+    print('created {} places in {:.2f}s ({:,.0f}/s, {} in storage)'.format(
+        count, elapsed, count / elapsed, storage.count(Place)))
+
+    def old_key(obj):
+        return obj.to_dict()['__class__'] + '.' + obj.id
+
+    for name, func in (('to_dict() key', old_key),
+                       ('cached prefix', storage._FileStorage__key)):
+        start = time.perf_counter()
+        for obj in objs:
+            func(obj)
+        elapsed = time.perf_counter() - start
+        print('{:<14} {:.2f}s ({:.2f} us/object)'.format(
+            name, elapsed, elapsed / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 1000000)
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""Micro-benchmarks the BaseModel(**kwargs) / to_dict() round trip
+
+Compares the former strptime parser with datetime.fromisoformat and
+epoch microsecond timestamps.
+
+Usage: ./benchmarks/bench_datetime.py [iterations]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.base_model import to_datetime  # noqa: E402
+from models.place import Place  # noqa: E402
+
+FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def main(number):
+    """Prints microseconds per call for each variant"""
+    place = Place()
+    iso = place.to_dict()
+    epoch = place.to_dict(epoch=True)
+    stamp = iso['created_at']
+    cases = [
+        ('strptime(iso)', lambda: datetime.strptime(stamp, FORMAT)),
+        ('fromisoformat(iso)', lambda: to_datetime(stamp)),
+        ('from epoch', lambda: to_datetime(epoch['created_at'])),
+        ('Place(**iso)', lambda: Place(**iso)),
+        ('Place(**epoch)', lambda: Place(**epoch)),
+        ('to_dict()', lambda: place.to_dict()),
+        ('to_dict(epoch=True)', lambda: place.to_dict(epoch=True)),
+        ('round trip iso', lambda: Place(**place.to_dict())),
+        ('round trip epoch', lambda: Place(**place.to_dict(epoch=True))),
+    ]
+    for name, func in cases:
+        secs = min(timeit.repeat(func, number=number, repeat=3))
+        print('{:<22} {:>8.2f} us'.format(name, secs / number * 1e6))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
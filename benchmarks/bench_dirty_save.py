@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Measures FileStorage.save() cost against total and dirty object counts
+
+Usage: ./benchmarks/bench_dirty_save.py [total ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def make_place():
+    """Builds a Place without registering it in the global storage"""
+    now = datetime.now().isoformat()
+    return Place(id=str(uuid.uuid4()), created_at=now, updated_at=now,
+                 __class__='Place', name='Cozy place', city_id='c',
+                 number_rooms=3, price_by_night=90, latitude=37.7)
+
+
+def timed_save(storage):
+    """Returns the wall time of one save in milliseconds"""
+    start = time.perf_counter()
+    storage.save()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(totals):
+    """Prints save time for each (total, dirty) combination"""
+    print('{:>9} {:>9} {:>12}'.format('total', 'dirty', 'save (ms)'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for total in totals:
+            storage = FileStorage(os.path.join(tmp, 'file.json'))
+            objs = [make_place() for i in range(total)]
+            for obj in objs:
+                storage.new(obj)
+            print('{:>9} {:>9} {:>12.1f}'.format(total, 'all',
+                                                 timed_save(storage)))
+            for dirty in (0, 1, 100, 10000):
+                if dirty > total:
+                    break
+                for obj in objs[:dirty]:
+                    obj.price_by_night += 1
+                    storage.new(obj)
+                print('{:>9} {:>9} {:>12.1f}'.format(total, dirty,
+                                                     timed_save(storage)))
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Measures the cost of each FileStorage durability level
+
+Each run makes `count` saves of one changed object in a storage of
+1000 places, as a snapshot and as a journal, and reports the mean save
+time and the number of fsyncs group commit needed.
+
+Usage: ./benchmarks/bench_durability.py [count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine import durable  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+fsyncs = 0
+fsync = os.fsync
+
+
+def counting_fsync(fd):
+    """Counts the fsyncs made by the storage"""
+    global fsyncs
+    fsyncs += 1
+    fsync(fd)
+
+
+def run(path, journal, level, count):
+    """Returns (mean save ms, fsyncs) for count saves at level"""
+    global fsyncs
+    storage = FileStorage(path, journal=journal, durability=level)
+    places = []
+    for i in range(1000):
+        place = Place()
+        place.name = 'Place {}'.format(i)
+        place.price_by_night = i
+        storage.new(place)
+        places.append(place)
+    storage.compact()
+    fsyncs = 0
+    start = time.perf_counter()
+    for i in range(count):
+        place = places[i % len(places)]
+        place.price_by_night += 1
+        storage.new(place)
+        storage.save()
+    storage.sync()
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / count, fsyncs
+
+
+def main(count):
+    """Prints the save cost of each level"""
+    os.fsync = counting_fsync
+    print('{:<9} {:<7} {:>10} {:>8}'.format('mode', 'level', 'save (ms)',
+                                             'fsyncs'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        for journal in (False, True):
+            for level in durable.LEVELS:
+                ms, synced = run(path, journal, level, count)
+                print('{:<9} {:<7} {:>10.3f} {:>8}'.format(
+                    'journal' if journal else 'snapshot', level, ms, synced))
+                for name in os.listdir(tmp):
+                    os.remove(os.path.join(tmp, name))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Measures NDJSON export time and peak memory against `all <Class>`
+
+Saves a file of Place records, reloads it lazily and compares the peak
+traced memory of building the `all` output list with streaming the same
+objects through FileStorage.export().
+
+Usage: ./benchmarks/bench_export.py [objects]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def measure(label, func, count):
+    """Runs func under tracemalloc and prints its time and peak memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<12} {:.2f}s ({:,.0f}/s) peak {:.1f} MiB'.format(
+        label, elapsed, count / elapsed, peak / (1 << 20)))
+
+
+def main(count):
+    """Prints the cost of each way of dumping count places"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        storage = FileStorage(path)
+        for i in range(count):
+            place = Place()
+            place.name = 'Place {}'.format(i)
+            storage.new(place)
+        storage.save()
+        del storage
+
+        for label, compress in (('export', False), ('export .gz', True)):
+            storage = FileStorage(path, lazy=True)
+            storage.reload()
+            out = os.path.join(tmp, 'places.ndjson')
+            measure(label, lambda: storage.export(Place, out,
+                                                  compress=compress), count)
+            os.remove(out)
+        storage = FileStorage(path, lazy=True)
+        storage.reload()
+        measure('all list', lambda: [
+            str(v) for v in storage.all(Place).values()], count)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Measures radius and k-nearest searches over a million places
+
+Compares a haversine over every place, as "places near me" used to do,
+with the grid index FileStorage keeps for Place coordinates. Points are
+indexed directly, without building Place objects, to keep memory within
+reach at a million entries.
+
+Usage: ./benchmarks/bench_geo.py [places]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine import geo  # noqa: E402
+
+
+def timed(label, func, repeat=5):
+    """Prints the mean time of func over repeat calls"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print('{:<22} {:10.2f} ms ({} results)'.format(
+        label, elapsed * 1e3, len(result)))
+
+
+def main(count):
+    """Prints the cost of each search over count random places"""
+    random.seed(0)
+    # cluster places around a few hundred cities, as real listings are
+    centers = [(random.uniform(-60, 70), random.uniform(-180, 180))
+               for i in range(300)]
+    points = []
+    for i in range(count):
+        lat, lon = random.choice(centers)
+        points.append(('Place.{}'.format(i),
+                       max(-90, min(90, lat + random.gauss(0, 0.3))),
+                       (lon + random.gauss(0, 0.3) + 180) % 360 - 180))
+    index = geo.GeoIndex(('latitude', 'longitude'))
+    start = time.perf_counter()
+    for key, lat, lon in points:
+        index.add(key, lat, lon)
+    print('indexed {} places in {:.2f}s (numpy: {})'.format(
+        count, time.perf_counter() - start, geo.numpy is not None))
+
+    lat, lon = centers[0]
+    timed('scan radius 5 km', lambda: sorted(
+        (d, key) for (key, plat, plon), d in zip(
+            points, geo.distances(lat, lon, [p[1:] for p in points]))
+        if d <= 5), repeat=1)
+    timed('index radius 5 km', lambda: index.radius(lat, lon, 5))
+    timed('index radius 50 km', lambda: index.radius(lat, lon, 50))
+    timed('index 10 nearest', lambda: geo.nearest(
+        index.radius, lat, lon, 10, km=1))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 1000000)
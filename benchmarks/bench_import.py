@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Measures bulk import of NDJSON and CSV files into FileStorage
+
+Generates a file of Place records and imports it with a growing number
+of parser processes.
+
+Usage: ./benchmarks/bench_import.py [records]
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from console import HBNBCommand  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+FIELDS = ['city_id', 'user_id', 'name', 'number_rooms', 'price_by_night',
+          'latitude', 'longitude']
+
+
+def record(i):
+    """Returns the fields of the i-th generated place as strings"""
+    return {'city_id': 'city-%d' % (i % 100), 'user_id': 'user-%d' % (i % 50),
+            'name': 'Place %d' % i, 'number_rooms': str(i % 7),
+            'price_by_night': str(50 + i % 300),
+            'latitude': '%.5f' % (i % 180 - 90),
+            'longitude': '%.5f' % (i % 360 - 180)}
+
+
+def main(count):
+    """Prints import throughput per format and worker count"""
+    tmp = tempfile.mkdtemp()
+    paths = {'ndjson': os.path.join(tmp, 'places.ndjson'),
+             'csv': os.path.join(tmp, 'places.csv')}
+    with open(paths['ndjson'], 'w') as f:
+        for i in range(count):
+            f.write(json.dumps(record(i)) + '\n')
+    with open(paths['csv'], 'w', newline='') as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(record(i) for i in range(count))
+    workers = sorted({0, 2, os.cpu_count() or 1})
+    for fmt, path in paths.items():
+        for n in workers:
+            storage = FileStorage(os.path.join(tmp, 'file.json'))
+            start = time.perf_counter()
+            storage.bulk_import(Place, path, HBNBCommand.types, workers=n)
+            elapsed = time.perf_counter() - start
+            print('{:<6} workers={:<2} {:.2f}s ({:,.0f} records/s)'.format(
+                fmt, n, elapsed, count / elapsed))
+    for name in os.listdir(tmp):
+        os.remove(os.path.join(tmp, name))
+    os.rmdir(tmp)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
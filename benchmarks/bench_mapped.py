@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""Compares the cold start of reader processes on each storage
+
+A storage of `count` objects, half places and half reviews, is saved
+and built into a mapped snapshot. For each mode, fresh processes then
+open the storage and get 100 random places; the run reports the time
+to open and to serve the gets, and the peak resident memory of each
+process.
+
+Usage: ./benchmarks/bench_mapped.py [count]
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine import mapped  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.mapped import MappedStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+MODES = {
+    'json': lambda path: FileStorage(path),
+    'json, lazy': lambda path: FileStorage(path, lazy=True),
+    'binary': lambda path: FileStorage(path + '.bin', format='binary'),
+    'mapped': lambda path: MappedStorage(path + '.snap'),
+}
+
+
+def peak_rss():
+    """Returns the peak resident memory of this process in MB"""
+    with open('/proc/self/status') as f:  # ru_maxrss survives exec
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(mode, path, ids):
+    """Opens the storage of mode, gets the places of ids and prints the
+    times in ms and the peak memory in MB"""
+    storage = MODES[mode](path)
+    start = time.perf_counter()
+    storage.reload()
+    opened = time.perf_counter()
+    for id in ids:
+        assert storage.get(Place, id) is not None
+    done = time.perf_counter()
+    print((opened - start) * 1000, (done - opened) * 1000, peak_rss())
+
+
+def main(count, runs=3):
+    """Prints the best cold start of each mode over runs processes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        storage = FileStorage(path)
+        binary = FileStorage(path + '.bin', format='binary')
+        ids = []
+        for i in range(count // 2):
+            place = Place()
+            place.name = 'Place number {}'.format(i)
+            place.number_rooms = i % 7
+            review = Review()
+            review.place_id = place.id
+            review.text = 'Review number {} of a lovely place'.format(i)
+            for target in (storage, binary):
+                target.new(place)
+                target.new(review)
+            ids.append(place.id)
+        storage.save()
+        binary.save()
+        mapped.build(storage, path + '.snap')
+        sample = random.sample(ids, min(100, len(ids)))
+        print('{:<11} {:>10} {:>10} {:>9}'.format('mode', 'open', '100 gets',
+                                                  'peak RSS'))
+        for mode in MODES:
+            results = []
+            for run in range(runs):
+                out = subprocess.run(
+                    [sys.executable, __file__, '--worker', mode, path] +
+                    sample, capture_output=True, text=True, check=True)
+                results.append([float(v) for v in out.stdout.split()])
+            opened, gets, rss = min(results)
+            print('{:<11} {:>7.1f} ms {:>7.2f} ms {:>6.0f} MB'.format(
+                mode, opened, gets, rss))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--worker']:
+        worker(sys.argv[2], sys.argv[3], sys.argv[4:])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
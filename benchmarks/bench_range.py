@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Measures range queries and top-k on the Place range indexes
+
+Compares a linear scan of every place with FileStorage.query() and
+FileStorage.top(), which walk the sorted price_by_night index.
+
+Usage: ./benchmarks/bench_range.py [places]
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def timed(label, func, repeat=20):
+    """Prints the mean time of func over repeat calls after a first one"""
+    func()
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print('{:<24} {:8.3f} ms ({} results)'.format(
+        label, elapsed * 1e3, len(result)))
+
+
+def main(count):
+    """Prints the cost of each way of answering the same queries"""
+    storage = FileStorage(os.devnull)
+    random.seed(0)
+    start = time.perf_counter()
+    for i in range(count):
+        place = Place()
+        place.city_id = 'city-{}'.format(i % 100)
+        place.price_by_night = random.randrange(20, 1000)
+        place.max_guest = random.randrange(1, 10)
+        storage.new(place)
+    print('stored {} places in {:.2f}s'.format(
+        count, time.perf_counter() - start))
+    places = list(storage.all(Place).values())
+
+    timed('scan 100 <= price < 110', lambda: [
+        p for p in places if 100 <= p.price_by_night < 110])
+    timed('query 100 <= price < 110', lambda: list(storage.query(
+        Place, price_by_night__gte=100, price_by_night__lt=110)))
+    timed('scan top 10', lambda: heapq.nsmallest(
+        10, places, key=lambda p: p.price_by_night))
+    timed('top 10', lambda: storage.top(Place, 'price_by_night', 10))
+    timed('scan top 10 in city', lambda: heapq.nsmallest(
+        10, (p for p in places if p.city_id == 'city-7'),
+        key=lambda p: p.price_by_night))
+    timed('top 10 in city', lambda: storage.top(
+        Place, 'price_by_night', 10, city_id='city-7'))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 100000)
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""Measures FileStorage.reload() time and peak RSS per dataset size
+
+Each measurement runs in a fresh interpreter so peak RSS only covers
+the load being measured. 'stream' is FileStorage.reload(); 'json.load'
+is the previous approach of decoding the whole file before building
+any object.
+
+Usage: ./benchmarks/bench_reload.py [objects ...]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def generate(path, count):
+    """Writes a file.json holding count Place entries"""
+    now = datetime.now().isoformat()
+    with open(path, 'w') as f:
+        f.write('{')
+        for i in range(count):
+            _id = str(uuid.uuid4())
+            entry = {'id': _id, 'created_at': now, 'updated_at': now,
+                     '__class__': 'Place', 'name': 'Place {}'.format(i),
+                     'city_id': str(uuid.uuid4()), 'number_rooms': i % 7,
+                     'price_by_night': i % 500, 'latitude': 37.7}
+            f.write('{}{}: {}'.format(', ' if i else '',
+                                      json.dumps('Place.' + _id),
+                                      json.dumps(entry)))
+        f.write('}')
+
+
+def measure(mode, path):
+    """Loads path in this process and prints seconds and peak RSS"""
+    from models.engine.file_storage import FileStorage
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    storage = FileStorage(path)
+    if mode == 'stream':
+        storage.reload()
+    else:
+        classes = FileStorage.classes()
+        with open(path) as f:
+            for key, val in json.load(f).items():
+                storage.all()[key] = classes[val['__class__']](**val)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(elapsed, before, peak, storage.count())
+
+
+def main(sizes):
+    """Prints load time and peak RSS for each size and loader"""
+    print('{:>9} {:>10} {:>9} {:>14}'.format('objects', 'loader', 'secs',
+                                             'peak RSS (MB)'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        for size in sizes:
+            generate(path, size)
+            for mode in ('stream', 'json.load'):
+                out = subprocess.run(
+                    [sys.executable, __file__, '--measure', mode, path],
+                    capture_output=True, text=True, check=True, cwd=tmp)
+                secs, before, peak, count = out.stdout.split()
+                print('{:>9} {:>10} {:>9.2f} {:>14.1f}'.format(
+                    int(count), mode, float(secs), int(peak) / 1024))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--measure']:
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main([int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000])
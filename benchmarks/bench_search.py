@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Measures full-text search over reviews against a substring scan
+
+Also compares a lazy reload that reuses the saved full-text index with
+one that has to tokenize every review again.
+
+Usage: ./benchmarks/bench_search.py [reviews]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+# a Zipf-like vocabulary: word i is used about 1/i as often as word 1
+WORDS = ['word{}'.format(i) for i in range(1, 20001)]
+WEIGHTS = [1 / i for i in range(1, 20001)]
+
+
+def timed(label, func, repeat=10):
+    """Prints the mean time of func over repeat calls"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print('{:<24} {:10.2f} ms ({} results)'.format(
+        label, elapsed * 1e3, len(result)))
+
+
+def main(count):
+    """Prints search and reload costs for count reviews"""
+    random.seed(0)
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'file.json')
+    storage = FileStorage(path)
+    for i in range(count):
+        review = Review()
+        review.text = ' '.join(random.choices(
+            WORDS, WEIGHTS, k=random.randrange(5, 60)))
+        storage.new(review)
+    storage.save()
+    reviews = list(storage.all(Review).values())
+
+    timed('substring scan', lambda: [
+        r for r in reviews if 'word500 ' in r.text + ' ' or
+        'word1234 ' in r.text + ' '])
+    timed('search 10', lambda: storage.search(Review, 'word500 word1234',
+                                              10))
+    timed('search all', lambda: storage.search(Review, 'word500 word1234'))
+
+    for label in ('reload with index', 'reload rebuilding'):
+        other = FileStorage(path, lazy=True)
+        start = time.perf_counter()
+        other.reload()
+        print('{:<24} {:10.2f} ms'.format(
+            label, (time.perf_counter() - start) * 1e3))
+        if os.path.exists(other.search_path):
+            os.remove(other.search_path)
+    os.remove(path)
+    os.rmdir(tmp)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if sys.argv[1:] else 50000)
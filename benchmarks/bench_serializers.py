@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""Compares the size and speed of the JSON and binary snapshot formats
+
+`count` objects, half places with their numeric fields set and half
+reviews, are encoded into a snapshot and read back with each format;
+the run reports the file size, the encoding and decoding throughput,
+and a full FileStorage save and reload of the same objects.
+
+Usage: ./benchmarks/bench_serializers.py [count]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine import serializers  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def objects(count):
+    """Returns count places and reviews"""
+    objs = []
+    for i in range(count // 2):
+        place = Place()
+        place.name = 'Place number {}'.format(i)
+        place.city_id = place.user_id = place.id
+        place.number_rooms = i % 7
+        place.max_guest = i % 11
+        place.price_by_night = 50 + i % 300
+        place.latitude = 37.0 + i / count
+        place.longitude = -122.0 - i / count
+        review = Review()
+        review.text = 'Review number {} of a lovely place'.format(i)
+        review.place_id = place.id
+        review.user_id = place.user_id
+        objs.extend((place, review))
+    return objs
+
+
+def timed(function):
+    """Returns (result, wall time in seconds) of function()"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(count):
+    """Prints the size and throughput of each format"""
+    objs = objects(count)
+    pairs = [(type(o).__name__ + '.' + o.id, o.to_dict()) for o in objs]
+    print('{:<7} {:>9} {:>14} {:>14} {:>9} {:>9}'.format(
+        'format', 'size', 'encode', 'decode', 'save', 'reload'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cls in serializers.FORMATS.items():
+            writer = cls(FileStorage.classes())
+            data, encode = timed(lambda: writer.document(
+                [writer.entry(key, val) for key, val in pairs]))
+            raw = data if writer.binary else data.encode()
+            read, decode = timed(lambda: list(serializers.read(
+                io.BufferedReader(io.BytesIO(raw)))))
+            assert len(read) == len(pairs)
+            path = os.path.join(tmp, name + '.json')
+            storage = FileStorage(path, format=name)
+            for obj in objs:
+                storage.new(obj)
+            save = timed(storage.save)[1]
+            reload = timed(FileStorage(path, format=name).reload)[1]
+            print('{:<7} {:>6.1f} MB {:>8.0f} obj/s {:>8.0f} obj/s '
+                  '{:>6.0f} ms {:>6.0f} ms'.format(
+                      name, len(raw) / 1e6, len(pairs) / encode,
+                      len(pairs) / decode, save * 1000, reload * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
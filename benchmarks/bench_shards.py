@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Compares single-file and sharded FileStorage on a lopsided dataset
+
+The storage holds `count` reviews and 100 amenities. For each layout
+the run times a save after changing one amenity, a save after changing
+one review, and a fresh process listing the amenities (reload plus
+all('Amenity')).
+
+Usage: ./benchmarks/bench_shards.py [count]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.amenity import Amenity  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def timed(function):
+    """Returns the wall time of function() in milliseconds"""
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(path, count, **options):
+    """Returns the (amenity save, review save, amenity listing) times"""
+    storage = FileStorage(path, **options)
+    reviews = []
+    for i in range(count):
+        review = Review()
+        review.text = 'Review number {} of a lovely place'.format(i)
+        storage.new(review)
+        reviews.append(review)
+    amenities = []
+    for i in range(100):
+        amenity = Amenity()
+        amenity.name = 'Amenity {}'.format(i)
+        storage.new(amenity)
+        amenities.append(amenity)
+    storage.save()
+    storage.save()
+
+    def touch(obj):
+        """Changes and saves obj"""
+        obj.text = obj.name = 'changed'
+        storage.new(obj)
+        storage.save()
+
+    amenity = timed(lambda: touch(amenities[0]))
+    review = timed(lambda: touch(reviews[0]))
+    fresh = FileStorage(path, **options)
+    listing = timed(lambda: (fresh.reload(), fresh.all('Amenity')))
+    return amenity, review, listing
+
+
+def main(count):
+    """Prints the timings of each layout"""
+    print('{:<22} {:>15} {:>14} {:>15}'.format(
+        'layout', 'amenity save', 'review save', 'list amenities'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        for name, options in (
+                ('single file', {}),
+                ('one file per class', {'sharded': True}),
+                ('Review in 16 buckets', {'sharded': True,
+                                          'buckets': {'Review': 16}})):
+            times = run(path, count, **options)
+            print('{:<22} {:>12.1f} ms {:>11.1f} ms {:>12.1f} ms'.format(
+                name, *times))
+            for entry in os.listdir(tmp):
+                entry = os.path.join(tmp, entry)
+                if os.path.isdir(entry):
+                    shutil.rmtree(entry)
+                else:
+                    os.remove(entry)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Stress test of several processes saving to one shared FileStorage
+
+Each of `procs` processes creates `count` places, saving after each,
+on the same file; the run reports the saves per second across all of
+them and checks that no object was lost. An unshared run shows the
+losses of last-writer-wins.
+
+Usage: ./benchmarks/bench_shared.py [count] [procs]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def work(path, count, options, start):
+    """Creates and saves count places once start is set"""
+    storage = FileStorage(path, **options)
+    storage.reload()
+    start.wait()
+    for i in range(count):
+        place = Place()
+        place.name = 'Place {} of {}'.format(i, os.getpid())
+        storage.new(place)
+        storage.save()
+    storage.close()
+
+
+def run(path, count, procs, options):
+    """Returns (saves per second, objects stored) for one run"""
+    start = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=work,
+                                       args=(path, count, options, start))
+               for i in range(procs)]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.5)
+    began = time.perf_counter()
+    start.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - began
+    storage = FileStorage(path, journal=options.get('journal', False))
+    storage.reload()
+    return count * procs / elapsed, storage.count()
+
+
+def main(count, procs):
+    """Prints throughput and lost objects of each mode"""
+    print('{:<18} {:>10} {:>9} {:>6}'.format('mode', 'saves/s', 'stored',
+                                             'lost'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        for name, options in (
+                ('unshared snapshot', {}),
+                ('shared snapshot', {'shared': True}),
+                ('unshared journal', {'journal': True}),
+                ('shared journal', {'journal': True, 'shared': True})):
+            rate, stored = run(path, count, procs, options)
+            print('{:<18} {:>10.0f} {:>9} {:>6}'.format(
+                name, rate, stored, count * procs - stored))
+            for entry in os.listdir(tmp):
+                os.remove(os.path.join(tmp, entry))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Compares save latency of synchronous and write-behind FileStorage
+
+Each run makes `count` saves of one changed object in a storage of
+10000 places and reports the mean and 99th percentile time save()
+blocks the caller, then the flusher metrics.
+
+Usage: ./benchmarks/bench_write_behind.py [count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def run(path, count, **options):
+    """Returns (mean ms, p99 ms, total s, metrics) of count saves"""
+    storage = FileStorage(path, **options)
+    places = []
+    for i in range(10000):
+        place = Place()
+        place.name = 'Place {}'.format(i)
+        place.price_by_night = i
+        storage.new(place)
+        places.append(place)
+    storage.save()
+    storage.flush()
+    times = []
+    start = time.perf_counter()
+    for i in range(count):
+        place = places[i % len(places)]
+        place.price_by_night += 1
+        storage.new(place)
+        began = time.perf_counter()
+        storage.save()
+        times.append(time.perf_counter() - began)
+    storage.close()
+    total = time.perf_counter() - start
+    times.sort()
+    return (sum(times) * 1000 / count, times[int(count * 0.99)] * 1000,
+            total, storage.metrics)
+
+
+def main(count):
+    """Prints save latency with and without write-behind"""
+    print('{:<22} {:>9} {:>9} {:>9} {:>8} {:>9}'.format(
+        'mode', 'mean (ms)', 'p99 (ms)', 'total (s)', 'flushes',
+        'flush ms'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'file.json')
+        for name, options in (('synchronous', {}),
+                              ('write-behind 10 ms', {'write_behind': 0.01}),
+                              ('write-behind 100 ms', {'write_behind': 0.1})):
+            mean, p99, total, metrics = run(path, count, **options)
+            print('{:<22} {:>9.3f} {:>9.3f} {:>9.2f} {:>8} {:>9.1f}'.format(
+                name, mean, p99, total, metrics['flushes'],
+                metrics['mean_ms']))
+            for entry in os.listdir(tmp):
+                os.remove(os.path.join(tmp, entry))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -1,17 +1,13 @@
 #!/usr/bin/python3
 """ Console Module """
 import cmd
+import math
+import re
 import shlex
 import sys
 from typing import Optional
-from models.base_model import BaseModel
-from models.__init__ import storage
-from models.user import User
+from models import storage
 from models.place import Place
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.review import Review
 
 
 class HBNBCommand(cmd.Cmd):
@@ -20,17 +16,18 @@ class HBNBCommand(cmd.Cmd):
     # determines prompt for interactive/non-interactive modes
     prompt = '(hbnb) ' if sys.__stdin__.isatty() else ''
 
-    classes = {
-               'BaseModel': BaseModel, 'User': User, 'Place': Place,
-               'State': State, 'City': City, 'Amenity': Amenity,
-               'Review': Review
-              }
+    classes = storage.models  # slotted variants in compact mode
     dot_cmds = ['all', 'count', 'show', 'destroy', 'update']
+    write_cmds = ['create', 'update', 'destroy', 'begin', 'commit',
+                  'rollback', 'import']
     types = {
              'number_rooms': int, 'number_bathrooms': int,
              'max_guest': int, 'price_by_night': int,
              'latitude': float, 'longitude': float
             }
+    ops = {'=': 'eq', '==': 'eq', '!=': 'ne', '<': 'lt', '<=': 'lte',
+           '>': 'gt', '>=': 'gte'}
+    condition = re.compile(r'^(\w+)(==|!=|<=|>=|=|<|>)(.*)$', re.S)
 
     def helper_class_check(self, class_name: Optional[str] = None,
                            ID: Optional[str] = None,
@@ -55,6 +52,26 @@ class HBNBCommand(cmd.Cmd):
 
         return False
 
+    def helper_split(self, args):
+        """
+        Splits args like a shell would, or prints an error and returns None.
+        """
+        try:
+            return shlex.split(args)
+        except ValueError:  # unbalanced quotes
+            print("** invalid quoting **")
+            return None
+
+    def helper_print_list(self, objs):
+        """
+        Prints objs in the format of a list of strings, one at a time.
+        """
+        sep = '['
+        for obj in objs:
+            print(sep + repr(str(obj)), end='')
+            sep = ', '
+        print('[]' if sep == '[' else ']')
+
     def preloop(self):
         """Prints if isatty is false"""
         if not sys.__stdin__.isatty():
@@ -67,6 +84,7 @@ class HBNBCommand(cmd.Cmd):
         Usage: <class name>.<command>([<id> [<*args> or <**kwargs>]])
         (Brackets denote optional fields in usage example.)
         """
+        storage.refresh()  # pick up saves of other processes
         _cmd = _cls = _id = _args = ''  # initialize line elements
 
         # scan for general formating - i.e '.', '(', ')'
@@ -112,6 +130,14 @@ class HBNBCommand(cmd.Cmd):
         finally:
             return line
 
+    def onecmd(self, line):
+        """Refuses the commands that write to a read-only storage"""
+        if storage.read_only and \
+                self.parseline(line)[0] in HBNBCommand.write_cmds:
+            print("** storage is read-only **")
+            return False
+        return super().onecmd(line)
+
     def postcmd(self, stop, line):
         """Prints if isatty is false"""
         if not sys.__stdin__.isatty():
@@ -120,6 +146,7 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, command):
         """ Method to exit the HBNB console"""
+        storage.close()
         exit()
 
     def help_quit(self):
@@ -129,6 +156,7 @@ class HBNBCommand(cmd.Cmd):
     def do_EOF(self, arg):
         """ Handles EOF to exit program """
         print()
+        storage.close()
         exit()
 
     def help_EOF(self):
@@ -155,10 +183,14 @@ class HBNBCommand(cmd.Cmd):
                 att_val = att_val.replace("\"", "").replace("_", " ")
                 # If ttribute has a defined type
                 if att_name in self.types.keys():
-                    setattr(new_instance, att_name,
-                            self.types[att_name](att_val))
-                else:
+                    att_val = self.types[att_name](att_val)
+                try:
                     setattr(new_instance, att_name, att_val)
+                except AttributeError:  # read-only relationship
+                    storage.delete(new_instance)  # registered by __init__
+                    print("** attribute can't be set **")
+                    return
+            storage.new(new_instance)  # re-index the set attributes
             storage.save()
             print(new_instance.id)
         # Only the class name is passed
@@ -166,9 +198,91 @@ class HBNBCommand(cmd.Cmd):
             new_instance = HBNBCommand.classes[args[0]]()
             storage.save()
             print(new_instance.id)
-            storage.save()
 
 
+    def do_begin(self, args):
+        """ Starts a transaction: changes are saved on commit """
+        storage.begin()
+
+    def help_begin(self):
+        """ Help information for the begin command """
+        print("Starts a transaction; changes are written once on commit")
+        print("[Usage]: begin\n")
+
+    def do_commit(self, args):
+        """ Writes the changes made since begin """
+        if not storage.in_batch:
+            print("** no transaction in progress **")
+            return
+        storage.commit()
+
+    def help_commit(self):
+        """ Help information for the commit command """
+        print("Ends a transaction and writes its changes")
+        print("[Usage]: commit\n")
+
+    def do_rollback(self, args):
+        """ Discards the changes made since begin """
+        if not storage.in_batch:
+            print("** no transaction in progress **")
+            return
+        storage.rollback()
+
+    def help_rollback(self):
+        """ Help information for the rollback command """
+        print("Ends a transaction and discards its changes")
+        print("[Usage]: rollback\n")
+
+    def do_import(self, args):
+        """ Imports the records of an NDJSON or CSV file """
+        args = self.helper_split(args)
+        if args is None:
+            return
+        args = args or [""]
+        if self.helper_class_check(args[0]):
+            return
+        if len(args) < 2:
+            print("** file path missing **")
+            return
+        try:
+            count = storage.bulk_import(HBNBCommand.classes[args[0]],
+                                        args[1], types=HBNBCommand.types)
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+        except ValueError as e:
+            print("** {} **".format(e))
+        else:
+            print(count)
+
+    def help_import(self):
+        """ Help information for the import command """
+        print("Imports the records of an NDJSON or CSV file")
+        print("[Usage]: import <className> <file.ndjson|file.csv>\n")
+
+    def do_export(self, args):
+        """ Streams objects to an NDJSON file, one object per line """
+        args = self.helper_split(args)
+        if args is None:
+            return
+        args = args or [""]
+        if args[0] != '*' and self.helper_class_check(args[0]):
+            return
+        if len(args) < 2:
+            print("** file path missing **")
+            return
+        cls = None if args[0] == '*' else args[0]
+        try:
+            count = storage.export(cls, args[1], fields=args[2:])
+        except OSError:
+            print("** can't write file **")
+        else:
+            print(count)
+
+    def help_export(self):
+        """ Help information for the export command """
+        print("Streams objects to an NDJSON file, gzipped if it ends in .gz")
+        print("[Usage]: export <className|*> <path> [<field> ...]\n")
+
     def help_create(self):
         """ Help information for the create method """
         print("Creates a class of any type")
@@ -196,11 +310,11 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-        try:
-            print(storage._FileStorage__objects[key])
-        except KeyError:
+        obj = storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+        else:
+            print(obj)
 
     def help_show(self):
         """ Help information for the show command """
@@ -227,13 +341,12 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-
-        try:
-            del(storage.all()[key])
-            storage.save()
-        except KeyError:
+        obj = storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+            return
+        storage.delete(obj)
+        storage.save()
 
     def help_destroy(self):
         """ Help information for the destroy command """
@@ -242,34 +355,122 @@ class HBNBCommand(cmd.Cmd):
 
     def do_all(self, args):
         """ Shows all objects, or all objects of a class"""
-        print_list = []
-
-        if args:
-            args = args.split(' ')[0]  # remove possible trailing args
-            if args not in HBNBCommand.classes:
+        args = self.helper_split(args)
+        if args is None:
+            return
+        c_name = None
+        if args and '=' not in args[0]:
+            c_name = args.pop(0)
+            if c_name not in HBNBCommand.classes:
                 print("** class doesn't exist **")
                 return
-            for k, v in storage._FileStorage__objects.items():
-                if k.split('.')[0] == args:
-                    print_list.append(str(v))
-        else:
-            for k, v in storage._FileStorage__objects.items():
-                print_list.append(str(v))
 
-        print(print_list)
+        # [limit] [offset] positionally, or limit=, offset=, after=
+        page = {}
+        try:
+            for i, arg in enumerate(args):
+                key, eq, value = arg.partition('=')
+                if not eq:
+                    key, value = ('limit', 'offset')[i], arg
+                if key not in ('limit', 'offset', 'after'):
+                    raise ValueError
+                page[key] = value if key == 'after' else int(value)
+                if key != 'after' and page[key] < 0:
+                    raise ValueError
+        except (IndexError, ValueError):
+            print("** invalid page argument **")
+            return
+
+        self.helper_print_list(storage.page(c_name, **page))
 
     def help_all(self):
         """ Help information for the all command """
-        print("Shows all objects, or all of a class")
-        print("[Usage]: all <className>\n")
+        print("Shows all objects, or all of a class, optionally one page")
+        print("[Usage]: all [<className>] [<limit> [<offset>]]")
+        print("[Usage]: <className>.all(limit=<n>, after=<id>)\n")
+
+    def do_where(self, args):
+        """ Shows the objects of a class matching every condition """
+        args = self.helper_split(args)
+        if args is None:
+            return
+        args = args or [""]
+        if self.helper_class_check(args[0]):
+            return
+        predicates = {}
+        for arg in args[1:]:
+            match = HBNBCommand.condition.match(arg)
+            if not match:
+                print("** invalid condition: {} **".format(arg))
+                return
+            field, op, value = match.groups()
+            if field in HBNBCommand.types:
+                try:
+                    value = HBNBCommand.types[field](value)
+                except ValueError:
+                    print("** invalid value: {} **".format(arg))
+                    return
+            predicates[field + '__' + HBNBCommand.ops[op]] = value
+        self.helper_print_list(storage.query(args[0], **predicates))
+
+    def help_where(self):
+        """ Help information for the where command """
+        print("Shows the objects of a class matching every condition")
+        print("[Usage]: where <className> <field><op><value> ...")
+        print("<op> is one of = != < <= > >=\n")
+
+    def do_search(self, args):
+        """ Shows the objects of a class matching words, best first """
+        c_name, _, terms = args.partition(' ')
+        if self.helper_class_check(c_name):
+            return
+        terms = terms.split()
+        if not terms:
+            print("** search terms missing **")
+            return
+        limit = None
+        if len(terms) > 1 and terms[-1].isdigit():  # trailing [limit]
+            limit = int(terms.pop())
+        pairs = storage.search(c_name, ' '.join(terms), limit)
+        self.helper_print_list(obj for score, obj in pairs)
+
+    def help_search(self):
+        """ Help information for the search command """
+        print("Shows the objects of a class matching any of the words,")
+        print("best matches first")
+        print("[Usage]: search <className> <word> ... [<limit>]\n")
+
+    def do_near(self, args):
+        """ Shows the places within a radius, nearest first """
+        args = args.split()
+        if len(args) < 3:
+            print("** latitude, longitude and radius required **")
+            return
+        try:
+            lat, lon, km = (float(arg) for arg in args[:3])
+            limit = int(args[3]) if len(args) > 3 else None
+        except ValueError:
+            print("** invalid number **")
+            return
+        if not all(map(math.isfinite, (lat, lon, km))) or \
+                not -90 <= lat <= 90 or not -180 <= lon <= 180 or km < 0:
+            print("** coordinates out of range **")
+            return
+        pairs = storage.near(Place, lat, lon, km, limit)
+        self.helper_print_list(obj for distance, obj in pairs)
+
+    def help_near(self):
+        """ Help information for the near command """
+        print("Shows the places within <km> of a point, nearest first")
+        print("[Usage]: near <latitude> <longitude> <km> [<limit>]\n")
 
     def do_count(self, args):
         """Count current number of class instances"""
-        count = 0
-        for k, v in storage._FileStorage__objects.items():
-            if args == k.split('.')[0]:
-                count += 1
-        print(count)
+        args = args.split(' ')[0]  # remove possible trailing args
+        if args not in HBNBCommand.classes:
+            print(0)
+            return
+        print(storage.count(args))
 
     def help_count(self):
         """ """
@@ -298,11 +499,9 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        # generate key from class and id
-        key = c_name + "." + c_id
-
-        # determine if key is present
-        if key not in storage.all():
+        # determine if the instance is present
+        new_dict = storage.get(c_name, c_id)
+        if new_dict is None:
             print("** no instance found **")
             return
 
@@ -335,9 +534,6 @@ class HBNBCommand(cmd.Cmd):
 
             args = [att_name, att_val]
 
-        # retrieve dictionary of current objects
-        new_dict = storage.all()[key]
-
         # iterate through attr names and values
         for i, att_name in enumerate(args):
             # block only runs on even iterations
@@ -353,8 +549,13 @@ class HBNBCommand(cmd.Cmd):
                 if att_name in HBNBCommand.types:
                     att_val = HBNBCommand.types[att_name](att_val)
 
-                # update dictionary with name, value pair
-                new_dict.__dict__.update({att_name: att_val})
+                # update instance with name, value pair; setattr also
+                # fills the slots of compact models
+                try:
+                    setattr(new_dict, att_name, att_val)
+                except AttributeError:  # read-only relationship
+                    print("** attribute can't be set **")
+                    return
 
         new_dict.save()  # save updates to file
 
@@ -1,7 +1,34 @@
 #!/usr/bin/python3
-"""This module instantiates an object of class FileStorage"""
+"""This module instantiates the storage engine selected by the environment"""
+from os import getenv
 from models.engine.file_storage import FileStorage
 
 
-storage = FileStorage()
+if getenv('HBNB_TYPE_STORAGE') == 'db':
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv('HBNB_DB_PATH'),
+                        compact=getenv('HBNB_COMPACT_MODELS') == '1')
+elif getenv('HBNB_TYPE_STORAGE') == 'mapped':
+    from models.engine.mapped import MappedStorage
+    storage = MappedStorage(getenv('HBNB_MAPPED_PATH'),
+                            compact=getenv('HBNB_COMPACT_MODELS') == '1')
+else:
+    write_behind = getenv('HBNB_FILE_WRITE_BEHIND')  # ms between flushes
+    cache = getenv('HBNB_FILE_CACHE')  # instances kept built
+    buckets = {}  # hash partitions per class, as Review=16,Place=4
+    for pair in filter(None, getenv('HBNB_FILE_BUCKETS', '').split(',')):
+        name, _, count = pair.partition('=')
+        buckets[name] = int(count)
+    storage = FileStorage(journal=getenv('HBNB_FILE_JOURNAL') == '1',
+                          lazy=getenv('HBNB_FILE_LAZY') == '1',
+                          epoch=getenv('HBNB_FILE_TIMESTAMPS') == 'epoch',
+                          compact=getenv('HBNB_COMPACT_MODELS') == '1',
+                          durability=getenv('HBNB_FILE_DURABILITY', 'none'),
+                          write_behind=float(write_behind) / 1000
+                          if write_behind else None,
+                          shared=getenv('HBNB_FILE_SHARED') == '1',
+                          sharded=getenv('HBNB_FILE_SHARDED') == '1',
+                          buckets=buckets,
+                          format=getenv('HBNB_FILE_FORMAT', 'json'),
+                          cache_size=int(cache) if cache else None)
 storage.reload()
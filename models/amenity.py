@@ -4,4 +4,5 @@ from models.base_model import BaseModel
 
 
 class Amenity(BaseModel):
+    __searchable__ = ('name',)
     name = ""
@@ -1,7 +1,35 @@
 #!/usr/bin/python3
 """This module defines a base class for all models in our hbnb clone"""
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_datetime(value):
+    """Converts a stored ISO 8601 string or epoch microseconds to datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, int):
+        return EPOCH + value * MICROSECOND
+    return value
+
+
+def to_epoch(value):
+    """Converts a naive datetime to microseconds since 1970-01-01"""
+    return (value - EPOCH) // MICROSECOND
+
+
+def declared_attributes(cls):
+    """Returns {name: default} for the public attributes cls declares"""
+    attributes = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if not name.startswith('_') and not callable(value) \
+                    and not isinstance(value, property):
+                attributes[name] = value
+    return attributes
 
 
 class BaseModel:
@@ -15,30 +43,36 @@ class BaseModel:
             self.updated_at = datetime.now()
             storage.new(self)
         else:
-            kwargs['updated_at'] = datetime.strptime(kwargs['updated_at'],
-                                                     '%Y-%m-%dT%H:%M:%S.%f')
-            kwargs['created_at'] = datetime.strptime(kwargs['created_at'],
-                                                     '%Y-%m-%dT%H:%M:%S.%f')
+            kwargs['updated_at'] = to_datetime(kwargs['updated_at'])
+            kwargs['created_at'] = to_datetime(kwargs['created_at'])
             del kwargs['__class__']
             self.__dict__.update(kwargs)
 
     def __str__(self):
         """Returns a string representation of the instance"""
-        cls = (str(type(self)).split('.')[-1]).split('\'')[0]
-        return '[{}] ({}) {}'.format(cls, self.id, self.__dict__)
+        return '[{}] ({}) {}'.format(type(self).__name__, self.id,
+                                     self.__dict__)
 
     def save(self):
         """Updates updated_at with current time when instance is changed"""
         from models import storage
         self.updated_at = datetime.now()
+        storage.new(self)
         storage.save()
 
-    def to_dict(self):
-        """Convert instance into dict format"""
+    def to_dict(self, epoch=False):
+        """Convert instance into dict format
+
+        Timestamps are ISO 8601 strings, or microseconds since the epoch
+        when epoch is true.
+        """
         dictionary = {}
         dictionary.update(self.__dict__)
-        dictionary.update({'__class__':
-                          (str(type(self)).split('.')[-1]).split('\'')[0]})
-        dictionary['created_at'] = self.created_at.isoformat()
-        dictionary['updated_at'] = self.updated_at.isoformat()
+        dictionary['__class__'] = type(self).__name__
+        if epoch:
+            dictionary['created_at'] = to_epoch(self.created_at)
+            dictionary['updated_at'] = to_epoch(self.updated_at)
+        else:
+            dictionary['created_at'] = self.created_at.isoformat()
+            dictionary['updated_at'] = self.updated_at.isoformat()
         return dictionary
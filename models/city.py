@@ -5,5 +5,13 @@ from models.base_model import BaseModel
 
 class City(BaseModel):
     """ The city class, contains state ID and name """
+    __indexed__ = ('state_id',)
+    __searchable__ = ('name',)
     state_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """ Returns the list of Place instances located in this city """
+        from models import storage
+        return storage.find('Place', 'city_id', self.id)
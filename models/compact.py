@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""This module builds compact, slotted variants of the hbnb models"""
+from models.base_model import BaseModel, declared_attributes
+from models.base_model import to_datetime, to_epoch
+
+_variants = {}
+
+
+class CompactModel:
+    """Behaviour shared by the slotted variants built by compact()
+
+    Declared fields live in slots; any other attribute goes to the
+    instance __dict__, which stays unallocated until one is set.
+    """
+    __slots__ = ()
+    _defaults = {}
+
+    def __init__(self, *args, **kwargs):
+        """Instantiates a new model, storing declared fields in slots"""
+        if not kwargs:
+            BaseModel.__init__(self)
+            return
+        kwargs['updated_at'] = to_datetime(kwargs['updated_at'])
+        kwargs['created_at'] = to_datetime(kwargs['created_at'])
+        del kwargs['__class__']
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getattr__(self, name):
+        """Returns the class default of a declared field never set"""
+        try:
+            value = type(self)._defaults[name]
+        except KeyError:
+            raise AttributeError("'{}' object has no attribute '{}'"
+                                 .format(type(self).__name__, name))
+        if isinstance(value, (list, dict)):
+            value = type(value)()  # never share a mutable default
+            setattr(self, name, value)
+        return value
+
+    def attributes(self):
+        """Returns the instance attributes as __dict__ would hold them"""
+        attributes = {}
+        for name in type(self).__slots__:
+            try:
+                attributes[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        attributes.update(self.__dict__)
+        return attributes
+
+    def __str__(self):
+        """Returns a string representation of the instance"""
+        return '[{}] ({}) {}'.format(type(self).__name__, self.id,
+                                     self.attributes())
+
+    def to_dict(self, epoch=False):
+        """Convert instance into dict format"""
+        dictionary = self.attributes()
+        dictionary['__class__'] = type(self).__name__
+        if epoch:
+            dictionary['created_at'] = to_epoch(self.created_at)
+            dictionary['updated_at'] = to_epoch(self.updated_at)
+        else:
+            dictionary['created_at'] = self.created_at.isoformat()
+            dictionary['updated_at'] = self.updated_at.isoformat()
+        return dictionary
+
+
+def compact(cls):
+    """Returns the slotted variant of model class cls
+
+    The variant subclasses cls and keeps its name, so isinstance checks,
+    storage keys and to_dict() output are the same as for cls.
+    """
+    if cls not in _variants:
+        defaults = declared_attributes(cls)
+        _variants[cls] = type(cls.__name__, (CompactModel, cls), {
+            '__slots__': ('id', 'created_at', 'updated_at') +
+                         tuple(defaults),
+            '__module__': cls.__module__,
+            '__doc__': cls.__doc__,
+            '_defaults': defaults,
+        })
+    return _variants[cls]
@@ -0,0 +1,2 @@
+#!/usr/bin/python3
+"""This package holds the storage engines of the hbnb clone"""
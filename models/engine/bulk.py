@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""This module bulk imports NDJSON or CSV records into a storage engine"""
+import csv
+import json
+import multiprocessing
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+CHUNK = 20000  # records handed to a worker at a time
+
+
+def detect_format(path):
+    """Returns 'csv' or 'ndjson' from the extension of path"""
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def read_chunks(f, fmt, number=0):
+    """Yields (first line number, lines) chunks of whole records from f
+
+    number is the count of lines already read from f. CSV chunks never
+    end inside a quoted field.
+    """
+    lines, start, quotes = [], number + 1, 0
+    for line in f:
+        number += 1
+        lines.append(line)
+        if fmt == 'csv':
+            quotes += line.count('"')
+        if len(lines) >= CHUNK and quotes % 2 == 0:
+            yield start, lines
+            lines, start, quotes = [], number + 1, 0
+    if lines:
+        yield start, lines
+
+
+def parse_chunk(name, fmt, fields, types, start, lines):
+    """Returns the records in lines as keyword arguments for class name
+
+    Values are cast with types, a {field: callable} mapping such as
+    HBNBCommand.types; empty CSV cells are left unset, and id and
+    timestamps are filled in when missing.
+    """
+    if fmt == 'csv':
+        rows = enumerate(({k: v for k, v in zip(fields, row) if v != ''}
+                          for row in csv.reader(lines)), start)
+    else:
+        rows = ((number, line) for number, line in enumerate(lines, start)
+                if line.strip())
+    now = datetime.now().isoformat()
+    records = []
+    for number, row in rows:
+        try:
+            if fmt != 'csv':
+                row = json.loads(row)
+            for field, cast in types.items():
+                if row.get(field) is not None:
+                    row[field] = cast(row[field])
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError('line {}: {}'.format(number, e))
+        if not row.get('id'):
+            row['id'] = str(uuid.uuid4())
+        row.setdefault('created_at', now)
+        row.setdefault('updated_at', row['created_at'])
+        row['__class__'] = name
+        records.append(row)
+    return records
+
+
+def import_records(storage, cls, path, types=None, fmt=None, workers=0,
+                   batch_size=100000):
+    """Streams the records of path into storage as instances of cls
+
+    Chunks of records are parsed and cast in this process, or in a pool
+    of that many worker processes when workers is above 1, and committed
+    to storage every batch_size records. Returns the number of records
+    imported; a ValueError names the first bad line and leaves earlier
+    batches committed. Imports are refused while a batch is open, since
+    rolling back a bad one would discard the changes of that batch too.
+    """
+    if storage.in_batch:
+        raise ValueError("can't import inside a transaction")
+    fmt = fmt or detect_format(path)
+    types = dict(types or {})
+    name = cls.__name__
+    cls = storage.models.get(name, cls)  # the slotted variant if compact
+    count = pending = 0
+    with open(path, newline='') as f:
+        fields = None
+        if fmt == 'csv':
+            fields = next(csv.reader([f.readline()]), None)
+            if not fields:
+                return 0
+        chunks = read_chunks(f, fmt, 1 if fields else 0)
+        if workers > 1:
+            parsed = parallel(chunks, workers, name, fmt, fields, types)
+        else:
+            parsed = (parse_chunk(name, fmt, fields, types, start, lines)
+                      for start, lines in chunks)
+        storage.begin()
+        try:
+            for records in parsed:
+                for record in records:
+                    storage.new(cls(**record))
+                count += len(records)
+                pending += len(records)
+                if pending >= batch_size:
+                    storage.commit()
+                    storage.begin()
+                    pending = 0
+        except BaseException:
+            storage.rollback()
+            raise
+        finally:
+            parsed.close()
+    storage.commit()
+    return count
+
+
+def parallel(chunks, workers, *args):
+    """Yields parse_chunk results in order, parsing in worker processes
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    whatever the size of the input. Workers are spawned rather than
+    forked, so they never inherit a lock held by a storage thread.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = deque()
+        try:
+            for start, lines in chunks:
+                pending.append(pool.submit(parse_chunk, *args, start, lines))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
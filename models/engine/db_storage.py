@@ -0,0 +1,566 @@
+#!/usr/bin/python3
+"""This module defines a class to manage SQLite storage for hbnb clone"""
+import json
+import sqlite3
+from contextlib import contextmanager
+from heapq import merge, nlargest, nsmallest
+from itertools import chain, dropwhile, islice
+from models.base_model import declared_attributes
+from models.engine import geo
+from models.engine.bulk import import_records
+from models.engine.export import export_records
+from models.engine.file_storage import FileStorage
+from models.engine.query import OPS, compile_filter, parse
+from models.engine.text import TextIndex, tokenize
+from numbers import Real
+
+
+class DBStorage:
+    """This class manages storage of hbnb models in a SQLite database
+
+    Each model class has its own table with the class attributes it
+    declares as typed columns, plus an `extra` JSON column for attributes
+    set on the fly, and a SQL index for each field the model lists in
+    __indexed__ or __ranged__, and over the coordinates it lists in
+    __located__. Text fields listed in __searchable__ are mirrored into
+    an FTS5 table for search(). new() and delete() stage changes in
+    memory; save() writes them in a single transaction. Inside
+    begin()/commit(), or the batch() context manager, saves are deferred
+    to the commit.
+    """
+    __db_path = 'hbnb.db'
+    read_only = False
+    __types = {str: 'TEXT', int: 'INTEGER', float: 'REAL'}
+    __sql_ops = {'eq': 'IS', 'ne': 'IS NOT', 'lt': '<', 'lte': '<=',
+                 'gt': '>', 'gte': '>='}
+
+    def __init__(self, db_path=None, compact=False):
+        """Creates a storage bound to the database at db_path, building
+        the slotted model variants with compact set"""
+        self.__db_path = db_path or DBStorage.__db_path
+        self.__conn = None
+        self.__classes = FileStorage.classes(compact)
+        self.__columns = {name: self.columns(cls)  # slots are not columns
+                          for name, cls in FileStorage.classes().items()}
+        self.__text = {name: cls.__searchable__
+                       for name, cls in self.__classes.items()
+                       if hasattr(cls, '__searchable__')}
+        self.__fts = True
+        self.__objects = {}
+        self.__dirty = set()
+        self.__deleted = set()
+        self.__batch = 0
+
+    @staticmethod
+    def columns(cls):
+        """Returns {attribute: default} for the attributes cls declares"""
+        return declared_attributes(cls)
+
+    def all(self, cls=None):
+        """Returns a dictionary of models currently in storage"""
+        names = self.__names(cls)
+        result = {}
+        for name in names:
+            sql = 'SELECT * FROM "{}"'.format(name)
+            for row in self.__conn.execute(sql):
+                obj = self.__load(name, row)
+                if obj is not None:
+                    result[name + '.' + obj.id] = obj
+            for key, obj in self.__objects.items():
+                if key.startswith(name + '.') and key not in result:
+                    result[key] = obj
+        return result
+
+    def get(self, cls, id):
+        """Returns the object of class cls with the given id, or None"""
+        name = self.__name(cls)
+        key = name + '.' + id
+        if key in self.__objects or name not in self.__classes:
+            return self.__objects.get(key)
+        row = self.__conn.execute(
+            'SELECT * FROM "{}" WHERE id = ?'.format(name), (id,)).fetchone()
+        return self.__load(name, row) if row else None
+
+    def find(self, cls, field, value):
+        """Returns the objects of class cls whose field equals value"""
+        name = self.__name(cls)
+        if field not in self.__columns[name]:
+            return [obj for obj in self.all(name).values()
+                    if getattr(obj, field, None) == value]
+        found = {}
+        sql = 'SELECT * FROM "{}" WHERE {} = ?'.format(name, field)
+        for row in self.__conn.execute(sql, (value,)):
+            obj = self.__load(name, row)
+            if obj is not None:
+                found[name + '.' + obj.id] = obj
+        for key in self.__dirty:
+            obj = self.__objects[key]
+            if key.startswith(name + '.') and \
+                    getattr(obj, field, None) == value:
+                found[key] = obj
+        return [obj for obj in found.values()
+                if getattr(obj, field, None) == value]
+
+    def query(self, cls, **predicates):
+        """Yields the objects of cls matching every field__op=value
+
+        ops are eq (the default), ne, lt, lte, gt and gte. Terms on
+        typed columns become a WHERE clause, using the SQL indexes;
+        terms on other attributes and staged objects are tested in
+        Python as rows are read.
+        """
+        name = self.__name(cls)
+        return self.__select(name, parse(predicates))
+
+    def top(self, cls, field, n, reverse=False, **predicates):
+        """Returns the n objects of cls matching predicates with the
+        lowest value of field, or the highest with reverse set
+
+        On a numeric column the database sorts and only the first rows
+        are read.
+        """
+        name = self.__name(cls)
+        terms = parse(predicates)
+        if type(self.__columns[name].get(field)) in (int, float):
+            return list(islice(self.__select(name, terms, field, reverse),
+                               n))
+        objs = (obj for obj in self.__select(name, terms)
+                if isinstance(getattr(obj, field, None), Real))
+        pick = nlargest if reverse else nsmallest
+        return pick(n, objs, key=lambda obj: getattr(obj, field))
+
+    def __select(self, name, terms, order=None, reverse=False):
+        """Yields the objects of class name matching terms
+
+        With order, a numeric column, objects come sorted by it.
+        """
+        match = compile_filter(terms)
+        columns = self.__columns[name]
+        where, params = [], []
+        for field, op, value in terms:
+            if type(columns.get(field)) not in self.__types or \
+                    value is None and op not in ('eq', 'ne'):
+                continue
+            clause = '{} {} ?'.format(field, self.__sql_ops[op])
+            try:
+                # unset columns are NULL but read as the class default
+                if OPS[op](columns[field], value):
+                    clause = '({} OR {} IS NULL)'.format(clause, field)
+            except TypeError:
+                pass
+            where.append(clause)
+            params.append(value)
+        sql = 'SELECT * FROM "{}"'.format(name)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if order is not None:
+            sql += ' ORDER BY COALESCE({}, ?){}'.format(
+                order, ' DESC' if reverse else '')
+            params.append(columns[order])
+        skip = self.__dirty | self.__deleted
+        rows = (self.__load(name, row)
+                for row in self.__conn.execute(sql, params)
+                if name + '.' + row['id'] not in skip)
+        rows = (obj for obj in rows if match(obj))
+        staged = [self.__objects[key] for key in self.__dirty
+                  if key.startswith(name + '.')]
+        staged = [obj for obj in staged if match(obj)]
+        if order is None:
+            yield from rows
+            yield from staged
+            return
+        staged = sorted((obj for obj in staged
+                         if isinstance(getattr(obj, order, None), Real)),
+                        key=lambda obj: getattr(obj, order), reverse=reverse)
+        yield from merge(rows, staged, key=lambda obj: getattr(obj, order),
+                         reverse=reverse)
+
+    def within(self, cls, south, west, north, east):
+        """Returns the objects of cls located inside a lat/lon box
+
+        The box crosses the antimeridian when west is greater than east.
+        The box becomes a WHERE clause on the coordinate columns, which
+        are indexed together for classes listing them in __located__.
+        """
+        name = self.__name(cls)
+        return [obj for obj, lat, lon in
+                self.__located(name, south, west, north, east)]
+
+    def near(self, cls, lat, lon, km, limit=None):
+        """Returns (distance in km, object) pairs of cls within km of
+        lat, lon, nearest first"""
+        name = self.__name(cls)
+        return geo.closest(lat, lon, km, self.__located(
+            name, *geo.bounds(lat, lon, km)), limit)
+
+    def nearest(self, cls, lat, lon, k):
+        """Returns the (distance in km, object) pairs of the k objects
+        of cls nearest to lat, lon"""
+        return geo.nearest(lambda *args: self.near(cls, *args), lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Returns (score, object) pairs of cls matching terms, best first
+
+        Objects are ranked with BM25 over the text fields their class
+        lists in __searchable__, through a SQLite FTS5 table kept in step
+        with save(); staged changes are searchable once saved.
+        """
+        name = self.__name(cls)
+        if name not in self.__text:
+            return []
+        if not self.__fts:  # SQLite built without FTS5
+            text = TextIndex(self.__text[name])
+            for key, obj in self.all(name).items():
+                text.add(key, *(getattr(obj, f, None) for f in text.fields))
+            return [(score, self.__objects[key])
+                    for score, key in text.search(terms, limit)]
+        words = tokenize(terms)
+        if not words:
+            return []
+        sql = 'SELECT id, bm25("{0}_text") AS rank FROM "{0}_text" WHERE ' \
+            '"{0}_text" MATCH ? ORDER BY rank'.format(name)
+        found = []
+        for row in self.__conn.execute(sql, (' OR '.join(
+                '"{}"'.format(word) for word in words),)):
+            obj = self.get(name, row['id'])
+            if obj is not None:
+                found.append((-row['rank'], obj))
+                if len(found) == limit:
+                    break
+        return found
+
+    def __located(self, name, south, west, north, east):
+        """Returns (object, lat, lon) for the objects of name in the box"""
+        lat_field, lon_field = getattr(self.__classes[name], '__located__',
+                                       ('latitude', 'longitude'))
+        terms = [(lat_field, 'gte', south), (lat_field, 'lte', north)]
+        if west <= east:
+            terms += [(lon_field, 'gte', west), (lon_field, 'lte', east)]
+        found = []
+        for obj in self.__select(name, terms):
+            lat = getattr(obj, lat_field, None)
+            lon = getattr(obj, lon_field, None)
+            if isinstance(lat, Real) and isinstance(lon, Real) and \
+                    geo.in_box(lat, lon, south, west, north, east):
+                found.append((obj, lat, lon))
+        return found
+
+    def count(self, cls=None):
+        """Returns the number of objects in storage, or of class cls"""
+        names = self.__names(cls)
+        total = 0
+        for name in names:
+            if name not in self.__classes:
+                continue
+            total += self.__conn.execute(
+                'SELECT COUNT(*) FROM "{}"'.format(name)).fetchone()[0]
+        for key in self.__dirty | self.__deleted:
+            name, _, _id = key.partition('.')
+            if name not in names:
+                continue
+            stored = self.__conn.execute(
+                'SELECT 1 FROM "{}" WHERE id = ?'.format(name),
+                (_id,)).fetchone() is not None
+            if key in self.__dirty and not stored:
+                total += 1
+            elif key in self.__deleted and stored:
+                total -= 1
+        return total
+
+    def records(self, cls=None):
+        """Yields (key, dictionary form) for each object, or those of cls
+
+        Rows are converted straight from the cursor without being added
+        to the identity map, so walking the database keeps memory flat.
+        """
+        names = self.__names(cls)
+        for name in names:
+            sql = 'SELECT * FROM "{}"'.format(name)
+            for row in self.__conn.execute(sql):
+                key = name + '.' + row['id']
+                if key in self.__deleted or key in self.__dirty:
+                    continue
+                obj = self.__objects.get(key)
+                yield key, obj.to_dict() if obj is not None else \
+                    self.__entry(name, row)
+            for key in list(self.__dirty):
+                if key.startswith(name + '.'):
+                    yield key, self.__objects[key].to_dict()
+
+    def page(self, cls=None, limit=None, offset=0, after=None):
+        """Yields up to limit objects of cls, or of every class
+
+        Each class is read in the order of its primary key index, with
+        staged objects merged in, so pages are stable without sorting.
+        The first offset objects are skipped, and with after (an id)
+        only the objects following it are yielded. Rows are read from
+        the cursor as they are needed.
+        """
+        names = self.__names(cls)
+        objs = chain.from_iterable(
+            self.__ordered(name, after if cls else None) for name in names)
+        if after is not None and not cls:
+            objs = dropwhile(lambda obj: obj.id != after, objs)
+            next(objs, None)
+        stop = None if limit is None else offset + limit
+        return islice(objs, offset, stop)
+
+    def __ordered(self, name, after=None):
+        """Yields the objects of class name by id, after the given id"""
+        sql = 'SELECT * FROM "{}"'.format(name)
+        params = ()
+        if after is not None:
+            sql += ' WHERE id > ?'
+            params = (after,)
+        skip = self.__dirty | self.__deleted
+        rows = (self.__load(name, row) for row in
+                self.__conn.execute(sql + ' ORDER BY id', params)
+                if name + '.' + row['id'] not in skip)
+        staged = sorted((self.__objects[key] for key in self.__dirty
+                         if key.startswith(name + '.')),
+                        key=lambda obj: obj.id)
+        if after is not None:
+            staged = [obj for obj in staged if obj.id > after]
+        yield from merge(rows, staged, key=lambda obj: obj.id)
+
+    def new(self, obj):
+        """Stages obj to be written on the next save"""
+        key = type(obj).__name__ + '.' + obj.id
+        self.__objects[key] = obj
+        self.__dirty.add(key)
+        self.__deleted.discard(key)
+
+    def delete(self, obj=None):
+        """Stages obj to be removed on the next save"""
+        if obj is None:
+            return
+        key = type(obj).__name__ + '.' + obj.id
+        self.__objects.pop(key, None)
+        self.__dirty.discard(key)
+        self.__deleted.add(key)
+
+    @property
+    def models(self):
+        """The model classes objects are built as, by name"""
+        return dict(self.__classes)
+
+    @property
+    def in_batch(self):
+        """True while a batch started by begin() is open"""
+        return self.__batch > 0
+
+    def begin(self):
+        """Starts a batch: saves are deferred until commit()"""
+        self.__batch += 1
+
+    def commit(self):
+        """Ends the current batch, saving once when it is the outermost"""
+        if self.__batch:
+            self.__batch -= 1
+        if not self.__batch:
+            self.save()
+
+    def rollback(self):
+        """Ends every open batch and discards all staged changes
+
+        Staged objects are forgotten, so later reads return the rows as
+        they are in the database.
+        """
+        self.__batch = 0
+        for key in self.__dirty:
+            del self.__objects[key]
+        self.__dirty.clear()
+        self.__deleted.clear()
+
+    @contextmanager
+    def batch(self):
+        """Context manager committing on success, rolling back on error"""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def bulk_import(self, cls, path, types=None, **options):
+        """Imports the NDJSON or CSV records of path as instances of cls
+
+        See models.engine.bulk.import_records for the options.
+        """
+        return import_records(self, cls, path, types, **options)
+
+    def export(self, cls, path, fields=None, compress=None):
+        """Streams the objects of cls, or every object, to an NDJSON file
+
+        See models.engine.export.export_records for the options.
+        """
+        return export_records(self, cls, path, fields, compress)
+
+    def save(self):
+        """Writes every staged change in one transaction"""
+        if self.__batch:
+            return
+        puts, deletes = {}, {}
+        for key in self.__dirty:
+            name, _, _id = key.partition('.')
+            puts.setdefault(name, []).append(self.__row(self.__objects[key]))
+        for key in self.__deleted:
+            name, _, _id = key.partition('.')
+            deletes.setdefault(name, []).append((_id,))
+        with self.__conn:
+            for name, rows in puts.items():
+                columns = self.__table_columns(name)
+                sql = 'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                    name, ', '.join(columns), ', '.join('?' * len(columns)))
+                self.__conn.executemany(sql, rows)
+            for name, ids in deletes.items():
+                sql = 'DELETE FROM "{}" WHERE id = ?'.format(name)
+                self.__conn.executemany(sql, ids)
+            if self.__fts:
+                self.__save_text()
+        self.__dirty.clear()
+        self.__deleted.clear()
+
+    def reload(self):
+        """Opens the database and creates any missing table"""
+        if self.__conn is None:
+            self.__conn = sqlite3.connect(self.__db_path)
+            self.__conn.row_factory = sqlite3.Row
+            self.__conn.execute('PRAGMA journal_mode=WAL')
+            self.__conn.execute('PRAGMA synchronous=NORMAL')
+        with self.__conn:
+            for name, columns in self.__columns.items():
+                defs = ['id TEXT PRIMARY KEY', 'created_at TEXT NOT NULL',
+                        'updated_at TEXT NOT NULL']
+                for column, default in columns.items():
+                    defs.append('{} {}'.format(
+                        column, self.__types.get(type(default), 'TEXT')))
+                defs.append('extra TEXT')
+                self.__conn.execute('CREATE TABLE IF NOT EXISTS "{}" ({})'
+                                    .format(name, ', '.join(defs)))
+                cls = self.__classes[name]
+                for field in getattr(cls, '__indexed__', ()) + \
+                        getattr(cls, '__ranged__', ()):
+                    self.__conn.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ({1})'
+                        .format(name, field))
+                if hasattr(cls, '__located__'):
+                    self.__conn.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_location" ON "{0}" '
+                        '({1})'.format(name, ', '.join(cls.__located__)))
+                if name in self.__text and self.__fts:
+                    self.__create_text(name)
+
+    def __save_text(self):
+        """Mirrors the staged changes into the full-text tables"""
+        removed, added = {}, {}
+        for key in self.__dirty | self.__deleted:
+            name, _, _id = key.partition('.')
+            if name not in self.__text:
+                continue
+            removed.setdefault(name, []).append((_id,))
+            if key in self.__dirty:
+                obj = self.__objects[key]
+                added.setdefault(name, []).append((_id,) + tuple(
+                    value if isinstance(value, str) else None
+                    for value in (getattr(obj, field, None)
+                                  for field in self.__text[name])))
+        for name, ids in removed.items():
+            self.__conn.executemany(
+                'DELETE FROM "{}_text" WHERE id = ?'.format(name), ids)
+        for name, rows in added.items():
+            self.__conn.executemany(
+                'INSERT INTO "{}_text" VALUES ({})'.format(
+                    name, ', '.join('?' * len(rows[0]))), rows)
+
+    def __create_text(self, name):
+        """Creates the full-text table of class name, filled from its rows"""
+        fields = ', '.join(self.__text[name])
+        exists = self.__conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?",
+            (name + '_text',)).fetchone()
+        if exists:
+            return
+        try:
+            self.__conn.execute(
+                'CREATE VIRTUAL TABLE "{}_text" USING fts5(id UNINDEXED, {})'
+                .format(name, fields))
+        except sqlite3.OperationalError:
+            self.__fts = False
+            return
+        self.__conn.execute('INSERT INTO "{0}_text" SELECT id, {1} FROM "{0}"'
+                            .format(name, fields))
+
+    def flush(self):
+        """Does nothing: every save is written by the time it returns"""
+
+    def refresh(self):
+        """Forgets the unchanged objects read so far
+
+        Other processes may have saved them since; they are read again
+        from the database when next asked for.
+        """
+        self.__objects = {key: obj for key, obj in self.__objects.items()
+                          if key in self.__dirty}
+
+    def close(self):
+        """Closes the database connection"""
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def __table_columns(self, name):
+        """Returns the column names of the table for class name"""
+        return ['id', 'created_at', 'updated_at'] + \
+            list(self.__columns[name]) + ['extra']
+
+    def __row(self, obj):
+        """Converts obj into a tuple of column values"""
+        name = type(obj).__name__
+        values = obj.to_dict()
+        del values['__class__']
+        row = [values.pop('id'), values.pop('created_at'),
+               values.pop('updated_at')]
+        for column, default in self.__columns[name].items():
+            value = values.pop(column, None)
+            if value is not None and type(default) not in self.__types:
+                value = json.dumps(value)
+            row.append(value)
+        row.append(json.dumps(values) if values else None)
+        return tuple(row)
+
+    def __name(self, cls):
+        """Returns the name of cls, a class or name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __names(self, cls=None):
+        """Returns the names of cls, or of every class"""
+        return [self.__name(cls)] if cls else list(self.__classes)
+
+    def __load(self, name, row):
+        """Returns the object for row, reusing the in-memory instance"""
+        key = name + '.' + row['id']
+        if key in self.__deleted:
+            return None
+        if key in self.__objects:
+            return self.__objects[key]
+        obj = self.__classes[name](**self.__entry(name, row))
+        self.__objects[key] = obj
+        return obj
+
+    def __entry(self, name, row):
+        """Returns the dictionary form of the object stored in row"""
+        kwargs = {'__class__': name, 'id': row['id'],
+                  'created_at': row['created_at'],
+                  'updated_at': row['updated_at']}
+        for column, default in self.__columns[name].items():
+            value = row[column]
+            if value is None:
+                continue
+            if type(default) not in self.__types:
+                value = json.loads(value)
+            kwargs[column] = value
+        if row['extra']:
+            kwargs.update(json.loads(row['extra']))
+        return kwargs
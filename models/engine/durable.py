@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""This module writes storage files atomically and durably"""
+import os
+import threading
+import time
+
+LEVELS = ('none', 'group', 'always')
+
+
+def write_atomic(path, text, sync=True, sync_rename=True):
+    """Replaces the file at path with text in a single step
+
+    text, a str or bytes or an iterable of pieces of either, is written
+    to a temporary file in the same directory, which is renamed over
+    path once complete, so readers and a crashed process see either the
+    old file or the new one, never a truncated one. With sync set, the
+    temporary file is flushed to disk before the rename and the
+    directory after it, so the new file also survives a power loss.
+    Clearing sync_rename leaves the directory to a later sync_dir():
+    until then a power loss may bring back the old file, but never a
+    partial new one.
+    """
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    pieces = iter((text,) if isinstance(text, (str, bytes)) else text)
+    first = next(pieces, '')
+    try:
+        with open(tmp, 'wb' if isinstance(first, bytes) else 'w') as f:
+            f.write(first)
+            for piece in pieces:
+                f.write(piece)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    if sync and sync_rename:
+        sync_dir(path)
+
+
+def sync_file(path):
+    """Flushes the file at path and its directory entry to disk"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    sync_dir(path)
+
+
+def sync_dir(path):
+    """Flushes the directory holding path, making renames durable"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:  # directories cannot be opened on some platforms
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class GroupCommit:
+    """Coalesces the fsyncs of a burst of writes into one
+
+    request(path) syncs at once when no sync ran in the last interval
+    seconds; otherwise path is remembered and a timer syncs every
+    remembered path when the interval is over. A write is therefore on
+    disk at most interval seconds after it was made. Paths requested
+    with data cleared only have their directory synced, for files whose
+    content was synced before they were renamed.
+    """
+
+    def __init__(self, interval=0.05):
+        """Creates a group commit syncing at most once per interval"""
+        self.interval = interval
+        self.syncs = 0
+        self.__pending = {}  # {path: whether its content needs a sync}
+        self.__last = 0.0
+        self.__timer = None
+        self.__lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """True while some write waits for its sync"""
+        return bool(self.__pending)
+
+    def request(self, path, data=True):
+        """Syncs path now, or with the next group if one just ran"""
+        with self.__lock:
+            self.__pending[path] = self.__pending.get(path, False) or data
+            wait = self.__last + self.interval - time.monotonic()
+            if wait <= 0:
+                self.__sync()
+            elif self.__timer is None:
+                self.__timer = threading.Timer(wait, self.sync)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def sync(self):
+        """Syncs every pending path now"""
+        with self.__lock:
+            self.__sync()
+
+    def __sync(self):
+        """Syncs the pending paths; the lock must be held"""
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__pending:
+            return
+        paths, self.__pending = self.__pending, {}
+        for path, data in paths.items():
+            if data:
+                sync_file(path)
+            else:
+                sync_dir(path)
+        self.__last = time.monotonic()
+        self.syncs += 1
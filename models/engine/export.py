@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""This module streams storage records to an NDJSON file"""
+import gzip
+import json
+import queue
+import threading
+
+BUFFER = 1 << 16  # characters encoded before a write
+
+
+def export_records(storage, cls, path, fields=None, compress=None):
+    """Writes one JSON object per line for each object of cls to path
+
+    cls is a class, a class name, or None for every class. fields, if
+    given, projects each record onto those keys. Records come one at a
+    time from storage.records(), so memory does not grow with the size
+    of the storage. compress, by default set when path ends in .gz,
+    gzips the output in a background thread. Returns the number of
+    records written.
+    """
+    if compress is None:
+        compress = path.endswith('.gz')
+    fields = list(fields) if fields else None
+    encode = json.JSONEncoder().encode
+    count = 0
+    with (_GzipWriter(path) if compress else open(path, 'w')) as f:
+        lines = []
+        size = 0
+        for key, record in storage.records(cls):
+            if fields is not None:
+                record = {field: record[field] for field in fields
+                          if field in record}
+            line = encode(record)
+            lines.append(line)
+            size += len(line)
+            count += 1
+            if size >= BUFFER:
+                f.write('\n'.join(lines) + '\n')
+                lines = []
+                size = 0
+        if lines:
+            f.write('\n'.join(lines) + '\n')
+    return count
+
+
+class _GzipWriter:
+    """Gzips text handed to write() in a background thread
+
+    At most a few buffers wait in the queue, so a slow compressor holds
+    back the producer instead of letting memory grow.
+    """
+
+    def __init__(self, path, depth=8):
+        """Opens path and starts the compressing thread"""
+        self.__file = gzip.open(path, 'wb')
+        self.__queue = queue.Queue(depth)
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def write(self, text):
+        """Queues text to be compressed"""
+        if self.__error is not None:
+            raise self.__error
+        self.__queue.put(text.encode())
+
+    def __run(self):
+        """Compresses queued buffers until the closing None"""
+        while True:
+            data = self.__queue.get()
+            if data is None:
+                break
+            if self.__error is None:
+                try:
+                    self.__file.write(data)
+                except Exception as e:
+                    self.__error = e
+
+    def close(self):
+        """Waits for queued text to be written and closes the file"""
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__file.close()
+        if self.__error is not None:
+            raise self.__error
+
+    def __enter__(self):
+        """Returns the writer itself"""
+        return self
+
+    def __exit__(self, *exc):
+        """Closes the writer"""
+        self.close()
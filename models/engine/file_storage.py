@@ -1,32 +1,1151 @@
 #!/usr/bin/python3
 """This module defines a class to manage file storage for hbnb clone"""
+import heapq
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from itertools import chain, dropwhile, islice
+from models.engine import geo, serializers, shards
+from models.engine.durable import LEVELS, GroupCommit, sync_dir, \
+    write_atomic
+from models.engine.bulk import import_records
+from models.engine.export import export_records
+from models.engine.indexes import KeyOrder, RangeIndex, declared_indexes
+from models.engine.locking import FileLock
+from models.engine.query import compile_filter, parse
+from models.engine.spill import SpillFile
+from models.engine.text import TextIndex
+from models.engine.writebehind import WriteBehind
+from numbers import Real
 
 
 class FileStorage:
-    """This class manages storage of hbnb models in JSON format"""
+    """This class manages storage of hbnb models in JSON format
+
+    Saves only re-encode the objects changed since the last one, and
+    objects are indexed by class and by the fields their model declares.
+    The options select the modes described under Storage Options in
+    README.md.
+    """
     __file_path = 'file.json'
-    __objects = {}
+    read_only = False
+    compact_min = 1000  # log records tolerated before auto compaction
+    progress_every = 10000  # objects loaded between progress reports
+    sync_interval = 0.05  # seconds between fsyncs with 'group' durability
+    text_rewrite = 0.1  # share of a text index changed before save writes it
+    flush_after = 1000  # queued saves that trigger a write-behind flush
+
+    def __init__(self, file_path=None, journal=False, lazy=False,
+                 epoch=False, compact=False, durability='none',
+                 write_behind=None, flush_after=None, shared=False,
+                 sharded=False, buckets=None, format='json',
+                 cache_size=None):
+        """Creates an empty storage bound to file_path"""
+        if sharded and journal:
+            raise ValueError('a sharded storage cannot use a journal')
+        if durability not in LEVELS:
+            raise ValueError('durability must be one of ' + ', '.join(LEVELS))
+        if format not in serializers.FORMATS:
+            raise ValueError('format must be one of ' +
+                             ', '.join(serializers.FORMATS))
+        if cache_size is not None and cache_size < 1:
+            raise ValueError('cache_size must be at least 1')
+        self.__file_path = file_path or FileStorage.__file_path
+        self.__classes = self.classes(compact)
+        self.__objects = {}
+        self.__prefixes = {}
+        self.__raw = {}
+        self.__by_class = {}
+        self.__order = {}  # {name: KeyOrder} for paging by id
+        self.__indexes = {name: {index.field: index
+                                 for index in declared_indexes(cls)}
+                          for name, cls in self.__classes.items()}
+        self.__geo = {name: geo.GeoIndex(cls.__located__)
+                      for name, cls in self.__classes.items()
+                      if hasattr(cls, '__located__')}
+        self.__text = {name: TextIndex(cls.__searchable__)
+                       for name, cls in self.__classes.items()
+                       if hasattr(cls, '__searchable__')}
+        self.__journal = journal
+        self.__lazy = lazy or cache_size is not None
+        self.__cache_size = cache_size
+        # built keys, least recently used first; None when unbounded
+        self.__lru = None if cache_size is None else OrderedDict()
+        self.__hits = self.__misses = self.__evictions = 0
+        self.__spill = None  # created by the first entry spilled
+        self.__spill_base = 0  # its size when last repacked
+        self.__at = {}  # {key: location} of built objects spilled as is
+        self.__epoch = epoch
+        self.__format = serializers.FORMATS[format](self.classes(), epoch)
+        self.__dirty = set()
+        self.__encoded = {}
+        self.__log_records = 0
+        self.__batch = 0
+        self.__durability = durability
+        self.__group = GroupCommit(self.sync_interval) \
+            if durability == 'group' else None
+        self.__lock = threading.RLock()  # guards the objects and indexes
+        self.__io = threading.RLock()  # held while writing files
+        self.__behind = None if write_behind is None else WriteBehind(
+            self.__flush, write_behind, flush_after or self.flush_after)
+        self.__shared = FileLock(self.lock_path) if shared else None
+        self.__generation = None  # of the snapshot last read or written
+        self.__log_offset = 0  # journal bytes already applied
+        self.__buckets = dict(buckets or {})
+        # classes whose shards are not read yet; None when not sharded
+        self.__unloaded = set(self.__classes) if sharded else None
+        self.__restripe = set()  # classes whose shards need a rewrite
+        self.__flushes = 0
+        self.__flush_time = 0.0
+        self.__flush_last = 0.0
+        self.__flush_max = 0.0
+
+    @property
+    def durability(self):
+        """When saves are flushed to disk: 'none', 'group' or 'always'"""
+        return self.__durability
+
+    @property
+    def format(self):
+        """Name of the format snapshots are written in"""
+        return self.__format.name
+
+    @property
+    def models(self):
+        """The model classes objects are built as, by name"""
+        return dict(self.__classes)
+
+    @property
+    def log_path(self):
+        """Path of the journal kept next to the snapshot file"""
+        return self.__file_path + '.log'
+
+    @property
+    def lock_path(self):
+        """Path of the lock file kept next to a shared snapshot file"""
+        return self.__file_path + '.lock'
+
+    @property
+    def shard_dir(self):
+        """Directory of the shard files of a sharded storage"""
+        return self.__file_path + '.d'
+
+    @property
+    def search_path(self):
+        """Path of the full-text index kept next to the snapshot file"""
+        return self.__file_path + '.search'
+
+    def all(self, cls=None):
+        """Returns a dictionary of models currently in storage
+
+        When cls (a class or class name) is given, only its objects are
+        returned, taken from the per-class index.
+        """
+        if cls is None:
+            self.__load_all()
+            if self.__lru is not None:
+                return {key: self.__object(key)
+                        for objs in list(self.__by_class.values())
+                        for key in list(objs)}
+            for key in list(self.__raw):
+                self.__materialize(key)
+            return self.__objects
+        name = self.__name(cls)
+        objs = dict(self.__by_class.get(name, {}))
+        for key, obj in objs.items():
+            if obj is None:
+                objs[key] = self.__materialize(key)
+            else:
+                self.__touch(key)
+        return objs
+
+    def get(self, cls, id):
+        """Returns the object of class cls with the given id, or None"""
+        name = self.__name(cls)
+        key = name + '.' + id
+        obj = self.__objects.get(key)
+        if obj is None and key in self.__raw:
+            obj = self.__materialize(key)
+        elif obj is not None:
+            self.__touch(key)
+        return obj
+
+    def find(self, cls, field, value):
+        """Returns the objects of class cls whose field equals value
+
+        Uses the secondary index on field when cls declares one and
+        falls back to scanning the objects of cls otherwise.
+        """
+        name = self.__name(cls)
+        index = self.__indexes.get(name, {}).get(field)
+        if index is None:
+            return [obj for obj in self.all(name).values()
+                    if getattr(obj, field, None) == value]
+        found = []
+        for key in index.lookup(value):
+            if key in self.__objects or key in self.__raw:
+                found.append(self.__object(key))
+        return found
+
+    def query(self, cls, **predicates):
+        """Yields the objects of cls matching every field__op=value
+
+        ops are eq (the default), ne, lt, lte, gt and gte. An equality
+        on an indexed field, or else a range on a field with a
+        RangeIndex, narrows the candidates through that index; they are
+        then tested in a single pass as they are visited.
+        """
+        name = self.__name(cls)
+        terms = parse(predicates)
+        match = compile_filter(terms)
+        objs = self.__by_class.get(name, {})
+        keys = self.__candidates(name, terms)
+        for key in objs if keys is None else keys:
+            if key in objs:
+                obj = self.__object(key)
+                if match(obj):
+                    yield obj
+
+    def __candidates(self, name, terms):
+        """Returns the keys an index narrows terms to, or None"""
+        indexes = self.__indexes.get(name, {})
+        for field, op, value in terms:
+            if op == 'eq' and field in indexes:
+                return indexes[field].lookup(value)
+        for field, index in indexes.items():
+            if not isinstance(index, RangeIndex):
+                continue
+            bounds = {}
+            for term, op, value in terms:
+                if term == field and op in ('lt', 'lte', 'gt', 'gte') and \
+                        isinstance(value, Real):
+                    bounds[op] = value
+            if bounds:
+                low = bounds.get('gte', bounds.get('gt'))
+                high = bounds.get('lte', bounds.get('lt'))
+                return index.range(low, high, 'gt' not in bounds,
+                                   'lt' not in bounds)
+        return None
+
+    def top(self, cls, field, n, reverse=False, **predicates):
+        """Returns the n objects of cls matching predicates with the
+        lowest value of field, or the highest with reverse set
+
+        With a RangeIndex on field, the index is walked in order and
+        stops after n matches, unless an equality on a hash indexed
+        field gives a smaller candidate set to select from.
+        """
+        name = self.__name(cls)
+        indexes = self.__indexes.get(name, {})
+        index = indexes.get(field)
+        narrowed = any(op == 'eq' and term in indexes and
+                       not isinstance(indexes[term], RangeIndex)
+                       for term, op, value in parse(predicates))
+        if not isinstance(index, RangeIndex) or narrowed:
+            objs = (obj for obj in self.query(name, **predicates)
+                    if isinstance(getattr(obj, field, None), Real))
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            return pick(n, objs, key=lambda obj: getattr(obj, field))
+        match = compile_filter(parse(predicates))
+        found = []
+        for key in index.range(reverse=reverse):
+            if len(found) >= n:
+                break
+            obj = self.__object(key)
+            if match(obj):
+                found.append(obj)
+        return found
+
+    def within(self, cls, south, west, north, east):
+        """Returns the objects of cls located inside a lat/lon box
+
+        The box crosses the antimeridian when west is greater than east.
+        Classes listing their coordinate fields in __located__ are
+        searched through a grid index; others are scanned.
+        """
+        name = self.__name(cls)
+        return [self.__object(key) for key, lat, lon in
+                self.__located(name, south, west, north, east)]
+
+    def near(self, cls, lat, lon, km, limit=None):
+        """Returns (distance in km, object) pairs of cls within km of
+        lat, lon, nearest first"""
+        name = self.__name(cls)
+        pairs = geo.closest(lat, lon, km, self.__located(
+            name, *geo.bounds(lat, lon, km)), limit)
+        return [(d, self.__object(key)) for d, key in pairs]
+
+    def nearest(self, cls, lat, lon, k):
+        """Returns the (distance in km, object) pairs of the k objects
+        of cls nearest to lat, lon"""
+        return geo.nearest(lambda *args: self.near(cls, *args), lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Returns (score, object) pairs of cls matching terms, best first
+
+        Objects are ranked with BM25 over the text fields their class
+        lists in __searchable__; other classes have nothing to search.
+        """
+        name = self.__name(cls)
+        if name not in self.__text:
+            return []
+        return [(score, self.__object(key)) for score, key in
+                self.__text[name].search(terms, limit)]
+
+    def __located(self, name, south, west, north, east):
+        """Returns (key, lat, lon) for the objects of name in the box"""
+        if name in self.__geo:
+            return self.__geo[name].box(south, west, north, east)
+        found = []
+        for key in self.__by_class.get(name, {}):
+            obj = self.__object(key)
+            lat = getattr(obj, 'latitude', None)
+            lon = getattr(obj, 'longitude', None)
+            if isinstance(lat, Real) and isinstance(lon, Real) and \
+                    geo.in_box(lat, lon, south, west, north, east):
+                found.append((key, lat, lon))
+        return found
+
+    def __name(self, cls):
+        """Returns the name of cls, a class or name, reading its shards
+        if they are not read yet"""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if self.__unloaded and name in self.__unloaded:
+            self.__read_shards(name)
+        return name
+
+    def __load_all(self):
+        """Reads the shards of every class not read yet"""
+        for name in list(self.__unloaded or ()):
+            self.__read_shards(name)
+
+    def __read_shards(self, name):
+        """Loads the objects of class name from its shard files
+
+        Files left by another bucket layout are read too, and the class
+        is marked for a rewrite in the current layout.
+        """
+        with self.__locked(), self.__lock:
+            if name not in self.__unloaded:
+                return
+            self.__unloaded.discard(name)
+            found = shards.existing(self.shard_dir, name)
+            if set(found) - set(shards.layout(self.shard_dir, name,
+                                              self.__buckets.get(name))):
+                self.__restripe.add(name)
+            if name in self.__text:
+                self.__read_text(name)
+            for key, val in self.__shard_entries(found):
+                if key not in self.__dirty:
+                    self.__load(key, val)
+            if name in self.__text:
+                text = self.__text[name]
+                for key in set(text.keys()) - \
+                        set(self.__by_class.get(name, ())):
+                    text.remove(key)
+            self.__spill_loaded()
 
-    def all(self):
-        """Returns a dictionary of models currently in storage"""
-        return FileStorage.__objects
+    def __shard_entries(self, paths):
+        """Yields (key, entry) from the shard files at paths"""
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    for key, val, position in serializers.read(f):
+                        yield key, val
+            except FileNotFoundError:
+                pass
+
+    def __object(self, key):
+        """Returns the object under key, building it if needed"""
+        obj = self.__objects.get(key)
+        if obj is None:
+            return self.__materialize(key)
+        self.__touch(key)
+        return obj
+
+    def count(self, cls=None):
+        """Returns the number of objects in storage, or of class cls"""
+        if cls is None:
+            self.__load_all()
+            return len(self.__objects) + len(self.__raw)
+        name = self.__name(cls)
+        return len(self.__by_class.get(name, ()))
+
+    def records(self, cls=None):
+        """Yields (key, dictionary form) for each object, or those of cls
+
+        Lazily loaded entries are yielded as decoded, without building
+        their instance, so walking the storage keeps memory flat.
+        """
+        if cls is None:
+            self.__load_all()
+            entries = (entry for objs in self.__by_class.values()
+                       for entry in objs.items())
+        else:
+            name = self.__name(cls)
+            entries = self.__by_class.get(name, {}).items()
+        for key, obj in entries:
+            yield key, self.__val(key, obj if obj is not None
+                                  else self.__raw[key])
+
+    def page(self, cls=None, limit=None, offset=0, after=None):
+        """Yields up to limit objects of cls, or of every class
+
+        Each class is walked in id order, so pages are stable without
+        sorting. The first offset objects are skipped, and with after
+        (an id) only the objects whose id follows it are yielded, even
+        if it was deleted since. Only the objects yielded are built in
+        lazy mode. A negative limit or offset raises ValueError.
+        """
+        if offset < 0 or limit is not None and limit < 0:
+            raise ValueError('limit and offset must be at least 0')
+        if cls is None:
+            self.__load_all()
+            names = list(self.__by_class)
+        else:
+            names = [self.__name(cls)]
+        keys = chain.from_iterable(
+            self.__order.get(name, KeyOrder()).after(
+                name + '.' + after if cls and after is not None else None)
+            for name in names)
+        if after is not None and not cls:
+            keys = dropwhile(lambda key: key.partition('.')[2] != after,
+                             keys)
+            next(keys, None)
+        stop = None if limit is None else offset + limit
+        return (self.__object(key) for key in islice(keys, offset, stop))
+
+    @property
+    def dirty(self):
+        """Keys changed since the last save"""
+        return frozenset(self.__dirty)
 
     def new(self, obj):
-        """Adds new object to storage dictionary"""
-        self.all().update({obj.to_dict()['__class__'] + '.' + obj.id: obj})
+        """Adds new object to storage dictionary and marks it dirty"""
+        key = self.__key(obj)
+        if self.__unloaded:
+            self.__name(type(obj))
+        with self.__lock:
+            self.__put(key, obj)
+            self.__dirty.add(key)
+
+    def delete(self, obj=None):
+        """Removes obj from storage dictionary if it is present"""
+        if obj is None:
+            return
+        key = self.__key(obj)
+        if self.__unloaded:
+            self.__name(type(obj))
+        with self.__lock:
+            if self.__drop(key) is not None:
+                self.__dirty.add(key)
+                self.__encoded.pop(key, None)
+
+    def __key(self, obj):
+        """Returns the storage key of obj from a per-class cached prefix"""
+        cls = type(obj)
+        prefix = self.__prefixes.get(cls)
+        if prefix is None:
+            prefix = self.__prefixes[cls] = cls.__name__ + '.'
+        return prefix + obj.id
+
+    def __put(self, key, obj):
+        """Stores obj under key and indexes it"""
+        name = key.partition('.')[0]
+        self.__raw.pop(key, None)
+        self.__objects[key] = obj
+        objs = self.__by_class.setdefault(name, {})
+        if key not in objs:
+            self.__order.setdefault(name, KeyOrder()).add(key)
+        objs[key] = obj
+        if self.__lru is not None:
+            self.__at.pop(key, None)
+            self.__cache(key)
+        for field, index in self.__indexes.get(name, {}).items():
+            index.add(key, getattr(obj, field, None))
+        if name in self.__geo:
+            located = self.__geo[name]
+            located.add(key, *(getattr(obj, field, None)
+                               for field in located.fields))
+        if name in self.__text:
+            text = self.__text[name]
+            text.add(key, *(getattr(obj, field, None)
+                            for field in text.fields))
+
+    def __put_raw(self, key, val):
+        """Stores the decoded entry val under key without building it"""
+        name = key.partition('.')[0]
+        cls = self.__classes[val['__class__']]
+        self.__objects.pop(key, None)
+        if self.__lru is not None:
+            self.__lru.pop(key, None)
+            self.__at.pop(key, None)
+        self.__raw[key] = val
+        objs = self.__by_class.setdefault(name, {})
+        if key not in objs:
+            self.__order.setdefault(name, KeyOrder()).add(key)
+        objs[key] = None
+        for field, index in self.__indexes.get(name, {}).items():
+            index.add(key, val.get(field, getattr(cls, field, None)))
+        if name in self.__geo:
+            located = self.__geo[name]
+            located.add(key, *(val.get(field, getattr(cls, field, None))
+                               for field in located.fields))
+        if name in self.__text:
+            text = self.__text[name]
+            text.add(key, *(val.get(field, getattr(cls, field, None))
+                            for field in text.fields))
+        if self.__lru is not None:
+            self.__raw[key] = self.__spilled(self.__format.entry(key, val))
+
+    def __materialize(self, key):
+        """Builds the model instance for a lazily loaded key"""
+        with self.__lock:
+            val = self.__raw.get(key)
+            if val is None:  # built by another thread meanwhile
+                return self.__objects[key]
+            obj = self.__val(key, val)
+            obj = self.__classes[obj['__class__']](**obj)
+            self.__objects[key] = obj
+            del self.__raw[key]
+            self.__by_class[key.partition('.')[0]][key] = obj
+            cached = self.__encoded.get(key)
+            if cached is not None and cached[0] is val:
+                self.__encoded[key] = (obj, cached[1])
+            if self.__lru is not None:
+                self.__at[key] = val
+                self.__misses += 1
+                self.__cache(key)
+        return obj
+
+    def __touch(self, key):
+        """Counts a cache hit on the built key, making it the most
+        recently used"""
+        if self.__lru is not None:
+            try:
+                self.__lru.move_to_end(key)
+            except KeyError:  # evicted by another thread meanwhile
+                return
+            self.__hits += 1
+
+    def __cache(self, key):
+        """Notes key as built and evicts the least recently used keys
+        over cache_size; the lock must be held
+
+        An evicted object is flushed to the spill file first, unless it
+        is there already as it is, and only its location is kept.
+        """
+        self.__lru[key] = None
+        self.__lru.move_to_end(key)
+        while len(self.__lru) > self.__cache_size:
+            old = self.__lru.popitem(last=False)[0]
+            obj = self.__objects.pop(old)
+            cached = self.__encoded.pop(old, None)
+            location = self.__at.pop(old, None)
+            if location is None or old in self.__dirty:
+                location = self.__spilled(
+                    cached[1] if cached is not None and cached[0] is obj
+                    and old not in self.__dirty
+                    else self.__format.entry(old, obj.to_dict(self.__epoch)))
+            self.__raw[old] = location
+            self.__by_class[old.partition('.')[0]][old] = None
+            self.__evictions += 1
+        if self.__spill is not None and self.__spill.size > \
+                2 * self.__spill_base + SpillFile.buffer_size:
+            self.__spill = self.__spill.repack(self.__raw, self.__at)
+            self.__spill_base = self.__spill.size
+
+    def __spilled(self, entry):
+        """Writes the encoded entry to the spill file and returns its
+        location; the lock must be held"""
+        if self.__spill is None:
+            self.__spill = SpillFile(os.path.dirname(
+                os.path.abspath(self.__file_path)))
+        return self.__spill.write(entry)
+
+    def __entry_at(self, location):
+        """Returns the encoded entry at a location in the spill file"""
+        spill, offset, length = location
+        entry = spill.read(offset, length)
+        return entry if self.__format.binary else entry.decode()
+
+    def __val(self, key, obj):
+        """Returns the dictionary form of obj, stored under key as an
+        instance, a decoded entry or the location of a spilled one"""
+        if isinstance(obj, dict):
+            return obj
+        if type(obj) is tuple:
+            return self.__format.decode(key, self.__entry_at(obj))
+        return obj.to_dict(self.__epoch)
+
+    def __drop(self, key):
+        """Removes key from storage and its indexes, returning the object"""
+        name = key.partition('.')[0]
+        if self.__by_class.get(name, {}).pop(key, False) is not False:
+            self.__order[name].remove(key)
+        for index in self.__indexes.get(name, {}).values():
+            index.remove(key)
+        if name in self.__geo:
+            self.__geo[name].remove(key)
+        if name in self.__text:
+            self.__text[name].remove(key)
+        obj = self.__objects.pop(key, None)
+        val = self.__raw.pop(key, None)
+        if self.__lru is not None:
+            self.__lru.pop(key, None)
+            self.__at.pop(key, None)
+        return obj if obj is not None else val
+
+    @property
+    def in_batch(self):
+        """True while a batch started by begin() is open"""
+        return self.__batch > 0
+
+    def begin(self):
+        """Starts a batch: saves are deferred until commit()
+
+        Batches nest; only the outermost commit() writes to disk. In
+        write-behind mode, saves queued before the outermost begin() are
+        flushed first, so that rollback() cannot discard them.
+        """
+        if not self.__batch and self.__behind is not None and \
+                self.__behind.queued:
+            self.__behind.flush()
+        self.__batch += 1
+
+    def commit(self):
+        """Ends the current batch, saving once when it is the outermost"""
+        if self.__batch:
+            self.__batch -= 1
+        if not self.__batch:
+            self.save()
+
+    def rollback(self):
+        """Ends every open batch and discards all unsaved changes
+
+        Each dirty key is restored from the file (snapshot and journal)
+        or dropped if it was never saved. Restored objects are new
+        instances; references to the discarded ones are stale.
+        """
+        self.__batch = 0
+        keys = set(self.__dirty)
+        saved = {}
+        with self.__locked():
+            if self.__shared is not None:
+                self.__refresh()
+            if keys:
+                names = {key.partition('.')[0] for key in keys}
+                for key, val in self.__stored(names=names):
+                    if key in keys:
+                        saved[key] = val
+            with self.__lock:
+                for key in keys:
+                    self.__encoded.pop(key, None)
+                    self.__load(key, saved.get(key))
+                self.__dirty -= keys
+
+    @contextmanager
+    def batch(self):
+        """Context manager committing on success, rolling back on error"""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def bulk_import(self, cls, path, types=None, **options):
+        """Imports the NDJSON or CSV records of path as instances of cls
+
+        See models.engine.bulk.import_records for the options.
+        """
+        return import_records(self, cls, path, types, **options)
+
+    def export(self, cls, path, fields=None, compress=None):
+        """Streams the objects of cls, or every object, to an NDJSON file
+
+        See models.engine.export.export_records for the options.
+        """
+        return export_records(self, cls, path, fields, compress)
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            temp = {}
-            temp.update(FileStorage.__objects)
-            for key, val in temp.items():
-                temp[key] = val.to_dict()
-            json.dump(temp, f)
-
-    def reload(self):
-        """Loads storage dictionary from file"""
+        """Saves storage dictionary to file, unless a batch is open
+
+        In write-behind mode the save is only queued for the flusher.
+        """
+        if self.__batch:
+            return
+        if self.__behind is not None:
+            self.__behind.schedule()
+        else:
+            self.__flush()
+
+    def flush(self):
+        """Returns once every save queued in write-behind mode is written
+
+        An error met by the flusher since the last call is raised here.
+        """
+        if self.__behind is not None:
+            self.__behind.flush()
+
+    def close(self):
+        """Flushes queued saves, stops the flusher and syncs to disk
+
+        Full-text index changes a save left unwritten are written too.
+        """
+        try:
+            if self.__behind is not None:
+                self.__behind.close()
+            self.__save_text()
+        finally:
+            self.sync()
+            if self.__shared is not None:
+                self.__shared.close()
+
+    @property
+    def metrics(self):
+        """Returns counters of the saves written and waiting
+
+        queued is the number of saves waiting for the write-behind
+        flusher, dirty the number of keys changed since the last write,
+        and flushes the number of writes, whose mean, last and max
+        durations are in milliseconds. With cache_size set, cached is
+        the number of instances kept, hits and misses count the objects
+        reached already built or built for the occasion, and evictions
+        the instances dropped.
+        """
+        flushes = self.__flushes
+        return {
+            'queued': self.__behind.queued if self.__behind else 0,
+            'dirty': len(self.__dirty),
+            'flushes': flushes,
+            'errors': self.__behind.errors if self.__behind else 0,
+            'mean_ms': self.__flush_time * 1000 / flushes if flushes else 0.0,
+            'last_ms': self.__flush_last * 1000,
+            'max_ms': self.__flush_max * 1000,
+            'cached': len(self.__lru) if self.__lru is not None else 0,
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+        }
+
+    def __flush(self):
+        """Writes the changes made since the last write, timing it"""
+        start = time.perf_counter()
+        with self.__io, self.__locked(True):
+            if self.__shared is not None:
+                self.__refresh()
+            if self.__journal:
+                self.__append_log()
+            else:
+                self.__write_snapshot()
+        elapsed = time.perf_counter() - start
+        self.__flushes += 1
+        self.__flush_time += elapsed
+        self.__flush_last = elapsed
+        self.__flush_max = max(self.__flush_max, elapsed)
+
+    def sync(self):
+        """Flushes saves still waiting for a 'group' fsync to disk"""
+        if self.__group is not None:
+            self.__group.sync()
+
+    def compact(self):
+        """Folds the journal into the snapshot and truncates it
+
+        Unless durability is 'none', the snapshot is on disk before the
+        journal is truncated.
+        """
+        with self.__io, self.__locked(True):
+            if self.__shared is not None:
+                self.__refresh()
+            self.__write_snapshot(self.__durability != 'none', True)
+            if os.path.exists(self.log_path):
+                open(self.log_path, 'w').close()
+            self.__log_records = 0
+            self.__log_offset = 0
+
+    def refresh(self):
+        """Applies what other processes saved since this one last read
+
+        Changes made here and not saved yet are kept. Does nothing
+        unless the storage is shared.
+        """
+        if self.__shared is not None:
+            with self.__shared.shared():
+                self.__refresh()
+
+    def __locked(self, exclusive=False):
+        """Returns a context holding the file lock, if shared"""
+        if self.__shared is None:
+            return nullcontext()
+        return self.__shared.exclusive() if exclusive \
+            else self.__shared.shared()
+
+    def __refresh(self):
+        """Catches up with other processes; the file lock must be held"""
+        generation = self.__shared.generation()
+        if generation != self.__generation:
+            self.__merge()
+            self.__generation = generation
+            self.__log_offset = 0
+        if self.__journal:
+            with self.__lock:
+                for key, val in self.__replay_log(self.__log_offset):
+                    if key not in self.__dirty:
+                        self.__encoded.pop(key, None)
+                        self.__load(key, val)
+
+    def __merge(self):
+        """Loads a snapshot replaced by another process
+
+        Dirty keys keep their local state. Entries encoded as in the
+        cache are unchanged and skipped; keys missing from the snapshot
+        were deleted and are dropped.
+        """
+        with self.__lock:
+            seen = set()
+            for key, val in self.__snapshot():
+                seen.add(key)
+                if key in self.__dirty:
+                    continue
+                entry = self.__format.entry(key, val)
+                cached = self.__encoded.get(key)
+                current = self.__objects.get(key, self.__raw.get(key))
+                if type(current) is tuple:
+                    if self.__entry_at(current) == entry:
+                        continue
+                elif cached is not None and cached[1] == entry and \
+                        cached[0] is current:
+                    continue
+                self.__load(key, val)
+                current = self.__objects.get(key, self.__raw.get(key))
+                if type(current) is not tuple:
+                    self.__encoded[key] = (current, entry)
+            gone = [key for key in chain(self.__objects, self.__raw)
+                    if key not in seen and key not in self.__dirty]
+            for key in gone:
+                self.__drop(key)
+                self.__encoded.pop(key, None)
+
+    def __write_snapshot(self, sync=False, force_text=False):
+        """Replaces the snapshot file, re-encoding only dirty objects
+
+        With sync set, the file is on disk when this returns, whatever
+        the durability. The objects are listed under the lock and
+        encoded outside of it, so other threads are held up only for
+        the listing. A sharded storage only replaces the shards holding
+        dirty keys.
+        """
+        with self.__lock:
+            dirty, self.__dirty = self.__dirty, set()
+            restripe, self.__restripe = self.__restripe, set()
+            if self.__unloaded is None:
+                entries = list(self.__objects.items())
+                entries.extend(self.__raw.items())
+                files = {self.__file_path: entries}
+            else:
+                files = self.__dirty_shards(dirty, restripe)
+            texts = self.__dump_text(force_text)
+        try:
+            if (files or texts) and self.__unloaded is not None:
+                os.makedirs(self.shard_dir, exist_ok=True)
+            for path, entries in files.items():
+                parts = (self.__encode(key, obj, dirty)
+                         for key, obj in entries)
+                self.__write_file(path, self.__format.document(parts)
+                                  if self.__lru is None else
+                                  serializers.stream(self.__format, parts),
+                                  sync)
+            for path, text in texts:
+                self.__write_file(path, text, sync)
+            for name in restripe:
+                layout = shards.layout(self.shard_dir, name,
+                                       self.__buckets.get(name))
+                for path in shards.existing(self.shard_dir, name):
+                    if path not in layout:
+                        os.remove(path)
+            if self.__shared is not None:
+                self.__generation = self.__shared.advance()
+        except BaseException:
+            with self.__lock:
+                self.__dirty |= dirty
+                self.__restripe |= restripe
+                for index in self.__text.values():
+                    index.changed = index.changed or len(texts)
+            raise
+
+    def __dirty_shards(self, dirty, restripe):
+        """Returns {shard path: [(key, object)]} for the shards holding
+        dirty keys and every shard of the classes in restripe
+
+        The lock must be held.
+        """
+        wanted = set()
+        for key in dirty:
+            name = key.partition('.')[0]
+            wanted.add((name, shards.bucket(key, self.__buckets.get(name))))
+        for name in restripe:
+            for number in shards.numbers(self.__buckets.get(name)):
+                wanted.add((name, number))
+        entries = {shard: [] for shard in wanted}
+        for name in {name for name, number in wanted}:
+            buckets = self.__buckets.get(name)
+            objs = self.__by_class.get(name, {}).items()
+            if shards.numbers(buckets) == [None]:
+                entries[(name, None)] = list(objs) if not self.__lazy else [
+                    (key, obj if obj is not None else self.__raw[key])
+                    for key, obj in objs]
+                continue
+            for key, obj in objs:
+                shard = (name, shards.bucket(key, buckets))
+                if shard in entries:
+                    entries[shard].append(
+                        (key, obj if obj is not None else self.__raw[key]))
+        return {shards.shard_path(self.shard_dir, *shard): items
+                for shard, items in entries.items()}
+
+    def __dump_text(self, force=False):
+        """Returns (path, JSON) for each full-text index file to replace
+
+        The saved index is only a cache checked against the objects on
+        reload, so a save only rewrites it once text_rewrite of its keys
+        changed; with force set, any change is written. A sharded
+        storage keeps the index of each class next to its shards;
+        otherwise all indexes share one file.
+        """
+        changed = [name for name, text in self.__text.items()
+                   if text.changed and (force or text.changed >=
+                                        self.text_rewrite * len(text.keys()))]
+        if not changed:
+            return []
+        if self.__unloaded is None:
+            for text in self.__text.values():
+                text.changed = 0
+            return [(self.search_path, json.dumps(
+                {name: text.dump() for name, text in self.__text.items()}))]
+        for name in changed:
+            self.__text[name].changed = 0
+        return [(self.__text_path(name), json.dumps(self.__text[name].dump()))
+                for name in changed]
+
+    def __save_text(self):
+        """Writes every full-text index change not saved yet"""
+        with self.__io, self.__locked(True):
+            with self.__lock:
+                texts = self.__dump_text(True)
+            if texts and self.__unloaded is not None:
+                os.makedirs(self.shard_dir, exist_ok=True)
+            for path, text in texts:
+                self.__write_file(path, text)
+
+    def __text_path(self, name=None):
+        """Path of the full-text index file, or of that of class name"""
+        if name is None:
+            return self.search_path
+        return os.path.join(self.shard_dir, name + '.search')
+
+    def __write_file(self, path, text, sync=False):
+        """Atomically replaces path with text, syncing per durability
+
+        With 'group' durability the new file is synced before it is
+        renamed; only the sync of the rename waits for the group.
+        """
+        group = self.__group is not None and not sync
+        write_atomic(path, text, sync or self.__durability != 'none',
+                     not group)
+        if group:
+            self.__group.request(path, data=False)
+
+    def __read_text(self, name=None):
+        """Loads the full-text index file saved with the snapshot, or
+        with the shards of class name"""
+        try:
+            with open(self.__text_path(name), 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if name is not None:
+            data = {name: data}
+        for name, text in self.__text.items():
+            if name in data:
+                text.load(data[name])
+
+    def __encode(self, key, obj, dirty):
+        """Returns the cached snapshot entry for obj, in the format
+        snapshots are written in
+
+        The cached entry is used unless key is in dirty. A spilled
+        entry is read back as it was written.
+        """
+        if type(obj) is tuple:
+            return self.__entry_at(obj)
+        cached = self.__encoded.get(key)
+        if cached is None or cached[0] is not obj or key in dirty:
+            cached = (obj, self.__format.entry(key, self.__val(key, obj)))
+            self.__encoded[key] = cached
+        return cached[1]
+
+    def __append_log(self):
+        """Appends one journal record per changed object"""
+        with self.__lock:
+            if not self.__dirty:
+                return
+            dirty, self.__dirty = self.__dirty, set()
+            changed = [(key, self.__objects.get(key, self.__raw.get(key)))
+                       for key in dirty]
+        created = not os.path.exists(self.log_path)
+        try:
+            with open(self.log_path, 'a') as f:
+                for key, obj in changed:
+                    if obj is None:
+                        record = {'op': 'delete', 'key': key}
+                    else:
+                        record = {'op': 'put', 'key': key,
+                                  'obj': self.__val(key, obj)}
+                    f.write(json.dumps(record) + '\n')
+                    self.__encoded.pop(key, None)
+                if self.__durability == 'always':
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.__log_offset = f.tell()
+        except BaseException:
+            with self.__lock:
+                self.__dirty |= dirty
+            raise
+        if created and self.__durability == 'always':
+            sync_dir(self.log_path)
+        if self.__group is not None:
+            self.__group.request(self.log_path)
+        self.__log_records += len(changed)
+        if self.__log_records > max(FileStorage.compact_min,
+                                    len(self.__objects) + len(self.__raw)):
+            self.compact()
+
+    def reload(self, progress=None):
+        """Loads storage dictionary from file
+
+        The file is parsed one entry at a time and each object is built
+        as soon as its entry is read. progress, if given, is called as
+        progress(loaded, position, size) every progress_every objects
+        and once at the end, with position the characters read so far,
+        or bytes for a binary snapshot, and size the file size in bytes.
+
+        The full-text index saved with the snapshot is read first, so
+        only objects whose text changed since are tokenized again.
+        """
+        with self.__locked(), self.__lock:
+            if self.__shared is not None:
+                self.__generation = self.__shared.generation()
+            if self.__unloaded is not None:
+                read = set(self.__classes) - self.__unloaded
+                self.__unloaded = set(self.__classes)
+                for name in read:
+                    self.__read_shards(name)
+                return
+            if not self.count():
+                self.__read_text()
+            for key, val in self.__stored(progress):
+                self.__load(key, val)
+            for name, text in self.__text.items():
+                for key in set(text.keys()) - \
+                        set(self.__by_class.get(name, ())):
+                    text.remove(key)
+            self.__spill_loaded()
+
+    def __spill_loaded(self):
+        """Counts the entries a load spilled as live, so that they are
+        not repacked until as much garbage builds up"""
+        if self.__spill is not None:
+            self.__spill_base = self.__spill.size
+
+    def __load(self, key, val):
+        """Stores the decoded entry val under key, or drops key if None"""
+        if val is None:
+            self.__drop(key)
+        elif self.__lazy:
+            self.__put_raw(key, val)
+        else:
+            self.__put(key, self.__classes[val['__class__']](**val))
+
+    def __stored(self, progress=None, names=None):
+        """Yields (key, entry) from the snapshot, then the journal
+
+        A None entry stands for a journaled delete. names, if given,
+        limits a sharded storage to the shards of those classes.
+        """
+        yield from self.__snapshot(progress, names)
+        if self.__journal:
+            yield from self.__replay_log()
+
+    def __snapshot(self, progress=None, names=None):
+        """Yields (key, entry) from the snapshot file
+
+        A sharded storage reads the shards of the classes already read,
+        or of those among names.
+        """
+        if self.__unloaded is not None:
+            for name in self.__classes if names is None else names:
+                if name not in self.__unloaded:
+                    yield from self.__shard_entries(
+                        shards.existing(self.shard_dir, name))
+            return
+        try:
+            with open(self.__file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                loaded = position = 0
+                for key, val, position in serializers.read(f):
+                    yield key, val
+                    loaded += 1
+                    if progress and loaded % self.progress_every == 0:
+                        progress(loaded, position, size)
+                if progress:
+                    progress(loaded, size, size)
+        except FileNotFoundError:
+            pass
+
+    def __replay_log(self, offset=0):
+        """Yields (key, entry or None) for each journal record
+
+        Replay starts at byte offset of the journal and
+        self.__log_offset is left just past the last complete record.
+        """
+        if not offset:
+            self.__log_records = 0
+        good = offset  # offset just past the last complete record
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # torn write from an interrupted save
+                    if not line.strip():
+                        good += len(line)
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # garbage left by a lost, unsynced append
+                    good += len(line)
+                    self.__log_records += 1
+                    yield record['key'], record.get('obj')
+        except FileNotFoundError:
+            self.__log_offset = 0
+            return
+        self.__log_offset = good
+        if good < os.path.getsize(self.log_path):
+            os.truncate(self.log_path, good)
+
+    @staticmethod
+    def classes(compact=False):
+        """Returns the model classes storage knows how to rebuild
+
+        With compact set, the slotted variant of each class is returned.
+        """
         from models.base_model import BaseModel
         from models.user import User
         from models.place import Place
@@ -36,15 +1155,11 @@ class FileStorage:
         from models.review import Review
 
         classes = {
-                    'BaseModel': BaseModel, 'User': User, 'Place': Place,
-                    'State': State, 'City': City, 'Amenity': Amenity,
-                    'Review': Review
+                   'BaseModel': BaseModel, 'User': User, 'Place': Place,
+                   'State': State, 'City': City, 'Amenity': Amenity,
+                   'Review': Review
                   }
-        try:
-            temp = {}
-            with open(FileStorage.__file_path, 'r') as f:
-                temp = json.load(f)
-                for key, val in temp.items():
-                        self.all()[key] = classes[val['__class__']](**val)
-        except FileNotFoundError:
-            pass
+        if compact:
+            from models.compact import compact as slotted
+            classes = {name: slotted(cls) for name, cls in classes.items()}
+        return classes
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""This module defines the spatial index and distance helpers of storage"""
+import math
+from numbers import Real
+
+try:
+    import numpy
+except ImportError:  # distances are then computed one at a time
+    numpy = None
+
+EARTH_RADIUS = 6371.0088  # mean radius, km
+KM_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+HALF_CIRCUMFERENCE = math.pi * EARTH_RADIUS
+
+
+def bounds(lat, lon, km):
+    """Returns the (south, west, north, east) box holding a circle
+
+    When the box crosses the antimeridian, west is greater than east.
+    Raises ValueError when the point is off the globe or km is negative.
+    """
+    check(lat, lon)
+    if not km >= 0:
+        raise ValueError('radius must be a number of km >= 0')
+    dlat = km / KM_PER_DEGREE
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if south == -90.0 or north == 90.0:
+        return south, -180.0, north, 180.0
+    dlon = dlat / max(math.cos(math.radians(max(abs(south), abs(north)))),
+                      1e-12)
+    if dlon >= 180:
+        return south, -180.0, north, 180.0
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def check(lat, lon):
+    """Raises ValueError unless lat, lon is a point on the globe"""
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('coordinates out of range')
+
+
+def distances(lat, lon, points):
+    """Returns the great circle distances in km from lat, lon to points
+
+    points is a sequence of (lat, lon) pairs. With NumPy installed the
+    haversine formula runs over all of them at once.
+    """
+    if numpy is not None and len(points) > 16:
+        coords = numpy.radians(numpy.asarray(points, dtype=float))
+        lat1, lon1 = math.radians(lat), math.radians(lon)
+        a = numpy.sin((coords[:, 0] - lat1) / 2) ** 2 + \
+            math.cos(lat1) * numpy.cos(coords[:, 0]) * \
+            numpy.sin((coords[:, 1] - lon1) / 2) ** 2
+        return (2 * EARTH_RADIUS *
+                numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))).tolist()
+    return [distance(lat, lon, plat, plon) for plat, plon in points]
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Returns the great circle distance in km between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def in_box(lat, lon, south, west, north, east):
+    """True when lat, lon lies in the box, which may cross the antimeridian"""
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def closest(lat, lon, km, candidates, limit=None):
+    """Returns (distance, item) pairs within km, nearest first
+
+    candidates is a list of (item, lat, lon) triples.
+    """
+    found = distances(lat, lon, [(c[1], c[2]) for c in candidates])
+    pairs = [(d, c[0]) for d, c in zip(found, candidates) if d <= km]
+    pairs.sort(key=lambda pair: pair[0])
+    return pairs[:limit] if limit is not None else pairs
+
+
+def nearest(search, lat, lon, k, km=10.0):
+    """Returns the k nearest (distance, item) pairs found by search
+
+    search(lat, lon, km) returns the pairs within km, nearest first; the
+    radius is doubled until k are found or the whole globe is covered.
+    """
+    while True:
+        pairs = search(lat, lon, km)
+        if len(pairs) >= k or km >= HALF_CIRCUMFERENCE:
+            return pairs[:k]
+        km *= 2
+
+
+def _number(value):
+    """True for a real number, checking the common types first"""
+    return type(value) in (float, int) or isinstance(value, Real)
+
+
+class GeoIndex:
+    """Buckets keys by the grid cell of their latitude and longitude
+
+    Cells are `cell` degrees on each side; a box or radius search only
+    visits the cells it overlaps. Keys without numeric coordinates are
+    left out.
+    """
+
+    def __init__(self, fields, cell=0.1):
+        """Creates an empty index over the (latitude, longitude) fields"""
+        self.fields = tuple(fields)
+        self.cell = cell
+        self.__points = {}
+        self.__cells = {}
+
+    def __len__(self):
+        """Returns the number of keys indexed"""
+        return len(self.__points)
+
+    def add(self, key, lat, lon):
+        """Indexes key at lat, lon, moving it if it changed"""
+        point = self.__points.get(key)
+        if point is not None:
+            if point == (lat, lon):
+                return
+            self.remove(key)
+        if not _number(lat) or not _number(lon) or \
+                not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            return
+        point = self.__points[key] = (lat, lon)
+        self.__cells.setdefault(self.__cell(lat, lon), {})[key] = point
+
+    def remove(self, key):
+        """Drops key from the index"""
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        keys = self.__cells[cell]
+        del keys[key]
+        if not keys:
+            del self.__cells[cell]
+
+    def box(self, south, west, north, east):
+        """Returns (key, lat, lon) for every key inside the box
+
+        Raises ValueError when a corner is off the globe.
+        """
+        check(south, west)
+        check(north, east)
+        if west > east:
+            return self.box(south, west, north, 180.0) + \
+                self.box(south, -180.0, north, east)
+        low, high = self.__cell(south, west), self.__cell(north, east)
+        rows = range(low[0], high[0] + 1)
+        cols = range(low[1], high[1] + 1)
+        if len(rows) * len(cols) > len(self.__cells):
+            cells = [cell for cell in self.__cells
+                     if cell[0] in rows and cell[1] in cols]
+        else:
+            cells = [(i, j) for i in rows for j in cols
+                     if (i, j) in self.__cells]
+        found = []
+        for cell in cells:
+            for key, (lat, lon) in self.__cells[cell].items():
+                if south <= lat <= north and west <= lon <= east:
+                    found.append((key, lat, lon))
+        return found
+
+    def radius(self, lat, lon, km, limit=None):
+        """Returns (distance, key) pairs within km, nearest first"""
+        return closest(lat, lon, km, self.box(*bounds(lat, lon, km)), limit)
+
+    def __cell(self, lat, lon):
+        """Returns the grid cell of lat, lon"""
+        return (math.floor(lat / self.cell), math.floor(lon / self.cell))
@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+"""This module defines the secondary indexes kept by the storage engines"""
+from bisect import bisect_left, bisect_right, insort
+from numbers import Real
+
+
+class HashIndex:
+    """Maps each value of one attribute to the storage keys holding it"""
+
+    def __init__(self, field):
+        """Creates an empty index over field"""
+        self.field = field
+        self.__keys = {}
+        self.__values = {}
+
+    def add(self, key, value):
+        """Indexes key under value, moving it if its value changed"""
+        if key in self.__values:
+            if self.__values[key] == value:
+                return
+            self.remove(key)
+        self.__values[key] = value
+        self.__keys.setdefault(value, {})[key] = None
+
+    def remove(self, key):
+        """Drops key from the index"""
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        keys = self.__keys[value]
+        del keys[key]
+        if not keys:
+            del self.__keys[value]
+
+    def lookup(self, value):
+        """Returns the keys indexed under value"""
+        return list(self.__keys.get(value, ()))
+
+
+class RangeIndex:
+    """Keeps the keys of one numeric attribute sorted by value
+
+    Entries live in a sorted list of (value, key) pairs searched with
+    bisect, so a range of k keys is found in O(log n + k). Additions
+    are buffered and merged on the next read, which keeps a reload from
+    shifting the list once per object. Keys whose value is not a number
+    are kept aside and only reached through lookup().
+    """
+
+    def __init__(self, field):
+        """Creates an empty index over field"""
+        self.field = field
+        self.__entries = []
+        self.__pending = []
+        self.__values = {}
+        self.__other = {}
+
+    def add(self, key, value):
+        """Indexes key under value, moving it if its value changed"""
+        if key in self.__values:
+            if self.__values[key] == value:
+                return
+            self.remove(key)
+        self.__values[key] = value
+        if isinstance(value, Real) and value == value:  # not NaN
+            self.__pending.append((value, key))
+        else:
+            self.__other[key] = value
+
+    def remove(self, key):
+        """Drops key from the index"""
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        if key in self.__other:
+            del self.__other[key]
+            return
+        entries = self.__sorted()
+        del entries[bisect_left(entries, (value, key))]
+
+    def lookup(self, value):
+        """Returns the keys indexed under value"""
+        if isinstance(value, Real):
+            return list(self.range(value, value))
+        return [key for key, other in self.__other.items() if other == value]
+
+    def range(self, low=None, high=None, low_inclusive=True,
+              high_inclusive=True, reverse=False):
+        """Yields the keys whose value lies between low and high
+
+        A bound of None is open. Keys come in value order, highest first
+        with reverse set.
+        """
+        entries = self.__sorted()
+        if low is None:
+            start = 0
+        elif low_inclusive:
+            start = bisect_left(entries, (low,))
+        else:
+            start = bisect_right(entries, (low, _MAX))
+        if high is None:
+            stop = len(entries)
+        elif high_inclusive:
+            stop = bisect_right(entries, (high, _MAX))
+        else:
+            stop = bisect_left(entries, (high,))
+        positions = range(start, stop)
+        for i in reversed(positions) if reverse else positions:
+            yield entries[i][1]
+
+    def __sorted(self):
+        """Returns the entry list with the buffered additions merged in"""
+        if self.__pending:
+            if len(self.__pending) < 8:
+                for entry in self.__pending:
+                    insort(self.__entries, entry)
+            else:
+                self.__entries.extend(self.__pending)
+                self.__entries.sort()
+            self.__pending = []
+        return self.__entries
+
+
+class KeyOrder:
+    """Keeps the storage keys of one class sorted, for paging by id
+
+    As in RangeIndex, additions are buffered and merged on the next
+    read. A page resumes by bisecting for the key it ended on, so it
+    starts in O(log n) even when that key is gone.
+    """
+
+    def __init__(self):
+        """Creates an empty key order"""
+        self.__keys = []
+        self.__pending = []
+
+    def add(self, key):
+        """Adds key, which must not be present yet"""
+        self.__pending.append(key)
+
+    def remove(self, key):
+        """Drops key if it is present"""
+        keys = self.__sorted()
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def after(self, key=None):
+        """Yields the keys in order, only those past key when given"""
+        keys = self.__sorted()
+        i = 0 if key is None else bisect_right(keys, key)
+        while i < len(keys):
+            yield keys[i]
+            i += 1
+
+    def __sorted(self):
+        """Returns the key list with the buffered additions merged in"""
+        if self.__pending:
+            if len(self.__pending) < 8:
+                for key in self.__pending:
+                    insort(self.__keys, key)
+            else:
+                self.__keys.extend(self.__pending)
+                self.__keys.sort()
+            self.__pending = []
+        return self.__keys
+
+
+class _Max(str):
+    """A bound that sorts after every storage key"""
+
+    def __lt__(self, other):
+        """Never less than a key"""
+        return False
+
+    def __gt__(self, other):
+        """Always greater than a key"""
+        return True
+
+
+_MAX = _Max()
+
+
+def declared_indexes(cls):
+    """Returns the indexes declared by cls
+
+    A HashIndex for every field in cls.__indexed__ and a RangeIndex for
+    every numeric field in cls.__ranged__.
+    """
+    return [HashIndex(field) for field in getattr(cls, '__indexed__', ())] + \
+        [RangeIndex(field) for field in getattr(cls, '__ranged__', ())]
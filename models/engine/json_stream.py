@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""This module parses a top-level JSON object one member at a time"""
+import json
+import re
+
+START = re.compile(r'[ \t\n\r]*\{[ \t\n\r]*(\}?)')
+KEY = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*', re.S)
+SEPARATOR = re.compile(r'[ \t\n\r]*([,}])[ \t\n\r]*')
+
+
+def iter_items(f, chunk_size=1 << 20):
+    """Yields (key, value, position) for each member of the object in f
+
+    Only the member being decoded and one chunk of text are held in
+    memory at a time. position is the number of characters consumed so
+    far. Malformed or empty input raises json.JSONDecodeError, like
+    json.load would.
+    """
+    decode = json.JSONDecoder().raw_decode
+    buf, pos, base = f.read(chunk_size), 0, 0
+
+    def error(msg):
+        """Returns a decode error pointing at the current position"""
+        return json.JSONDecodeError(msg, buf, pos)
+
+    start = START.match(buf)
+    while start is None or start.end() == len(buf):
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buf += chunk
+        start = START.match(buf)
+    if start is None:
+        raise error('Expecting value' if not buf.strip() else
+                    "Expecting '{'")
+    if start.group(1):
+        return
+    pos = start.end()
+    while True:
+        # decode "key": value and the separator after it from pos; when
+        # the member runs past the buffer, read on and start over
+        member = KEY.match(buf, pos)
+        end = sep = None
+        if member is not None:
+            try:
+                value, end = decode(buf, member.end())
+            except json.JSONDecodeError:
+                pass
+            else:
+                sep = SEPARATOR.match(buf, end)
+        if sep is None or sep.end() == len(buf):
+            chunk = f.read(chunk_size)
+            if chunk:
+                if pos > chunk_size:
+                    base += pos
+                    buf, pos = buf[pos:], 0
+                buf += chunk
+                continue
+        if sep is None:
+            if member is None:
+                raise error('Expecting property name enclosed in '
+                            'double quotes')
+            if end is None:
+                decode(buf, member.end())  # raises the decode error
+            raise error("Expecting ',' delimiter")
+        name = member.group(1)
+        if '\\' in name:
+            name = json.loads('"' + name + '"')
+        pos = sep.end()
+        yield name, value, base + pos
+        if sep.group(1) == '}':
+            return
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""This module defines the advisory lock shared by storage processes"""
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks: only threads are kept apart
+    fcntl = None
+
+
+class FileLock:
+    """An fcntl lock on a file that also holds the snapshot generation
+
+    Readers hold it shared and writers exclusive. Holding it again from
+    the same process nests; asking for exclusive while holding it shared
+    upgrades it until the outermost hold ends. The generation is a
+    counter bumped by every process that replaces the snapshot, so the
+    others know their copy is stale without reading the snapshot.
+    """
+
+    def __init__(self, path):
+        """Creates a lock on path, which is created when first locked"""
+        self.path = path
+        self.__fd = None
+        self.__depth = 0
+        self.__exclusive = False
+        self.__threads = threading.RLock()
+
+    @contextmanager
+    def shared(self):
+        """Holds the lock shared for the duration of the block"""
+        with self.__hold(False):
+            yield self
+
+    @contextmanager
+    def exclusive(self):
+        """Holds the lock exclusively for the duration of the block"""
+        with self.__hold(True):
+            yield self
+
+    @contextmanager
+    def __hold(self, exclusive):
+        """Takes the thread lock, then the file lock unless held"""
+        with self.__threads:
+            if self.__fd is None:
+                self.__fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if not self.__depth or exclusive and not self.__exclusive:
+                if fcntl is not None:
+                    fcntl.flock(self.__fd, fcntl.LOCK_EX if exclusive
+                                else fcntl.LOCK_SH)
+                self.__exclusive = self.__exclusive or exclusive
+            self.__depth += 1
+            try:
+                yield
+            finally:
+                self.__depth -= 1
+                if not self.__depth:
+                    if fcntl is not None:
+                        fcntl.flock(self.__fd, fcntl.LOCK_UN)
+                    self.__exclusive = False
+
+    def generation(self):
+        """Returns the snapshot generation; the lock must be held"""
+        data = os.pread(self.__fd, 32, 0)
+        return int(data) if data.strip() else 0
+
+    def advance(self):
+        """Bumps and returns the generation; the lock must be exclusive"""
+        generation = self.generation() + 1
+        data = str(generation).encode()
+        os.pwrite(self.__fd, data.ljust(20), 0)
+        return generation
+
+    def close(self):
+        """Closes the lock file"""
+        with self.__threads:
+            if self.__fd is not None and not self.__depth:
+                os.close(self.__fd)
+                self.__fd = None
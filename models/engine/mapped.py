@@ -0,0 +1,478 @@
+#!/usr/bin/python3
+"""This module serves hbnb models from a memory-mapped snapshot
+
+A mapped snapshot is built once from a storage and then opened read
+only by any number of processes. It holds the binary records of
+models.engine.serializers followed by an index of fixed 24 byte
+entries, the 16 bytes of an id and the offset of its record, sorted by
+class and id, and a JSON table of the class layouts and index ranges.
+Opening one maps the file and reads the table; records are decoded
+from the mapping when asked for, so processes share the file's pages
+in the OS cache instead of each holding a copy of every object.
+
+Run as a script to build the snapshot of a storage file:
+
+    python3 -m models.engine.mapped file.json [file.json.snap]
+"""
+import heapq
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from itertools import dropwhile, islice
+from numbers import Real
+from models.engine import geo, serializers
+from models.engine.durable import sync_dir, write_atomic
+from models.engine.export import export_records
+from models.engine.file_storage import FileStorage
+from models.engine.query import compile_filter, parse
+from models.engine.text import TextIndex
+
+MAGIC = b'\x89HBNM\x01'
+HEAD = struct.Struct('<QQ')  # offsets of the index and of the table
+INDEX = struct.Struct('<16sQ')  # id, record offset
+
+
+def build(storage, path):
+    """Writes the mapped snapshot of every object of storage to path
+
+    storage is any storage with records(). The snapshot goes to a
+    temporary file renamed over path once complete, with the full-text
+    index of the searchable classes next to it in path.search. Returns
+    the number of objects written.
+    """
+    classes = FileStorage.classes()
+    writer = serializers.BinaryFormat(classes)
+    numbers = {name: number for number, (name, fields)
+               in enumerate(writer.table)}
+    texts = {name: TextIndex(cls.__searchable__)
+             for name, cls in classes.items()
+             if hasattr(cls, '__searchable__')}
+    indexed = []  # (class number, id bytes, record offset)
+    other = {}  # {key: record offset} of the keys the index cannot hold
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + HEAD.pack(0, 0))
+            for key, val in storage.records():
+                entry = writer.entry(key, val)
+                name, _, id = key.partition('.')
+                raw = serializers.pack_uuid(id)
+                if raw is not None and serializers.PREFIX.unpack_from(
+                        entry)[1] != serializers.GENERIC:
+                    indexed.append((numbers[name], raw, f.tell()))
+                else:
+                    other[key] = f.tell()
+                f.write(entry)
+                if name in texts:
+                    cls = classes[name]
+                    texts[name].add(key, *(val.get(field, getattr(
+                        cls, field, None)) for field in cls.__searchable__))
+            indexed.sort()
+            index = f.tell()
+            ranges = {}
+            for position, (number, raw, offset) in enumerate(indexed):
+                ranges.setdefault(number, [position, 0])[1] += 1
+                f.write(INDEX.pack(raw, offset))
+            table = f.tell()
+            f.write(json.dumps({
+                'classes': [[name, fields] + ranges.get(number, [0, 0])
+                            for number, (name, fields)
+                            in enumerate(writer.table)],
+                'other': other}).encode())
+            f.seek(len(MAGIC))
+            f.write(HEAD.pack(index, table))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    sync_dir(path)
+    write_atomic(path + '.search', json.dumps(
+        {name: text.dump() for name, text in texts.items()}))
+    return len(indexed) + len(other)
+
+
+class MappedStorage:
+    """This class serves hbnb models from a read-only mapped snapshot
+
+    reload() maps the snapshot built by build() and reads its table,
+    however many objects it holds. get() finds a record by binary
+    search of the index; listings walk the index in key order. Objects
+    are built from their records the first time they are returned and
+    kept; scans for find(), query() and the geographic lookups build
+    the others only long enough to test them. search() uses the
+    full-text index saved with the snapshot.
+
+    The snapshot is never written: new(), delete(), save() and the
+    batch methods raise io.UnsupportedOperation. refresh() maps the
+    snapshot again when it was rebuilt since.
+    """
+    __path = 'file.json.snap'
+    read_only = True  # writes raise io.UnsupportedOperation
+
+    def __init__(self, path=None, compact=False):
+        """Creates a storage reading the snapshot at path"""
+        self.__path = path or MappedStorage.__path
+        self.__classes = FileStorage.classes(compact)
+        self.__map = self.__view = None
+        self.__stat = None
+        self.__codecs = []
+        self.__ranges = {}  # {name: (first index entry offset, count)}
+        self.__other = {}  # {key: record offset} of keys off the index
+        self.__others = {}  # {name: sorted [(key, record offset)]}
+        self.__objects = {}
+        self.__text = None
+
+    @property
+    def path(self):
+        """Path of the mapped snapshot"""
+        return self.__path
+
+    @property
+    def models(self):
+        """The model classes objects are built as, by name"""
+        return dict(self.__classes)
+
+    def reload(self):
+        """Maps the snapshot, forgetting every object built so far"""
+        self.close()
+        try:
+            f = open(self.__path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            if not stat.st_size:
+                raise ValueError('{} is empty'.format(self.__path))
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__stat = (stat.st_ino, stat.st_mtime_ns)
+        self.__view = view = memoryview(self.__map)
+        if view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('{} is not a mapped snapshot'
+                             .format(self.__path))
+        index, table = HEAD.unpack_from(view, len(MAGIC))
+        data = json.loads(str(view[table:], 'utf-8'))
+        self.__codecs = [serializers.Codec(number, name, fields)
+                         for number, (name, fields, start, count)
+                         in enumerate(data['classes'])]
+        self.__ranges = {name: (index + start * INDEX.size, count)
+                         for name, fields, start, count in data['classes']}
+        self.__other = data['other']
+        for key, offset in sorted(self.__other.items()):
+            self.__others.setdefault(key.partition('.')[0], []).append(
+                (key, offset))
+
+    def refresh(self):
+        """Maps the snapshot again if it was rebuilt since reload()"""
+        try:
+            stat = os.stat(self.__path)
+        except FileNotFoundError:
+            stat = None
+        if (stat and (stat.st_ino, stat.st_mtime_ns)) != self.__stat:
+            self.reload()
+
+    def close(self):
+        """Unmaps the snapshot"""
+        if self.__view is not None:
+            self.__view.release()
+            self.__map.close()
+        self.__map = self.__view = self.__stat = None
+        self.__codecs = []
+        self.__ranges = {}
+        self.__other = {}
+        self.__others = {}
+        self.__objects = {}
+        self.__text = None
+
+    def flush(self):
+        """Does nothing: the snapshot is never written"""
+
+    def all(self, cls=None):
+        """Returns a dictionary of the objects of cls, or of every class
+
+        Every object listed is built.
+        """
+        return {key: self.__object(key, offset)
+                for name in self.__names(cls)
+                for key, offset in self.__entries(name)}
+
+    def get(self, cls, id):
+        """Returns the object of class cls with the given id, or None"""
+        name = self.__name(cls)
+        key = name + '.' + id
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        offset = self.__offset(name, id)
+        return None if offset is None else self.__object(key, offset)
+
+    def count(self, cls=None):
+        """Returns the number of objects in storage, or of class cls"""
+        return sum(self.__ranges.get(name, (0, 0))[1] +
+                   len(self.__others.get(name, ()))
+                   for name in self.__names(cls))
+
+    def records(self, cls=None):
+        """Yields (key, dictionary form) for each object, or those of cls
+
+        Records are decoded without building their instance.
+        """
+        for name in self.__names(cls):
+            for key, offset in self.__entries(name):
+                yield key, self.__decode(offset)
+
+    def page(self, cls=None, limit=None, offset=0, after=None):
+        """Yields up to limit objects of cls, or of every class
+
+        Objects come in key order. The first offset objects are skipped,
+        and with after (an id) only the objects following it are
+        yielded. Only the objects yielded are built.
+        """
+        entries = (entry for name in self.__names(cls)
+                   for entry in self.__entries(name))
+        if after is not None:
+            entries = dropwhile(
+                lambda entry: entry[0].partition('.')[2] != after, entries)
+            next(entries, None)
+        stop = None if limit is None else offset + limit
+        for key, position in islice(entries, offset, stop):
+            yield self.__object(key, position)
+
+    def find(self, cls, field, value):
+        """Returns the objects of class cls whose field equals value"""
+        return list(self.__scan(
+            self.__name(cls),
+            lambda obj: getattr(obj, field, None) == value))
+
+    def query(self, cls, **predicates):
+        """Yields the objects of cls matching every field__op=value
+
+        ops are eq (the default), ne, lt, lte, gt and gte. The records
+        of cls are scanned.
+        """
+        return self.__scan(self.__name(cls),
+                           compile_filter(parse(predicates)))
+
+    def top(self, cls, field, n, reverse=False, **predicates):
+        """Returns the n objects of cls matching predicates with the
+        lowest value of field, or the highest with reverse set"""
+        objs = (obj for obj in self.query(cls, **predicates)
+                if isinstance(getattr(obj, field, None), Real))
+        pick = heapq.nlargest if reverse else heapq.nsmallest
+        return pick(n, objs, key=lambda obj: getattr(obj, field))
+
+    def within(self, cls, south, west, north, east):
+        """Returns the objects of cls located inside a lat/lon box
+
+        The box crosses the antimeridian when west is greater than east.
+        """
+        return [obj for obj, lat, lon in
+                self.__located(self.__name(cls), south, west, north, east)]
+
+    def near(self, cls, lat, lon, km, limit=None):
+        """Returns (distance in km, object) pairs of cls within km of
+        lat, lon, nearest first"""
+        return geo.closest(lat, lon, km, self.__located(
+            self.__name(cls), *geo.bounds(lat, lon, km)), limit)
+
+    def nearest(self, cls, lat, lon, k):
+        """Returns the (distance in km, object) pairs of the k objects
+        of cls nearest to lat, lon"""
+        return geo.nearest(lambda *args: self.near(cls, *args), lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Returns (score, object) pairs of cls matching terms, best first
+
+        Objects are ranked with BM25 over the text fields their class
+        lists in __searchable__; other classes have nothing to search.
+        """
+        name = self.__name(cls)
+        text = self.__texts().get(name)
+        if text is None:
+            return []
+        return [(score, self.get(name, key.partition('.')[2]))
+                for score, key in text.search(terms, limit)]
+
+    def export(self, cls, path, fields=None, compress=None):
+        """Streams the objects of cls, or every object, to an NDJSON file
+
+        See models.engine.export.export_records for the options.
+        """
+        return export_records(self, cls, path, fields, compress)
+
+    @property
+    def in_batch(self):
+        """Always False: there are no changes to batch"""
+        return False
+
+    def new(self, obj):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def delete(self, obj=None):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def save(self):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def begin(self):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def commit(self):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def rollback(self):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def batch(self):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def bulk_import(self, cls, path, types=None, **options):
+        """Refused: the snapshot is read-only"""
+        self.__read_only()
+
+    def __read_only(self):
+        """Raises for every write"""
+        raise io.UnsupportedOperation('{} is a read-only snapshot'
+                                      .format(self.__path))
+
+    def __name(self, cls):
+        """Returns the name of cls, a class or name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __names(self, cls=None):
+        """Returns the names of cls, or of every class in the snapshot"""
+        if cls is not None:
+            return [self.__name(cls)]
+        return sorted(set(self.__ranges) | set(self.__others))
+
+    def __entries(self, name):
+        """Yields (key, record offset) for each object of name, in key
+        order"""
+        start, count = self.__ranges.get(name, (0, 0))
+        view = self.__view
+        prefix = name + '.'
+
+        def indexed():
+            """Walks the index range of name"""
+            for position in range(start, start + count * INDEX.size,
+                                  INDEX.size):
+                raw, offset = INDEX.unpack_from(view, position)
+                yield prefix + serializers.hyphenate(raw.hex()), offset
+
+        return heapq.merge(indexed(), self.__others.get(name, ()))
+
+    def __offset(self, name, id):
+        """Returns the record offset of the object name.id, or None"""
+        raw = serializers.pack_uuid(id)
+        if raw is not None and name in self.__ranges:
+            start, count = self.__ranges[name]
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                found, offset = INDEX.unpack_from(
+                    self.__view, start + middle * INDEX.size)
+                if found < raw:
+                    low = middle + 1
+                elif found > raw:
+                    high = middle
+                else:
+                    return offset
+        return self.__other.get(name + '.' + id)
+
+    def __decode(self, offset):
+        """Returns the entry of the record at offset"""
+        return serializers.record(self.__codecs, self.__view, offset)[1]
+
+    def __build(self, offset):
+        """Returns a new instance from the record at offset"""
+        val = self.__decode(offset)
+        return self.__classes[val['__class__']](**val)
+
+    def __object(self, key, offset):
+        """Returns the object under key, building and keeping it if
+        needed"""
+        obj = self.__objects.get(key)
+        if obj is None:
+            obj = self.__objects[key] = self.__build(offset)
+        return obj
+
+    def __scan(self, name, match):
+        """Yields the objects of name for which match(obj) is true
+
+        Objects not built yet are built to be tested and only kept when
+        they match.
+        """
+        for key, offset in self.__entries(name):
+            obj = self.__objects.get(key)
+            if obj is None:
+                obj = self.__build(offset)
+                if not match(obj):
+                    continue
+                obj = self.__objects.setdefault(key, obj)
+            elif not match(obj):
+                continue
+            yield obj
+
+    def __located(self, name, south, west, north, east):
+        """Returns (object, lat, lon) for the objects of name in the box"""
+        def inside(obj):
+            """True when the coordinates of obj lie in the box"""
+            lat = getattr(obj, 'latitude', None)
+            lon = getattr(obj, 'longitude', None)
+            return isinstance(lat, Real) and isinstance(lon, Real) and \
+                geo.in_box(lat, lon, south, west, north, east)
+
+        return [(obj, obj.latitude, obj.longitude)
+                for obj in self.__scan(name, inside)]
+
+    def __texts(self):
+        """Returns {name: TextIndex} read from the file saved with the
+        snapshot"""
+        if self.__text is None:
+            self.__text = {}
+            try:
+                with open(self.__path + '.search', 'r') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                data = {}
+            for name, cls in self.__classes.items():
+                if hasattr(cls, '__searchable__') and name in data:
+                    text = self.__text[name] = TextIndex(cls.__searchable__)
+                    text.load(data[name])
+        return self.__text
+
+
+def main(argv):
+    """Builds the mapped snapshot of the storage file named by argv[0]"""
+    if not argv:
+        print('Usage: python3 -m models.engine.mapped file.json '
+              '[snapshot]')
+        return 1
+    source = argv[0]
+    path = argv[1] if len(argv) > 1 else source + '.snap'
+    storage = FileStorage(source, lazy=True,
+                          journal=os.path.exists(source + '.log'),
+                          sharded=os.path.isdir(source + '.d'))
+    storage.reload()
+    count = build(storage, path)
+    print('{} objects written to {}'.format(count, path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
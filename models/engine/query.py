@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""This module parses and compiles the predicates of storage.query()"""
+import operator
+
+# lookup suffixes, as in query(Place, price_by_night__lt=100)
+OPS = {'eq': operator.eq, 'ne': operator.ne, 'lt': operator.lt,
+       'lte': operator.le, 'gt': operator.gt, 'gte': operator.ge}
+
+
+def parse(predicates):
+    """Returns (field, op, value) terms for field__op=value predicates
+
+    A predicate without a known op suffix tests for equality.
+    """
+    terms = []
+    for name, value in predicates.items():
+        field, sep, op = name.rpartition('__')
+        if not sep or op not in OPS:
+            field, op = name, 'eq'
+        terms.append((field, op, value))
+    return terms
+
+
+def compile_filter(terms):
+    """Returns a function testing an object against every term
+
+    Attributes are read with their class defaults; a comparison between
+    incompatible types, such as None < 100, does not match.
+    """
+    checks = [(field, OPS[op], value) for field, op, value in terms]
+
+    def match(obj):
+        """True when obj satisfies every term"""
+        try:
+            for field, op, value in checks:
+                if not op(getattr(obj, field, None), value):
+                    return False
+        except TypeError:
+            return False
+        return True
+    return match
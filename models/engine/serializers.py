@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+"""This module defines the file formats of FileStorage snapshots
+
+A format encodes each (key, entry) pair on its own, so the encoding of
+unchanged objects can be cached, and joins the encoded entries into a
+file as head + separator.join(entries) + tail.
+
+'json' writes one JSON object mapping keys to entries. 'binary' packs
+each entry with one struct per model class, laid out from the fields
+the class declares: ids are 16 bytes, timestamps 8 byte integer
+microseconds, int and float fields 8 bytes each and strings utf-8 with
+their length. The class layouts are written at the head of the file,
+so a file stays readable after the models change. Attributes that do
+not fit their declared type, or are not declared, follow the packed
+fields as JSON.
+
+read() tells the formats apart by the first bytes of a file, so files
+of either format are read whatever format is written.
+"""
+import io
+import json
+import struct
+from datetime import datetime
+from models.base_model import EPOCH, MICROSECOND, declared_attributes
+from models.engine.json_stream import iter_items
+
+MAGIC = b'\x89HBNB\x01'  # never the start of a JSON text
+HEADER = struct.Struct('<I')
+PREFIX = struct.Struct('<IH')  # record length, class number
+GENERIC = 0xFFFF  # class number of entries packed as JSON
+KEYED = struct.Struct('<IHI')  # ... and the key length of those
+SLOTS = {'u': '16s', 't': 'q', 'i': 'q', 'f': 'd', 's': 'I'}
+EMPTY = {'u': bytes(16), 't': 0, 'i': 0, 'f': 0.0, 's': 0}
+TYPES = {str: 's', int: 'i', float: 'f'}
+INT64 = 1 << 63
+
+
+def schema(cls, epoch=False):
+    """Returns [(field, type code)] of the fields packed for cls"""
+    stamp = 'i' if epoch else 't'
+    fields = [('id', 'u'), ('created_at', stamp), ('updated_at', stamp)]
+    fields.extend((name, TYPES[type(default)])
+                  for name, default in declared_attributes(cls).items()
+                  if type(default) in TYPES)
+    return fields[:32]  # one bit each in the presence mask
+
+
+def hyphenate(digits):
+    """Returns the canonical form of a uuid from its 32 hex digits"""
+    return '{}-{}-{}-{}-{}'.format(digits[:8], digits[8:12], digits[12:16],
+                                   digits[16:20], digits[20:])
+
+
+def pack_uuid(value):
+    """Returns the 16 bytes of a canonical uuid string, or None"""
+    if type(value) is not str or len(value) != 36:
+        return None
+    try:
+        raw = bytes.fromhex(value.replace('-', ''))
+    except ValueError:
+        return None
+    return raw if len(raw) == 16 and hyphenate(raw.hex()) == value else None
+
+
+def pack_timestamp(value):
+    """Returns the microseconds of a naive ISO 8601 string, or None"""
+    if type(value) is not str:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        return None
+    return (moment - EPOCH) // MICROSECOND
+
+
+class JSONFormat:
+    """Snapshots as one JSON object of '"key": {...}' entries"""
+    name = 'json'
+    binary = False
+    head = '{'
+    separator = ', '
+    tail = '}'
+
+    def __init__(self, classes=None, epoch=False):
+        """JSON needs no knowledge of the classes"""
+
+    def entry(self, key, val):
+        """Returns the encoded entry of val under key"""
+        return json.dumps(key) + ': ' + json.dumps(val)
+
+    def decode(self, key, entry):
+        """Returns the value of the encoded entry under key"""
+        return json.loads(entry[len(json.dumps(key)) + 2:])
+
+    def document(self, entries):
+        """Returns the file holding the encoded entries"""
+        return self.head + self.separator.join(entries) + self.tail
+
+
+class Codec:
+    """Packs and unpacks the entries of one class"""
+
+    def __init__(self, number, name, fields):
+        """Lays out the fields, a list of (field, type code)"""
+        self.number = number
+        self.name = name
+        self.fields = [(bit, field, code)
+                       for bit, (field, code) in enumerate(fields)]
+        self.struct = struct.Struct('<IHI' + ''.join(
+            SLOTS[code] for field, code in fields) + 'I')
+        self.lookup = {field: (bit, code) for bit, field, code in self.fields}
+        self.empty = [EMPTY[code] for field, code in fields]
+
+    def pack(self, val):
+        """Returns the record of val"""
+        slots = self.empty[:]
+        texts = [b''] * len(slots)
+        present = 0
+        extras = {}
+        for field, value in val.items():
+            spec = self.lookup.get(field)
+            if spec is None:
+                if field != '__class__':
+                    extras[field] = value
+                continue
+            bit, code = spec
+            kind = type(value)
+            if code == 's':
+                if kind is str:
+                    try:
+                        texts[bit] = packed = value.encode()
+                    except UnicodeEncodeError:  # lone surrogates
+                        packed = None
+                    else:
+                        packed = len(packed)
+                else:
+                    packed = None
+            elif code == 'i':
+                packed = value if kind is int and \
+                    -INT64 <= value < INT64 else None
+            elif code == 'f':
+                packed = value if kind is float else None
+            elif code == 'u':
+                packed = pack_uuid(value)
+            else:
+                packed = pack_timestamp(value)
+            if packed is None:
+                extras[field] = value
+                continue
+            slots[bit] = packed
+            present |= 1 << bit
+        extra = json.dumps(extras).encode() if extras else b''
+        text = b''.join(texts)
+        size = self.struct.size - 4 + len(text) + len(extra)
+        return self.struct.pack(size, self.number, present, *slots,
+                                len(extra)) + text + extra
+
+    def unpack(self, buf, pos):
+        """Returns the entry of the record at pos of buf"""
+        values = self.struct.unpack_from(buf, pos)
+        pos += self.struct.size
+        present = values[2]
+        val = {}
+        for bit, field, code in self.fields:
+            value = values[bit + 3]
+            if code == 's':
+                text = str(buf[pos:pos + value], 'utf-8') if value else ''
+                pos += value
+                value = text
+            if not present >> bit & 1:
+                continue
+            if code == 'u':
+                value = hyphenate(value.hex())
+            elif code == 't':
+                value = (EPOCH + value * MICROSECOND).isoformat()
+            val[field] = value
+        val['__class__'] = self.name
+        if values[-1]:
+            val.update(json.loads(str(buf[pos:pos + values[-1]], 'utf-8')))
+        return val
+
+
+class BinaryFormat:
+    """Snapshots as struct-packed records, one layout per class"""
+    name = 'binary'
+    binary = True
+    separator = b''
+    tail = b''
+
+    def __init__(self, classes, epoch=False):
+        """Lays out the records of every class in classes, a dict of
+        {name: class}; with epoch set timestamps are integers"""
+        self.table = [[name, schema(cls, epoch)]
+                      for name, cls in classes.items()]
+        self.__numbered = [Codec(number, name, fields)
+                           for number, (name, fields) in enumerate(self.table)]
+        self.__codecs = {codec.name: codec for codec in self.__numbered}
+        text = json.dumps(self.table).encode()
+        self.head = MAGIC + HEADER.pack(len(text)) + text
+
+    def entry(self, key, val):
+        """Returns the encoded record of val under key
+
+        Entries whose key is not made of their class and id are kept
+        whole as JSON.
+        """
+        name, _, id = key.partition('.')
+        codec = self.__codecs.get(name)
+        if codec is not None and val.get('__class__') == name and \
+                val.get('id') == id:
+            return codec.pack(val)
+        key = key.encode()
+        text = json.dumps(val).encode()
+        return KEYED.pack(KEYED.size - 4 + len(key) + len(text), GENERIC,
+                          len(key)) + key + text
+
+    def decode(self, key, entry):
+        """Returns the value of the encoded entry under key"""
+        return record(self.__numbered, entry, 0)[1]
+
+    def document(self, entries):
+        """Returns the file holding the encoded entries"""
+        return self.head + b''.join(entries)
+
+
+FORMATS = {'json': JSONFormat, 'binary': BinaryFormat}
+
+
+def stream(fmt, entries):
+    """Yields the file of format fmt holding the encoded entries piece
+    by piece, so that it is never held in memory whole"""
+    yield fmt.head
+    separator = fmt.tail[:0]
+    for entry in entries:
+        yield separator
+        yield entry
+        separator = fmt.separator
+    yield fmt.tail
+
+
+def read(f, chunk_size=1 << 20):
+    """Yields (key, entry, position) for each entry of the file f
+
+    f is opened in binary mode; the format is found from its first
+    bytes. position is the number of characters, for JSON, or bytes
+    consumed so far. Malformed input raises ValueError.
+    """
+    if f.peek(len(MAGIC))[:len(MAGIC)] != MAGIC:
+        text = io.TextIOWrapper(f, encoding='utf-8')
+        try:
+            yield from iter_items(text, chunk_size)
+        finally:
+            text.detach()
+        return
+    f.read(len(MAGIC))
+    head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise ValueError('Truncated binary snapshot header')
+    table = f.read(HEADER.unpack(head)[0])
+    codecs = [Codec(number, name, fields)
+              for number, (name, fields) in enumerate(json.loads(table))]
+    base = len(MAGIC) + HEADER.size + len(table)
+    buf, pos = f.read(chunk_size), 0
+    while True:
+        end = pos + PREFIX.size
+        if end <= len(buf):
+            end = pos + 4 + PREFIX.unpack_from(buf, pos)[0]
+        if end > len(buf):
+            chunk = f.read(max(chunk_size, end - len(buf)))
+            if chunk:
+                base += pos
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            if pos == len(buf):
+                return
+            raise ValueError('Truncated binary snapshot record')
+        key, val = record(codecs, buf, pos)
+        pos = end
+        yield key, val, base + pos
+
+
+def record(codecs, buf, pos):
+    """Returns (key, entry) of the record at pos of buf, a bytes-like
+    object, packed with the codecs of the file"""
+    number = PREFIX.unpack_from(buf, pos)[1]
+    if number != GENERIC:
+        val = codecs[number].unpack(buf, pos)
+        return val['__class__'] + '.' + val['id'], val
+    size, number, length = KEYED.unpack_from(buf, pos)
+    start = pos + KEYED.size
+    key = str(buf[start:start + length], 'utf-8')
+    return key, json.loads(str(buf[start + length:pos + 4 + size], 'utf-8'))
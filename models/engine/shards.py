@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""This module defines the sharded file layout of FileStorage
+
+Each class is stored in its own file of the shard directory, or hash
+partitioned over several files for the classes given a bucket count:
+Review.json, or Review.0.json ... Review.15.json.
+
+Run as a script to migrate a single-file storage:
+
+    python3 -m models.engine.shards file.json [Class=buckets ...]
+"""
+import os
+import re
+import sys
+import zlib
+from models.engine import serializers
+from models.engine.durable import sync_dir
+
+SHARD = re.compile(r'(\w+?)(?:\.(\d+))?\.json$')
+
+
+def bucket(key, buckets):
+    """Returns the bucket of key among buckets, or None for one file"""
+    if not buckets or buckets < 2:
+        return None
+    return zlib.crc32(key.encode()) % buckets
+
+
+def shard_path(directory, name, number=None):
+    """Returns the path of a shard of class name"""
+    suffix = '.json' if number is None else '.{}.json'.format(number)
+    return os.path.join(directory, name + suffix)
+
+
+def numbers(buckets):
+    """Returns the bucket of every shard of a class with buckets"""
+    if not buckets or buckets < 2:
+        return [None]
+    return list(range(buckets))
+
+
+def layout(directory, name, buckets):
+    """Returns the paths of every shard of class name"""
+    return [shard_path(directory, name, number)
+            for number in numbers(buckets)]
+
+
+def existing(directory, name):
+    """Returns the paths of the shard files of class name on disk"""
+    try:
+        files = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(os.path.join(directory, f) for f in files
+                  if SHARD.match(f) and SHARD.match(f).group(1) == name)
+
+
+def migrate(path, directory, buckets=None, format='json'):
+    """Splits the single-file storage at path into shards in directory
+
+    buckets maps class names to their number of hash partitions and
+    format names the format of the shards, whatever that of path.
+    Entries are read and written one at a time, to a temporary file per
+    shard renamed into place once the whole storage is copied. Returns
+    the number of entries migrated.
+    """
+    from models.engine.file_storage import FileStorage
+
+    buckets = buckets or {}
+    writer = serializers.FORMATS[format](FileStorage.classes())
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    count = 0
+    try:
+        with open(path, 'rb') as f:
+            for key, val, position in serializers.read(f):
+                name = key.partition('.')[0]
+                target = shard_path(directory, name,
+                                    bucket(key, buckets.get(name)))
+                out = files.get(target)
+                if out is None:
+                    out = files[target] = open(
+                        target + '.tmp', 'wb' if writer.binary else 'w')
+                    out.write(writer.head)
+                else:
+                    out.write(writer.separator)
+                out.write(writer.entry(key, val))
+                count += 1
+        for target, out in files.items():
+            out.write(writer.tail)
+            out.close()
+            os.replace(target + '.tmp', target)
+    finally:
+        for target, out in files.items():
+            if not out.closed:
+                out.close()
+                os.remove(target + '.tmp')
+    if files:
+        sync_dir(next(iter(files)))
+    return count
+
+
+def main(argv):
+    """Migrates the storage file named by argv[0]"""
+    if not argv:
+        print('Usage: python3 -m models.engine.shards file.json '
+              '[Class=buckets ...]')
+        return 1
+    buckets = {}
+    for arg in argv[1:]:
+        name, _, number = arg.partition('=')
+        buckets[name] = int(number)
+    directory = argv[0] + '.d'
+    count = migrate(argv[0], directory, buckets)
+    print('{} objects migrated to {}'.format(count, directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""This module keeps the entries evicted from a bounded FileStorage cache
+
+A SpillFile is an unnamed temporary file holding encoded entries one
+after the other. write() returns the location of an entry, a tuple of
+the file, offset and length, and read() returns the entry at a
+location, so the caller only keeps the locations in memory. Entries
+are never overwritten: a newer state of an entry is appended and the
+older one left as garbage until repack() copies the live entries to a
+fresh file.
+"""
+import os
+import tempfile
+import threading
+
+
+class SpillFile:
+    """An append-only file of encoded entries read back by location
+
+    Writes are gathered in a buffer of buffer_size bytes, from which
+    entries not written to the file yet are also read. Reads and writes
+    use pread and pwrite, so several threads can use the file at once.
+    """
+    buffer_size = 1 << 20
+
+    def __init__(self, directory=None):
+        """Creates an empty file in directory, which the OS deletes once
+        it is closed"""
+        self.__directory = directory
+        self.__file = tempfile.TemporaryFile(dir=directory)
+        self.__fd = self.__file.fileno()
+        self.__written = 0  # bytes in the file, before the buffer
+        self.__buffer = bytearray()
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self):
+        """Bytes held, garbage included"""
+        return self.__written + len(self.__buffer)
+
+    def write(self, entry):
+        """Appends entry, a str or bytes, and returns its location"""
+        if isinstance(entry, str):
+            entry = entry.encode()
+        with self.__lock:
+            offset = self.__written + len(self.__buffer)
+            self.__buffer += entry
+            if len(self.__buffer) >= self.buffer_size:
+                self.__drain()
+        return (self, offset, len(entry))
+
+    def read(self, offset, length):
+        """Returns the bytes of the entry written at offset"""
+        with self.__lock:
+            start = offset - self.__written
+            if start >= 0:
+                return bytes(self.__buffer[start:start + length])
+        return os.pread(self.__fd, length, offset)
+
+    def repack(self, *tables):
+        """Copies the entries located in tables, {key: location} dicts,
+        to a new SpillFile in the same directory and returns it
+
+        The locations are updated in place; values that are not
+        locations in this file are left alone. This file stays readable
+        until no location refers to it anymore.
+        """
+        packed = SpillFile(self.__directory)
+        for table in tables:
+            for key, location in table.items():
+                if type(location) is tuple and location[0] is self:
+                    table[key] = packed.write(self.read(*location[1:]))
+        return packed
+
+    def close(self):
+        """Closes and so deletes the file"""
+        self.__file.close()
+
+    def __drain(self):
+        """Writes the buffer to the file; the lock must be held"""
+        view = memoryview(self.__buffer)
+        while view:
+            done = os.pwrite(self.__fd, view, self.__written)
+            self.__written += done
+            view = view[done:]
+        view.release()
+        self.__buffer.clear()
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+"""This module defines the full-text index kept by the storage engines"""
+import heapq
+import math
+import re
+import zlib
+from collections import Counter
+
+WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Returns the lower-cased words of text"""
+    return WORD.findall(text.lower())
+
+
+class TextIndex:
+    """Maps the words of some text fields to the keys holding them
+
+    Posting lists keep each word's frequency per key, so searches are
+    ranked with BM25. Every key remembers a checksum of its text: adding
+    unchanged text is a no-op, which lets a persisted index be reloaded
+    and brought up to date without tokenizing again. changed counts the
+    keys added, updated or removed since the index was created, loaded,
+    or reset by its saver.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, fields):
+        """Creates an empty index over the text of fields"""
+        self.fields = tuple(fields)
+        self.changed = 0
+        self.__postings = {}  # word: {key: frequency}
+        self.__docs = {}  # key: (checksum, length)
+        self.__words = {}  # key: words, rebuilt on demand after load()
+        self.__total = 0  # words in all documents
+
+    def keys(self):
+        """Returns the keys indexed"""
+        return self.__docs.keys()
+
+    def add(self, key, *values):
+        """Indexes key under the words of values, replacing its old text"""
+        text = ' '.join(v for v in values if isinstance(v, str))
+        checksum = zlib.crc32(text.encode())
+        doc = self.__docs.get(key)
+        if doc is not None:
+            if doc[0] == checksum:
+                return
+            self.remove(key)
+        words = Counter(tokenize(text))
+        length = sum(words.values())
+        self.__docs[key] = (checksum, length)
+        self.__total += length
+        if self.__words is not None:
+            self.__words[key] = tuple(words)
+        for word, count in words.items():
+            self.__postings.setdefault(word, {})[key] = count
+        self.changed += 1
+
+    def remove(self, key):
+        """Drops key from the index"""
+        doc = self.__docs.pop(key, None)
+        if doc is None:
+            return
+        if self.__words is None:
+            self.__words = {}
+            for word, keys in self.__postings.items():
+                for other in keys:
+                    self.__words.setdefault(other, []).append(word)
+        for word in self.__words.pop(key, ()):
+            keys = self.__postings[word]
+            del keys[key]
+            if not keys:
+                del self.__postings[word]
+        self.__total -= doc[1]
+        self.changed += 1
+
+    def search(self, query, limit=None):
+        """Returns (score, key) pairs for the words of query, best first
+
+        Keys holding any of the words are ranked with BM25.
+        """
+        if not self.__docs:
+            return []
+        count = len(self.__docs)
+        average = self.__total / count or 1
+        scores = {}
+        for word in set(tokenize(query)):
+            keys = self.__postings.get(word)
+            if not keys:
+                continue
+            idf = math.log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key, frequency in keys.items():
+                length = self.__docs[key][1]
+                scores[key] = scores.get(key, 0.0) + idf * frequency * \
+                    (self.k1 + 1) / (frequency + self.k1 * (
+                        1 - self.b + self.b * length / average))
+        ranked = ((score, key) for key, score in scores.items())
+        if limit is not None:
+            return heapq.nlargest(limit, ranked, key=lambda pair: pair[0])
+        return sorted(ranked, key=lambda pair: -pair[0])
+
+    def dump(self):
+        """Returns the index as a JSON serializable dictionary"""
+        return {'fields': list(self.fields), 'docs': self.__docs,
+                'postings': self.__postings}
+
+    def load(self, data):
+        """Replaces the index with one returned by dump()
+
+        The posting lists are used as read; the words of each key are
+        only worked out again if a key is removed. Data for other fields
+        is ignored.
+        """
+        if data.get('fields') != list(self.fields):
+            return
+        self.__postings = data['postings']
+        self.__docs = {key: tuple(doc) for key, doc in data['docs'].items()}
+        self.__words = None
+        self.__total = sum(doc[1] for doc in self.__docs.values())
+        self.changed = 0
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""This module defines the background flusher of write-behind storage"""
+import atexit
+import threading
+import time
+
+
+class WriteBehind:
+    """Runs a flush function in a background thread for queued saves
+
+    schedule() queues a save and returns at once. The thread calls
+    flush() once for all the saves queued so far, as soon as `after`
+    saves are waiting or `interval` seconds after the first of them, so
+    a save reaches the disk at most interval seconds late. An error
+    raised by flush() is kept and raised again by the next flush() or
+    close() of the caller; the failed saves stay queued.
+    """
+
+    def __init__(self, flush, interval=0.1, after=1000):
+        """Creates a stopped flusher calling flush for queued saves"""
+        self.interval = interval
+        self.after = after
+        self.errors = 0
+        self.__flush = flush
+        self.__queued = 0  # saves waiting for the thread
+        self.__since = 0.0  # when the oldest of them was queued
+        self.__requested = 0  # flush() barriers asked for
+        self.__done = 0  # flush() barriers passed
+        self.__error = None
+        self.__stopping = False
+        self.__thread = None
+        self.__cond = threading.Condition()
+
+    @property
+    def queued(self):
+        """Number of saves waiting to be flushed"""
+        return self.__queued
+
+    def schedule(self):
+        """Queues a save, waking the thread if enough are waiting"""
+        with self.__cond:
+            if not self.__queued:
+                self.__since = time.monotonic()
+            self.__queued += 1
+            self.__start()
+            if self.__queued == 1 or self.__queued >= self.after:
+                self.__cond.notify_all()
+
+    def flush(self):
+        """Returns once every save queued before the call is written"""
+        with self.__cond:
+            if self.__thread is None and not self.__queued:
+                self.__raise()
+                return
+            self.__requested += 1
+            target = self.__requested
+            self.__start()
+            self.__cond.notify_all()
+            while self.__done < target:
+                self.__cond.wait()
+            self.__raise()
+
+    def close(self):
+        """Flushes the queued saves and stops the thread"""
+        try:
+            self.flush()
+        finally:
+            with self.__cond:
+                thread = self.__thread
+                self.__stopping = True
+                self.__cond.notify_all()
+            if thread is not None:
+                thread.join()
+            with self.__cond:
+                self.__thread = None
+                self.__stopping = False
+
+    def __start(self):
+        """Starts the thread if it is not running; the lock must be held"""
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+            atexit.register(self.close)
+
+    def __raise(self):
+        """Raises the last flush error once; the lock must be held"""
+        error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def __run(self):
+        """Flushes queued saves until close()"""
+        while True:
+            with self.__cond:
+                while True:
+                    if self.__requested > self.__done:
+                        break
+                    if self.__stopping:
+                        atexit.unregister(self.close)
+                        return
+                    if self.__queued:
+                        wait = self.__since + self.interval - \
+                            time.monotonic()
+                        if wait <= 0 or self.__queued >= self.after:
+                            break
+                    else:
+                        wait = None
+                    self.__cond.wait(wait)
+                target, count = self.__requested, self.__queued
+                self.__queued = 0
+            error = None
+            if count:
+                try:
+                    self.__flush()
+                except Exception as e:
+                    error = e
+            with self.__cond:
+                if error is not None:
+                    self.errors += 1
+                    self.__error = error
+                    if not self.__queued:
+                        self.__since = time.monotonic()
+                    self.__queued += count
+                self.__done = target
+                self.__cond.notify_all()
@@ -5,6 +5,11 @@ from models.base_model import BaseModel
 
 class Place(BaseModel):
     """ A place to stay """
+    __indexed__ = ('city_id', 'user_id')
+    __ranged__ = ('price_by_night', 'number_rooms', 'number_bathrooms',
+                  'max_guest')
+    __located__ = ('latitude', 'longitude')
+    __searchable__ = ('name', 'description')
     city_id = ""
     user_id = ""
     name = ""
@@ -16,3 +21,9 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """ Returns the list of Review instances of this place """
+        from models import storage
+        return storage.find('Review', 'place_id', self.id)
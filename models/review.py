@@ -5,6 +5,8 @@ from models.base_model import BaseModel
 
 class Review(BaseModel):
     """ Review classto store review information """
+    __indexed__ = ('place_id', 'user_id')
+    __searchable__ = ('text',)
     place_id = ""
     user_id = ""
     text = ""
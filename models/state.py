@@ -5,4 +5,11 @@ from models.base_model import BaseModel
 
 class State(BaseModel):
     """ State class """
+    __searchable__ = ('name',)
     name = ""
+
+    @property
+    def cities(self):
+        """ Returns the list of City instances of this state """
+        from models import storage
+        return storage.find('City', 'state_id', self.id)
@@ -5,7 +5,20 @@ from models.base_model import BaseModel
 
 class User(BaseModel):
     """This class defines a user by various attributes"""
+    __searchable__ = ('first_name', 'last_name')
     email = ''
     password = ''
     first_name = ''
     last_name = ''
+
+    @property
+    def places(self):
+        """Returns the list of Place instances owned by this user"""
+        from models import storage
+        return storage.find('Place', 'user_id', self.id)
+
+    @property
+    def reviews(self):
+        """Returns the list of Review instances written by this user"""
+        from models import storage
+        return storage.find('Review', 'user_id', self.id)
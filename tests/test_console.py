@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+""" Module for testing the console"""
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.engine import mapped
+from models.engine.file_storage import FileStorage
+from models.engine.mapped import MappedStorage
+from models.place import Place
+from models.state import State
+import os
+
+
+class test_console(unittest.TestCase):
+    """ Class to test the console commands """
+
+    def tearDown(self):
+        """ Remove the storage files """
+        for path in ('file.json', 'file.json.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def run_command(self, line):
+        """ Returns the output of the console for line """
+        console = HBNBCommand()
+        with patch('sys.stdout', new=StringIO()) as out:
+            console.onecmd(console.precmd(line))
+        return out.getvalue()
+
+    def test_create_indexes_attributes(self):
+        """ Objects created with attributes are indexed by their values """
+        state_id = self.run_command('create State name="Nevada"').strip()
+        city_id = self.run_command('create City state_id="{}" name="Reno"'
+                                   .format(state_id)).strip()
+        state = storage.get(State, state_id)
+        self.assertEqual([city.id for city in state.cities], [city_id])
+
+    def test_create_read_only_attribute(self):
+        """ Setting a relationship on create is refused and nothing is
+        created """
+        before = storage.count()
+        for line in ('create State cities="x"', 'create Place reviews="x"',
+                     'create City places="x"', 'create User reviews="x"'):
+            self.assertEqual(self.run_command(line),
+                             "** attribute can't be set **\n")
+        self.assertEqual(storage.count(), before)
+
+    def test_import_in_transaction(self):
+        """ A refused import leaves the open transaction intact """
+        self.run_command('begin')
+        self.addCleanup(storage.rollback)
+        state_id = self.run_command('create State name="Utah"').strip()
+        self.assertEqual(self.run_command('import State missing.csv'),
+                         "** can't import inside a transaction **\n")
+        self.assertTrue(storage.in_batch)
+        self.assertIsNotNone(storage.get(State, state_id))
+
+    def test_unbalanced_quotes(self):
+        """ Unbalanced quotes are reported instead of raising """
+        for line in ('all "', 'where Place name="x', 'import Place "a',
+                     'export Place "a'):
+            self.assertEqual(self.run_command(line),
+                             "** invalid quoting **\n")
+
+    def test_negative_page(self):
+        """ Negative page arguments are reported instead of raising """
+        for line in ('all Place -1', 'all Place 1 -3', 'Place.all(limit=-2)',
+                     'all Place offset=-1'):
+            self.assertEqual(self.run_command(line),
+                             "** invalid page argument **\n")
+
+    def test_search_limit(self):
+        """ A trailing number limits the results of search """
+        for i in range(3):
+            self.run_command('create Place name="Cozy_loft_{}"'.format(i))
+        self.assertEqual(self.run_command('search Place cozy 2').count(
+            'Cozy loft'), 2)
+        self.assertEqual(self.run_command('search Place cozy').count(
+            'Cozy loft'), 3)
+        self.assertEqual(self.run_command('search Place 2'),
+                         self.run_command('search Place 2 10'))
+
+    def test_near_out_of_range(self):
+        """ Coordinates off the globe are reported instead of raising """
+        for line in ('near 0 500 10', 'near 91 0 10', 'near inf 0 10',
+                     'near nan 0 10', 'near 0 0 -1', 'near 0 0 inf'):
+            self.assertEqual(self.run_command(line),
+                             "** coordinates out of range **\n")
+        self.assertEqual(self.run_command('near 0 180 10'), '[]\n')
+
+    def test_read_only(self):
+        """ Writes to a read-only storage are refused, not raised """
+        source = FileStorage('console.json')
+        place = Place()
+        place.name = 'Loft'
+        source.new(place)
+        mapped.build(source, 'console.json.snap')
+        for path in ('console.json.snap', 'console.json.snap.search'):
+            self.addCleanup(os.remove, path)
+        snapshot = MappedStorage('console.json.snap')
+        snapshot.reload()
+        self.addCleanup(snapshot.close)
+        console = HBNBCommand()
+        with patch('console.storage', snapshot), \
+                patch('models.storage', snapshot):
+            for line in ('create Place', 'update Place {} name Den',
+                         'destroy Place {}', 'begin', 'import Place a.csv',
+                         'Place.update("{}", "name", "Den")'):
+                line = console.precmd(line.format(place.id))
+                with patch('sys.stdout', new=StringIO()) as out:
+                    self.assertFalse(console.onecmd(line))
+                self.assertEqual(out.getvalue(),
+                                 "** storage is read-only **\n")
+            self.assertIn("'name': 'Loft'", self.run_command(
+                'show Place ' + place.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
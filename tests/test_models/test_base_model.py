@@ -22,10 +22,11 @@ class test_basemodel(unittest.TestCase):
         pass
 
     def tearDown(self):
-        try:
-            os.remove('file.json')
-        except:
-            pass
+        for path in ('file.json', 'file.json.search'):
+            try:
+                os.remove(path)
+            except:
+                pass
 
     def test_default(self):
         """ """
@@ -97,3 +98,20 @@ class test_basemodel(unittest.TestCase):
         n = new.to_dict()
         new = BaseModel(**n)
         self.assertFalse(new.created_at == new.updated_at)
+
+    def test_todict_epoch(self):
+        """ """
+        new = self.value()
+        n = new.to_dict(epoch=True)
+        self.assertEqual(type(n['created_at']), int)
+        copy = self.value(**n)
+        self.assertEqual(copy.created_at, new.created_at)
+        self.assertEqual(copy.updated_at, new.updated_at)
+
+    def test_kwargs_whole_seconds(self):
+        """ """
+        n = self.value().to_dict()
+        n['created_at'] = n['updated_at'] = '2020-02-18T14:21:12'
+        new = self.value(**n)
+        self.assertEqual(new.created_at, datetime.datetime(2020, 2, 18,
+                                                           14, 21, 12))
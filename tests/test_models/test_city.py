@@ -2,6 +2,7 @@
 """ """
 from tests.test_models.test_base_model import test_basemodel
 from models.city import City
+from models.place import Place
 
 
 class test_City(test_basemodel):
@@ -22,3 +23,11 @@ class test_City(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.name), str)
+
+    def test_places(self):
+        """ """
+        new = self.value()
+        place = Place()
+        place.city_id = new.id
+        place.save()
+        self.assertEqual(new.places, [place])
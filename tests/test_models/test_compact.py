@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+""" Module for testing the compact model variants"""
+import unittest
+from models.compact import compact
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+import os
+
+
+class test_compact(unittest.TestCase):
+    """ Class to test slotted model variants """
+
+    def setUp(self):
+        """ Build a compact Place from a regular one """
+        self.place = Place()
+        self.place.name = 'Loft'
+        self.place.max_guest = 4
+        self.value = compact(Place)
+        self.new = self.value(**self.place.to_dict())
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in ('compact.json', 'compact.json.search', 'compact.db',
+                     'compact.db-wal', 'compact.db-shm'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_variant(self):
+        """ The variant is a cached Place subclass of the same name """
+        self.assertIs(compact(Place), self.value)
+        self.assertIsInstance(self.new, Place)
+        self.assertEqual(self.value.__name__, 'Place')
+        self.assertIsNot(compact(User), self.value)
+
+    def test_slots(self):
+        """ Declared fields are kept out of the instance dict """
+        self.assertEqual(self.new.__dict__, {})
+        self.assertEqual(self.new.name, 'Loft')
+        self.new.pets = 'no'
+        self.assertEqual(self.new.__dict__, {'pets': 'no'})
+
+    def test_to_dict(self):
+        """ to_dict matches the regular model """
+        self.assertEqual(self.new.to_dict(), self.place.to_dict())
+        self.assertEqual(self.new.to_dict(epoch=True),
+                         self.place.to_dict(epoch=True))
+
+    def test_str(self):
+        """ str has the regular format """
+        self.assertEqual(str(self.new), str(self.place))
+
+    def test_defaults(self):
+        """ Unset fields read the class default """
+        self.assertEqual(self.new.number_rooms, 0)
+        self.assertEqual(self.new.description, '')
+        with self.assertRaises(AttributeError):
+            self.new.missing
+
+    def test_mutable_default(self):
+        """ List defaults are not shared between instances """
+        other = self.value(**self.place.to_dict())
+        self.new.amenity_ids.append('wifi')
+        self.assertEqual(other.amenity_ids, [])
+        self.assertEqual(Place.amenity_ids, [])
+
+    def test_storage(self):
+        """ A compact storage rebuilds compact instances """
+        saved = FileStorage('compact.json')
+        saved.new(self.place)
+        saved.save()
+        storage = FileStorage('compact.json', compact=True)
+        storage.reload()
+        loaded = storage.get(Place, self.place.id)
+        self.assertIs(type(loaded), self.value)
+        self.assertEqual(loaded.to_dict(), self.place.to_dict())
+
+    def test_import(self):
+        """ A compact storage imports and lists compact instances """
+        storage = FileStorage('compact.json', compact=True)
+        with open('compact.ndjson', 'w') as f:
+            f.write('{"name": "Loft", "max_guest": 4}\n')
+        try:
+            self.assertEqual(storage.bulk_import(Place, 'compact.ndjson',
+                                                 workers=0), 1)
+        finally:
+            os.remove('compact.ndjson')
+        loaded, = storage.all(Place).values()
+        self.assertIs(type(loaded), self.value)
+        self.assertIs(storage.models['Place'], self.value)
+
+    def test_db_storage(self):
+        """ A compact database storage rebuilds compact instances """
+        saved = DBStorage('compact.db')
+        saved.reload()
+        saved.new(self.place)
+        saved.save()
+        saved.close()
+        storage = DBStorage('compact.db', compact=True)
+        storage.reload()
+        self.addCleanup(storage.close)
+        loaded = storage.get(Place, self.place.id)
+        self.assertIs(type(loaded), self.value)
+        self.assertEqual(loaded.to_dict(), self.place.to_dict())
+        self.assertIs(storage.models['Place'], self.value)
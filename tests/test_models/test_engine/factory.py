@@ -0,0 +1,10 @@
+#!/usr/bin/python3
+""" Module of the object factory shared by the storage tests"""
+
+
+def make(cls, **attrs):
+    """ Returns a new cls instance with attrs set """
+    obj = cls()
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    return obj
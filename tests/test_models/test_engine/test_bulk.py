@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+""" Module for testing bulk imports"""
+import unittest
+from models.engine import bulk
+from models.engine.file_storage import FileStorage
+from models.place import Place
+import json
+import os
+
+TYPES = {'price_by_night': int, 'max_guest': int, 'latitude': float}
+
+
+class test_bulk_import(unittest.TestCase):
+    """ Class to test importing NDJSON and CSV files """
+
+    path = 'bulk.json'
+
+    def setUp(self):
+        """ Set up an empty storage """
+        self.storage = FileStorage(self.path)
+        self.files = []
+
+    def tearDown(self):
+        """ Remove storage and input files """
+        for path in [self.path, self.path + '.search'] + self.files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def write(self, name, text):
+        """ Writes an input file and returns its path """
+        self.files.append(name)
+        with open(name, 'w', newline='') as f:
+            f.write(text)
+        return name
+
+    def places(self):
+        """ Returns the imported places sorted by name """
+        return sorted(self.storage.all(Place).values(), key=lambda p: p.name)
+
+    def test_ndjson(self):
+        """ NDJSON records are cast and stored """
+        path = self.write('places.ndjson',
+                          '{"name": "A", "price_by_night": "90"}\n\n'
+                          '{"id": "p-2", "name": "B", "latitude": 1}\n')
+        for workers in (0, 2):
+            storage = FileStorage(self.path)
+            count = storage.bulk_import(Place, path, TYPES, workers=workers)
+            self.assertEqual(count, 2)
+            a, b = sorted(storage.all(Place).values(), key=lambda p: p.name)
+            self.assertEqual(a.price_by_night, 90)
+            self.assertEqual(b.id, 'p-2')
+            self.assertEqual(b.latitude, 1.0)
+            self.assertEqual(type(b.latitude), float)
+
+    def test_csv(self):
+        """ CSV records are cast, empty cells stay unset """
+        path = self.write('places.csv',
+                          'name,description,max_guest\n'
+                          'A,"two\nlines",4\n'
+                          'B,,\n')
+        self.assertEqual(self.storage.bulk_import(Place, path, TYPES,
+                                                  workers=0), 2)
+        a, b = self.places()
+        self.assertEqual(a.description, 'two\nlines')
+        self.assertEqual(a.max_guest, 4)
+        self.assertNotIn('max_guest', b.__dict__)
+
+    def test_saved_once(self):
+        """ Records are committed in batches and written to file """
+        path = self.write('places.ndjson',
+                          ''.join('{"name": "%d"}\n' % i for i in range(5)))
+        saves = []
+        save = self.storage.save
+        self.storage.save = lambda: saves.append(1) or save()
+        old, bulk.CHUNK = bulk.CHUNK, 2
+        try:
+            self.storage.bulk_import(Place, path, workers=0, batch_size=2)
+        finally:
+            bulk.CHUNK = old
+        self.assertEqual(len(saves), 3)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 5)
+
+    def test_bad_record(self):
+        """ A bad value names its line and rolls back the batch """
+        path = self.write('places.ndjson',
+                          '{"name": "A"}\n{"max_guest": "many"}\n')
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            self.storage.bulk_import(Place, path, TYPES, workers=0)
+        self.assertEqual(self.storage.count(Place), 0)
+        self.assertFalse(self.storage.in_batch)
+
+    def test_open_batch(self):
+        """ Imports are refused inside a batch, which is left intact """
+        path = self.write('places.ndjson', '{"name": "A"}\n')
+        self.storage.begin()
+        place = Place()
+        self.storage.new(place)
+        with self.assertRaisesRegex(ValueError, 'transaction'):
+            self.storage.bulk_import(Place, path, workers=0)
+        self.assertTrue(self.storage.in_batch)
+        self.assertIs(self.storage.get(Place, place.id), place)
+        self.storage.rollback()
+
+    def test_chunks(self):
+        """ CSV chunks never split a quoted field """
+        lines = ['"a\n', 'b"\n', 'c\n']
+        old, bulk.CHUNK = bulk.CHUNK, 1
+        try:
+            chunks = list(bulk.read_chunks(iter(lines), 'csv', 1))
+        finally:
+            bulk.CHUNK = old
+        self.assertEqual(chunks, [(2, lines[:2]), (4, lines[2:])])
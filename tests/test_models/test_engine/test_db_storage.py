@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+""" Module for testing SQLite storage"""
+import unittest
+from models.engine.db_storage import DBStorage
+from models.city import City
+from models.place import Place
+from models.state import State
+import os
+
+
+class test_DBStorage(unittest.TestCase):
+    """ Class to test the SQLite storage engine """
+
+    path = 'test_hbnb.db'
+
+    def setUp(self):
+        """ Open a fresh database """
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close and remove the database files """
+        self.storage.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def reopen(self):
+        """ Returns a second storage on the same database """
+        other = DBStorage(self.path)
+        other.reload()
+        self.addCleanup(other.close)
+        return other
+
+    def test_tables(self):
+        """ One table is created per model class """
+        other = self.reopen()
+        conn = other._DBStorage__conn
+        names = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")
+            if '_text' not in row[0]}  # full-text tables
+        self.assertEqual(names, {'BaseModel', 'User', 'Place', 'State',
+                                 'City', 'Amenity', 'Review'})
+
+    def test_wal(self):
+        """ The database runs in WAL mode """
+        conn = self.storage._DBStorage__conn
+        mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_save_reload(self):
+        """ Saved objects round trip with their types """
+        place = Place()
+        place.name = 'Loft'
+        place.price_by_night = 120
+        place.latitude = 37.5
+        place.amenity_ids = ['a', 'b']
+        place.pets = 'yes'
+        self.storage.new(place)
+        self.storage.save()
+        loaded = self.reopen().all()['Place.' + place.id]
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_unset_attributes(self):
+        """ Attributes never set fall back to class defaults """
+        place = Place()
+        self.storage.new(place)
+        self.storage.save()
+        loaded = self.reopen().all()['Place.' + place.id]
+        self.assertNotIn('name', loaded.__dict__)
+        self.assertEqual(loaded.number_rooms, 0)
+
+    def test_all_cls(self):
+        """ all filters by class or class name """
+        state, place = State(), Place()
+        self.storage.new(state)
+        self.storage.new(place)
+        self.storage.save()
+        other = self.reopen()
+        self.assertEqual(list(other.all(State)), ['State.' + state.id])
+        self.assertEqual(list(other.all('Place')), ['Place.' + place.id])
+        self.assertEqual(len(other.all()), 2)
+
+    def test_unsaved_visible(self):
+        """ Staged objects are visible before save """
+        state = State()
+        self.storage.new(state)
+        self.assertIn('State.' + state.id, self.storage.all())
+        self.assertNotIn('State.' + state.id, self.reopen().all())
+
+    def test_delete(self):
+        """ Deleted objects are removed on save """
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.delete(state)
+        self.assertNotIn('State.' + state.id, self.storage.all())
+        self.storage.save()
+        self.assertEqual(self.reopen().all(), {})
+
+    def test_get(self):
+        """ get reads a single row by id """
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        other = self.reopen()
+        self.assertEqual(other.get(State, state.id).id, state.id)
+        self.assertIsNone(other.get('Place', state.id))
+
+    def test_count(self):
+        """ count includes staged changes """
+        first, second = State(), State()
+        self.storage.new(first)
+        self.storage.save()
+        self.storage.new(second)
+        self.assertEqual(self.storage.count(State), 2)
+        self.storage.delete(first)
+        self.assertEqual(self.storage.count('State'), 1)
+        self.assertEqual(self.storage.count(), 1)
+
+    def test_find(self):
+        """ find uses the indexed column and staged objects """
+        state = State()
+        saved, staged = City(), City()
+        saved.state_id = staged.state_id = state.id
+        self.storage.new(saved)
+        self.storage.save()
+        other = self.reopen()
+        self.assertEqual([c.id for c in other.find(City, 'state_id',
+                                                   state.id)], [saved.id])
+        other.new(staged)
+        self.assertEqual(len(other.find('City', 'state_id', state.id)), 2)
+        indexes = {row[1] for row in other._DBStorage__conn.execute(
+            "SELECT * FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn('City_state_id', indexes)
+
+    def test_batch(self):
+        """ Saves inside a batch wait for the commit """
+        self.storage.begin()
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(self.reopen().count(State), 0)
+        self.storage.commit()
+        self.assertEqual(self.reopen().count(State), 1)
+
+    def test_rollback(self):
+        """ Rollback discards staged changes """
+        state = State()
+        state.name = 'Saved'
+        self.storage.new(state)
+        self.storage.save()
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                state.name = 'Changed'
+                self.storage.new(state)
+                self.storage.new(State())
+                raise KeyError
+        self.assertFalse(self.storage.in_batch)
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.get(State, state.id).name, 'Saved')
+
+    def test_page(self):
+        """ Pages follow the id order, staged objects included """
+        states = [State() for i in range(4)]
+        for state in states[:3]:
+            self.storage.new(state)
+        self.storage.save()
+        self.storage.delete(states[0])
+        self.storage.new(states[3])
+        ids = sorted(s.id for s in states[1:])
+        self.assertEqual([s.id for s in self.storage.page(State)], ids)
+        self.assertEqual([s.id for s in self.storage.page(
+            'State', limit=1, offset=1)], ids[1:2])
+        self.assertEqual([s.id for s in self.storage.page(
+            State, after=ids[0])], ids[1:])
+        self.assertEqual([s.id for s in self.storage.page(
+            limit=2, after=ids[0])], ids[1:])
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+""" Module for testing atomic and durable storage writes"""
+import unittest
+from models.base_model import BaseModel
+from models.engine import durable
+from models.engine.durable import GroupCommit, write_atomic
+from models.engine.file_storage import FileStorage
+import glob
+import os
+import time
+
+
+def failing_fsync(fd):
+    """ Raises as if the disk failed """
+    raise OSError(5, 'Input/output error')
+
+
+class test_write_atomic(unittest.TestCase):
+    """ Class to test replacing files atomically """
+
+    path = 'atomic.txt'
+
+    def tearDown(self):
+        """ Remove the file and any temporary left over """
+        for path in [self.path] + glob.glob(self.path + '.*.tmp'):
+            os.remove(path)
+
+    def test_replaces(self):
+        """ The file holds the new text and no temporary remains """
+        write_atomic(self.path, 'old')
+        write_atomic(self.path, 'new', sync=False)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'new')
+        self.assertEqual(glob.glob(self.path + '.*.tmp'), [])
+
+    def test_failure_keeps_old(self):
+        """ A failed write leaves the old file and no temporary """
+        write_atomic(self.path, 'old')
+        with self.assertRaises(TypeError):
+            write_atomic(self.path, None)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertEqual(glob.glob(self.path + '.*.tmp'), [])
+
+
+class test_group_commit(unittest.TestCase):
+    """ Class to test coalescing fsyncs """
+
+    def setUp(self):
+        """ Count the files synced """
+        self.synced = []
+        sync_file = durable.sync_file
+        durable.sync_file = self.synced.append
+        self.addCleanup(setattr, durable, 'sync_file', sync_file)
+
+    def test_burst(self):
+        """ A burst of requests is synced twice: at once, then grouped """
+        group = GroupCommit(interval=60)
+        for i in range(100):
+            group.request('a' if i % 2 else 'b')
+        self.assertEqual(group.syncs, 1)
+        self.assertTrue(group.pending)
+        group.sync()
+        self.assertEqual(group.syncs, 2)
+        self.assertFalse(group.pending)
+        self.assertEqual(sorted(self.synced), ['a', 'b', 'b'])
+
+    def test_timer(self):
+        """ A pending request is synced once the interval is over """
+        group = GroupCommit(interval=0.01)
+        group.request('a')
+        group.request('a')
+        deadline = time.monotonic() + 5
+        while group.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(group.pending)
+        self.assertEqual(self.synced, ['a', 'a'])
+
+    def test_rename_only(self):
+        """ Paths requested without data only have their directory synced """
+        dirs = []
+        sync_dir = durable.sync_dir
+        durable.sync_dir = dirs.append
+        self.addCleanup(setattr, durable, 'sync_dir', sync_dir)
+        group = GroupCommit(interval=60)
+        group.request('a', data=False)
+        group.request('b', data=False)
+        group.request('b')
+        group.sync()
+        self.assertEqual((dirs, self.synced), (['a'], ['b']))
+
+
+class test_durability(unittest.TestCase):
+    """ Class to test FileStorage saves at each durability """
+
+    path = 'durable.json'
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in [self.path, self.path + '.log', self.path + '.search'] \
+                + glob.glob(self.path + '.*.tmp'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_levels(self):
+        """ Every level saves what reload reads back """
+        for level in ('none', 'group', 'always'):
+            for journal in (False, True):
+                storage = FileStorage(self.path, journal=journal,
+                                      durability=level)
+                self.assertEqual(storage.durability, level)
+                new = BaseModel()
+                storage.new(new)
+                storage.save()
+                storage.sync()
+                other = FileStorage(self.path, journal=journal)
+                other.reload()
+                self.assertIn('BaseModel.' + new.id, other.all())
+                self.tearDown()
+
+    def test_group_syncs_before_rename(self):
+        """ With group durability a snapshot is synced before its rename,
+        and only the rename is left to the group """
+        storage = FileStorage(self.path, durability='group')
+        storage.new(BaseModel())
+        storage.save()
+        calls = []
+        fsync, replace = os.fsync, os.replace
+        os.fsync = lambda fd: calls.append('fsync') or fsync(fd)
+        os.replace = lambda *args: calls.append('replace') or replace(*args)
+        try:
+            storage.new(BaseModel())
+            storage.save()
+        finally:
+            os.fsync, os.replace = fsync, replace
+        self.assertEqual(calls[:2], ['fsync', 'replace'])
+        storage.sync()
+
+    def test_unknown_level(self):
+        """ An unknown durability is refused """
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, durability='sometimes')
+
+    def test_failed_save(self):
+        """ A save failing mid-way leaves the previous snapshot intact """
+        storage = FileStorage(self.path, durability='always')
+        kept = BaseModel()
+        storage.new(kept)
+        storage.save()
+        storage.new(BaseModel())
+        fsync = os.fsync
+        os.fsync = failing_fsync
+        try:
+            with self.assertRaises(OSError):
+                storage.save()
+        finally:
+            os.fsync = fsync
+        other = FileStorage(self.path)
+        other.reload()
+        self.assertEqual(list(other.all()), ['BaseModel.' + kept.id])
+        self.assertEqual(glob.glob(self.path + '.*.tmp'), [])
+
+    def test_journal_garbage(self):
+        """ A complete but undecodable journal line ends the replay """
+        storage = FileStorage(self.path, journal=True)
+        new = BaseModel()
+        storage.new(new)
+        storage.save()
+        size = os.path.getsize(storage.log_path)
+        with open(storage.log_path, 'ab') as f:
+            f.write(b'\0\0\0\0\n')
+        other = FileStorage(self.path, journal=True)
+        other.reload()
+        self.assertIn('BaseModel.' + new.id, other.all())
+        self.assertEqual(os.path.getsize(storage.log_path), size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+""" Module for testing NDJSON exports"""
+import unittest
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+from tests.test_models.test_engine.factory import make
+import gzip
+import json
+import os
+
+
+class test_export(unittest.TestCase):
+    """ Class to test streaming storage to NDJSON files """
+
+    path = 'export.json'
+    out = 'export.ndjson'
+
+    def setUp(self):
+        """ Set up a storage with a few objects """
+        self.storage = FileStorage(self.path)
+        self.places = [make(Place, name=str(i), price_by_night=i)
+                       for i in range(3)]
+        self.state = make(State, name='CA')
+        for obj in self.places + [self.state]:
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage and output files """
+        for path in (self.path, self.path + '.search', self.out,
+                     self.out + '.gz'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def lines(self, path=None, opener=open):
+        """ Returns the decoded lines of an export """
+        with opener(path or self.out, 'rt') as f:
+            return [json.loads(line) for line in f]
+
+    def test_class(self):
+        """ Only objects of the class are exported, one per line """
+        self.assertEqual(self.storage.export(Place, self.out), 3)
+        lines = self.lines()
+        self.assertEqual(lines, [p.to_dict() for p in self.places])
+
+    def test_all(self):
+        """ None exports every object """
+        self.assertEqual(self.storage.export(None, self.out), 4)
+        self.assertEqual(len(self.lines()), 4)
+
+    def test_fields(self):
+        """ Records are projected onto the requested fields """
+        self.storage.export('Place', self.out, fields=['id', 'name'])
+        self.assertEqual(self.lines()[0],
+                         {'id': self.places[0].id, 'name': '0'})
+
+    def test_gzip(self):
+        """ A .gz path is compressed """
+        path = self.out + '.gz'
+        self.assertEqual(self.storage.export(State, path), 1)
+        self.assertEqual(self.lines(path, gzip.open),
+                         [self.state.to_dict()])
+
+    def test_empty(self):
+        """ A class without objects gives an empty file """
+        self.assertEqual(self.storage.export('City', self.out), 0)
+        self.assertEqual(self.lines(), [])
+
+    def test_lazy(self):
+        """ Lazily loaded entries are exported without being built """
+        self.storage.save()
+        lazy = FileStorage(self.path, lazy=True)
+        lazy.reload()
+        self.assertEqual(lazy.export(Place, self.out), 3)
+        self.assertEqual(len(lazy._FileStorage__raw), 4)
+        self.assertEqual(self.lines(), [p.to_dict() for p in self.places])
+
+
+class test_export_db(unittest.TestCase):
+    """ Class to test exports from the SQLite storage """
+
+    path = 'test_export.db'
+    out = 'export.ndjson'
+
+    def setUp(self):
+        """ Open a fresh database """
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close and remove the database and output files """
+        self.storage.close()
+        for path in (self.path, self.path + '-wal', self.path + '-shm',
+                     self.out):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_export(self):
+        """ Saved, staged and deleted objects are all accounted for """
+        saved, gone, staged = make(Place, name='a'), Place(), Place()
+        for obj in (saved, gone):
+            self.storage.new(obj)
+        self.storage.save()
+        self.storage.delete(gone)
+        self.storage.new(staged)
+        self.assertEqual(self.storage.export(Place, self.out), 2)
+        with open(self.out) as f:
+            ids = [json.loads(line)['id'] for line in f]
+        self.assertEqual(ids, [saved.id, staged.id])
+
+    def test_rows_not_cached(self):
+        """ Exported rows are not added to the identity map """
+        self.storage.new(Place())
+        self.storage.save()
+        other = DBStorage(self.path)
+        other.reload()
+        self.addCleanup(other.close)
+        self.assertEqual(other.export(None, self.out), 1)
+        self.assertEqual(other._DBStorage__objects, {})
@@ -3,6 +3,12 @@
 import unittest
 from models.base_model import BaseModel
 from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.spill import SpillFile
+from models.city import City
+from models.state import State
+from models.user import User
+import json
 import os
 
 
@@ -19,10 +25,11 @@ class test_fileStorage(unittest.TestCase):
 
     def tearDown(self):
         """ Remove storage file at end of tests """
-        try:
-            os.remove('file.json')
-        except:
-            pass
+        for path in ('file.json', 'file.json.search'):
+            try:
+                os.remove(path)
+            except:
+                pass
 
     def test_obj_list_empty(self):
         """ __objects is initially empty """
@@ -107,3 +114,643 @@ class test_fileStorage(unittest.TestCase):
         from models.engine.file_storage import FileStorage
         print(type(storage))
         self.assertEqual(type(storage), FileStorage)
+
+
+class test_fileStorage_journal(unittest.TestCase):
+    """ Class to test the append-only journal mode """
+
+    path = 'journal.json'
+
+    def setUp(self):
+        """ Set up a journaled storage on its own file """
+        self.storage = FileStorage(self.path, journal=True)
+
+    def tearDown(self):
+        """ Remove snapshot and journal files """
+        for path in (self.path, self.storage.log_path,
+                     self.storage.search_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_save_appends(self):
+        """ Save appends to the log and leaves no snapshot """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path))
+        new.name = 'changed'
+        self.storage.new(new)
+        self.storage.save()
+        with open(self.storage.log_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_reload_replays(self):
+        """ Reload replays puts and deletes over the snapshot """
+        kept, gone = BaseModel(), BaseModel()
+        self.storage.new(kept)
+        self.storage.new(gone)
+        self.storage.compact()
+        kept.name = 'kept'
+        self.storage.new(kept)
+        self.storage.delete(gone)
+        self.storage.save()
+        other = FileStorage(self.path, journal=True)
+        other.reload()
+        self.assertEqual(list(other.all()), ['BaseModel.' + kept.id])
+        self.assertEqual(other.all()['BaseModel.' + kept.id].name, 'kept')
+
+    def test_compact(self):
+        """ Compact folds the log into the snapshot """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.storage.compact()
+        self.assertEqual(os.path.getsize(self.storage.log_path), 0)
+        with open(self.path) as f:
+            self.assertIn('BaseModel.' + new.id, f.read())
+
+    def test_torn_record(self):
+        """ A partial trailing record is dropped on reload """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        with open(self.storage.log_path, 'a') as f:
+            f.write('{"op": "put", "key": "Base')
+        other = FileStorage(self.path, journal=True)
+        other.reload()
+        self.assertIn('BaseModel.' + new.id, other.all())
+        with open(self.storage.log_path) as f:
+            self.assertTrue(f.read().endswith('\n'))
+
+
+class test_fileStorage_dirty(unittest.TestCase):
+    """ Class to test dirty tracking and incremental saves """
+
+    path = 'dirty.json'
+
+    def setUp(self):
+        """ Set up a storage on its own file """
+        self.storage = FileStorage(self.path)
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def load(self):
+        """ Returns the decoded storage file """
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_new_marks_dirty(self):
+        """ new and delete mark keys dirty until save """
+        new = BaseModel()
+        key = 'BaseModel.' + new.id
+        self.storage.new(new)
+        self.assertEqual(self.storage.dirty, {key})
+        self.storage.save()
+        self.assertEqual(self.storage.dirty, set())
+        self.storage.delete(new)
+        self.assertEqual(self.storage.dirty, {key})
+
+    def test_save_matches_to_dict(self):
+        """ Spliced output is the same JSON as a full dump """
+        objs = [BaseModel() for i in range(3)]
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+        objs[1].name = 'changed'
+        self.storage.new(objs[1])
+        self.storage.delete(objs[2])
+        self.storage.save()
+        expected = {'BaseModel.' + o.id: o.to_dict() for o in objs[:2]}
+        self.assertEqual(self.load(), expected)
+
+    def test_clean_objects_not_reencoded(self):
+        """ Only dirty objects are serialized again """
+        first, second = BaseModel(), BaseModel()
+        self.storage.new(first)
+        self.storage.new(second)
+        self.storage.save()
+        calls = []
+        second.to_dict = lambda *args: calls.append(1) or {}
+        self.addCleanup(delattr, second, 'to_dict')
+        first.name = 'changed'
+        self.storage.new(first)
+        self.storage.save()
+        self.assertEqual(calls, [])
+        self.assertEqual(self.load()['BaseModel.' + first.id]['name'],
+                         'changed')
+
+
+class test_fileStorage_index(unittest.TestCase):
+    """ Class to test the per-class index """
+
+    path = 'index.json'
+
+    def setUp(self):
+        """ Set up a storage holding two users and a state """
+        self.storage = FileStorage(self.path)
+        self.users = [User(), User()]
+        self.state = State()
+        for obj in self.users + [self.state]:
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_all_cls(self):
+        """ all filters by class or class name """
+        keys = ['User.' + u.id for u in self.users]
+        self.assertEqual(list(self.storage.all(User)), keys)
+        self.assertEqual(list(self.storage.all('User')), keys)
+        self.assertEqual(self.storage.all('Place'), {})
+        self.assertEqual(len(self.storage.all()), 3)
+
+    def test_count(self):
+        """ count follows new and delete """
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(User), 2)
+        self.storage.delete(self.users[0])
+        self.assertEqual(self.storage.count('User'), 1)
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_get(self):
+        """ get returns the object or None """
+        self.assertIs(self.storage.get(State, self.state.id), self.state)
+        self.assertIsNone(self.storage.get('User', self.state.id))
+
+    def test_reload_indexes(self):
+        """ Reloaded objects are indexed by class """
+        self.storage.save()
+        other = FileStorage(self.path)
+        other.reload()
+        self.assertEqual(other.count(User), 2)
+        self.assertEqual(list(other.all(State)), ['State.' + self.state.id])
+
+
+class test_fileStorage_find(unittest.TestCase):
+    """ Class to test the foreign key indexes """
+
+    path = 'find.json'
+
+    def setUp(self):
+        """ Set up a storage with a state and two of its cities """
+        self.storage = FileStorage(self.path)
+        self.state = State()
+        self.cities = [City(), City()]
+        for city in self.cities:
+            city.state_id = self.state.id
+        for obj in [self.state] + self.cities:
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_find(self):
+        """ find returns the objects indexed under a value """
+        self.assertEqual(self.storage.find(City, 'state_id', self.state.id),
+                         self.cities)
+        self.assertEqual(self.storage.find('City', 'state_id', 'nope'), [])
+
+    def test_find_update(self):
+        """ Re-registering an object moves it in the index """
+        self.cities[0].state_id = 'other'
+        self.storage.new(self.cities[0])
+        self.assertEqual(self.storage.find(City, 'state_id', self.state.id),
+                         self.cities[1:])
+        self.assertEqual(self.storage.find(City, 'state_id', 'other'),
+                         self.cities[:1])
+
+    def test_find_delete(self):
+        """ Deleted objects leave the index """
+        self.storage.delete(self.cities[1])
+        self.assertEqual(self.storage.find(City, 'state_id', self.state.id),
+                         self.cities[:1])
+
+    def test_find_reload(self):
+        """ Reloaded objects are indexed """
+        self.storage.save()
+        other = FileStorage(self.path)
+        other.reload()
+        found = other.find(City, 'state_id', self.state.id)
+        self.assertEqual({c.id for c in found}, {c.id for c in self.cities})
+
+    def test_find_unindexed(self):
+        """ Fields without an index are scanned """
+        self.state.name = 'California'
+        self.assertEqual(self.storage.find(State, 'name', 'California'),
+                         [self.state])
+
+    def test_reload_progress(self):
+        """ reload reports progress while streaming the file """
+        self.storage.save()
+        reports = []
+        other = FileStorage(self.path)
+        other.progress_every = 2
+        other.reload(lambda *args: reports.append(args))
+        size = os.path.getsize(self.path)
+        self.assertEqual(len(reports), 2)
+        self.assertEqual(reports[0][0], 2)
+        self.assertEqual(reports[-1], (3, size, size))
+
+
+class test_fileStorage_lazy(unittest.TestCase):
+    """ Class to test lazy materialization """
+
+    path = 'lazy.json'
+
+    def setUp(self):
+        """ Save a state with two cities and reload them lazily """
+        saved = FileStorage(self.path)
+        self.state = State()
+        self.cities = [City(), City()]
+        for city in self.cities:
+            city.state_id = self.state.id
+        for obj in [self.state] + self.cities:
+            saved.new(obj)
+        saved.save()
+        self.storage = FileStorage(self.path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def built(self):
+        """ Returns the keys of the instances built so far """
+        return set(self.storage._FileStorage__objects)
+
+    def test_reload_builds_nothing(self):
+        """ reload only indexes the entries """
+        self.assertEqual(self.built(), set())
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(City), 2)
+
+    def test_get(self):
+        """ get builds only the requested object """
+        state = self.storage.get(State, self.state.id)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertIs(self.storage.get(State, self.state.id), state)
+        self.assertEqual(self.built(), {'State.' + self.state.id})
+
+    def test_all_cls(self):
+        """ all(cls) builds the objects of one class """
+        cities = self.storage.all(City)
+        self.assertEqual(len(cities), 2)
+        self.assertTrue(all(isinstance(c, City) for c in cities.values()))
+        self.assertEqual(self.built(), set(cities))
+
+    def test_all(self):
+        """ all() builds everything """
+        self.assertEqual(len(self.storage.all()), 3)
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_find(self):
+        """ find uses the index built from the raw entries """
+        found = self.storage.find(City, 'state_id', self.state.id)
+        self.assertEqual({c.id for c in found},
+                         {c.id for c in self.cities})
+
+    def test_save_keeps_unbuilt(self):
+        """ Entries never built are written back unchanged """
+        state = self.storage.get(State, self.state.id)
+        state.name = 'Nevada'
+        self.storage.new(state)
+        self.storage.delete(self.storage.get(City, self.cities[0].id))
+        self.storage.save()
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data['State.' + state.id]['name'], 'Nevada')
+        self.assertEqual(data['City.' + self.cities[1].id],
+                         self.cities[1].to_dict())
+        self.assertNotIn('City.' + self.cities[0].id, data)
+
+    def test_epoch_timestamps(self):
+        """ Epoch mode writes integer timestamps that reload """
+        epoch = FileStorage(self.path, epoch=True)
+        for obj in self.storage.all().values():
+            epoch.new(obj)
+        epoch.save()
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(type(data['State.' + self.state.id]['created_at']),
+                         int)
+        other = FileStorage(self.path)
+        other.reload()
+        state = other.get(State, self.state.id)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+
+
+class test_fileStorage_batch(unittest.TestCase):
+    """ Class to test batches and rollback """
+
+    path = 'batch.json'
+
+    def setUp(self):
+        """ Set up a storage holding one saved state """
+        self.storage = FileStorage(self.path)
+        self.state = State()
+        self.state.name = 'Saved'
+        self.storage.new(self.state)
+        self.storage.save()
+        self.key = 'State.' + self.state.id
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def load(self):
+        """ Returns the decoded storage file """
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_save_deferred(self):
+        """ Saves inside a batch wait for the outermost commit """
+        self.storage.begin()
+        self.storage.begin()
+        self.storage.new(State())
+        self.storage.save()
+        self.storage.commit()
+        self.assertTrue(self.storage.in_batch)
+        self.assertEqual(len(self.load()), 1)
+        self.storage.commit()
+        self.assertFalse(self.storage.in_batch)
+        self.assertEqual(len(self.load()), 2)
+
+    def test_rollback(self):
+        """ Rollback restores saved objects and drops new ones """
+        self.storage.begin()
+        added = State()
+        self.storage.new(added)
+        self.state.name = 'Changed'
+        self.storage.new(self.state)
+        self.storage.rollback()
+        self.assertFalse(self.storage.in_batch)
+        self.assertIsNone(self.storage.get(State, added.id))
+        self.assertEqual(self.storage.get(State, self.state.id).name,
+                         'Saved')
+        self.assertEqual(self.storage.dirty, set())
+
+    def test_rollback_delete(self):
+        """ Rollback brings back deleted objects """
+        self.storage.begin()
+        self.storage.delete(self.state)
+        self.storage.rollback()
+        self.assertEqual(self.storage.count(State), 1)
+
+    def test_rollback_journal(self):
+        """ Rollback reads the journaled state """
+        storage = FileStorage(self.path, journal=True)
+        self.addCleanup(os.remove, storage.log_path)
+        storage.reload()
+        state = storage.get(State, self.state.id)
+        state.name = 'Journaled'
+        storage.new(state)
+        storage.save()
+        state.name = 'Unsaved'
+        storage.new(state)
+        storage.rollback()
+        self.assertEqual(storage.get(State, state.id).name, 'Journaled')
+
+    def test_batch(self):
+        """ batch commits on success and rolls back on error """
+        with self.storage.batch():
+            self.storage.new(State())
+            self.storage.save()
+        self.assertEqual(len(self.load()), 2)
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                self.storage.new(State())
+                raise KeyError
+        self.assertEqual(self.storage.count(State), 2)
+        self.assertEqual(len(self.load()), 2)
+
+
+class test_fileStorage_page(unittest.TestCase):
+    """ Class to test paginated iteration """
+
+    path = 'page.json'
+
+    def setUp(self):
+        """ Save five states and a city, reloaded lazily """
+        saved = FileStorage(self.path)
+        self.states = sorted((State() for i in range(5)),
+                             key=lambda state: state.id)
+        for obj in self.states + [City()]:
+            saved.new(obj)
+        saved.save()
+        self.storage = FileStorage(self.path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def ids(self, *args, **kwargs):
+        """ Returns the ids of one page """
+        return [obj.id for obj in self.storage.page(*args, **kwargs)]
+
+    def test_order(self):
+        """ Objects come in id order """
+        new = State()
+        self.storage.new(new)
+        self.assertEqual(self.ids(State), sorted(
+            [s.id for s in self.states] + [new.id]))
+        self.assertEqual(len(self.ids()), 7)
+
+    def test_limit_offset(self):
+        """ limit and offset select one page """
+        self.assertEqual(self.ids('State', limit=2, offset=1),
+                         [s.id for s in self.states[1:3]])
+        self.assertEqual(self.ids(State, limit=2, offset=5), [])
+
+    def test_after(self):
+        """ after starts right past the given id """
+        self.assertEqual(self.ids(State, limit=2, after=self.states[1].id),
+                         [s.id for s in self.states[2:4]])
+        self.assertEqual(self.ids(State, after='missing'), [])
+
+    def test_after_deleted(self):
+        """ A page resumes past its last id even once it is deleted """
+        last = list(self.storage.page(State, limit=2))[-1]
+        self.storage.delete(last)
+        self.assertEqual(self.ids(State, after=last.id),
+                         [s.id for s in self.states[2:]])
+
+    def test_negative(self):
+        """ A negative limit or offset is refused """
+        self.assertRaises(ValueError, self.storage.page, State, -1)
+        self.assertRaises(ValueError, self.storage.page, State, 1, -3)
+
+    def test_builds_page_only(self):
+        """ Only the objects of the page are built """
+        self.ids(State, limit=2)
+        self.assertEqual(set(self.storage._FileStorage__objects),
+                         {'State.' + s.id for s in self.states[:2]})
+
+
+class test_fileStorage_cache(unittest.TestCase):
+    """ Class to test the bounded cache of built instances """
+
+    path = 'cache.json'
+
+    def setUp(self):
+        """ Save five states, reloaded with room for two instances """
+        saved = FileStorage(self.path)
+        self.states = [State() for i in range(5)]
+        for i, state in enumerate(self.states):
+            state.name = 'State {}'.format(i)
+            saved.new(state)
+        saved.save()
+        self.storage = FileStorage(self.path, cache_size=2)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in (self.path, self.path + '.search', self.path + '.log'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def built(self):
+        """ Returns the keys of the instances kept """
+        return set(self.storage._FileStorage__objects)
+
+    def get(self, i):
+        """ Returns state i from the storage """
+        return self.storage.get(State, self.states[i].id)
+
+    def test_bounded(self):
+        """ The least recently used instance is evicted """
+        self.get(0)
+        self.get(1)
+        self.get(0)
+        self.get(2)
+        self.assertEqual(self.built(), {'State.' + self.states[0].id,
+                                        'State.' + self.states[2].id})
+        metrics = self.storage.metrics
+        self.assertEqual((metrics['cached'], metrics['hits'],
+                          metrics['misses'], metrics['evictions']),
+                         (2, 1, 3, 1))
+
+    def test_rebuilt(self):
+        """ Evicted objects are rebuilt with the same state """
+        first = self.get(1)
+        names = {'State.' + s.id: s.name for s in self.states}
+        self.assertEqual({key: obj.name for key, obj in
+                          self.storage.all(State).items()}, names)
+        self.assertEqual(len(self.built()), 2)
+        again = self.get(1)
+        self.assertIsNot(again, first)
+        self.assertEqual(again.to_dict(), first.to_dict())
+        self.assertEqual(len(self.storage.all()), 5)
+        self.assertEqual(len(self.built()), 2)
+
+    def test_dirty_evicted(self):
+        """ Changes of an evicted object are saved """
+        state = self.get(0)
+        state.name = 'Changed'
+        self.storage.new(state)
+        self.get(1)
+        self.get(2)
+        self.assertNotIn('State.' + state.id, self.built())
+        self.storage.save()
+        other = FileStorage(self.path)
+        other.reload()
+        self.assertEqual(other.get(State, state.id).name, 'Changed')
+
+    def test_dirty_evicted_journal(self):
+        """ The journal records the changes of evicted objects """
+        storage = FileStorage(self.path, journal=True, cache_size=1)
+        storage.reload()
+        state = storage.get(State, self.states[0].id)
+        state.name = 'Changed'
+        storage.new(state)
+        storage.get(State, self.states[1].id)
+        storage.save()
+        other = FileStorage(self.path, journal=True)
+        other.reload()
+        self.assertEqual(other.get(State, state.id).name, 'Changed')
+        self.assertEqual(other.count(), 5)
+
+    def test_spilled(self):
+        """ Cold entries are kept on disk, only their location in memory """
+        raw = self.storage._FileStorage__raw
+        self.assertEqual(len(raw), 5)
+        self.assertTrue(all(type(location) is tuple
+                            for location in raw.values()))
+        self.assertEqual(dict(self.storage.records(State)),
+                         {'State.' + s.id: s.to_dict() for s in self.states})
+
+    def test_flushed_once(self):
+        """ An object is only written again once it changed """
+        spill = lambda: self.storage._FileStorage__spill.size
+        for i in (0, 1, 2):
+            self.get(i)
+        size = spill()
+        for i in (0, 1, 2, 3, 0, 1):
+            self.get(i)
+        self.assertEqual(spill(), size)
+        state = self.get(2)
+        state.name = 'Changed'
+        self.storage.new(state)
+        self.get(3)
+        self.get(4)
+        self.assertGreater(spill(), size)
+        self.assertEqual(self.get(2).name, 'Changed')
+
+    def test_repack(self):
+        """ Garbage left in the spill file by changes is repacked """
+        old = SpillFile.buffer_size
+        SpillFile.buffer_size = 64
+        self.addCleanup(setattr, SpillFile, 'buffer_size', old)
+        for n in range(20):
+            for i in range(5):
+                state = self.get(i)
+                state.name = 'Round {}'.format(n)
+                self.storage.new(state)
+        spill = self.storage._FileStorage__spill
+        self.assertLess(spill.size, 20 * 5 * 100)
+        self.assertEqual({s.name for s in self.storage.all().values()},
+                         {'Round 19'})
+
+    def test_find(self):
+        """ Lookups keep only cache_size instances """
+        found = self.storage.find(State, 'name', 'State 3')
+        self.assertEqual([s.id for s in found], [self.states[3].id])
+        self.assertEqual(len(list(self.storage.page(State))), 5)
+        self.assertEqual(len(self.built()), 2)
+
+    def test_invalid(self):
+        """ The cache must hold at least one instance """
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, cache_size=0)
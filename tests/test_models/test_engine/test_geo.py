@@ -0,0 +1,179 @@
+#!/usr/bin/python3
+""" Module for testing spatial searches"""
+import unittest
+from models.engine import geo
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+import os
+
+CITIES = {'SF': (37.7749, -122.4194), 'Oakland': (37.8044, -122.2712),
+          'LA': (34.0522, -118.2437), 'Suva': (-18.1248, 178.4501),
+          'Apia': (-13.8333, -171.7667)}
+
+
+def place(name):
+    """ Returns a new place at the coordinates of a city """
+    obj = Place()
+    obj.name = name
+    obj.latitude, obj.longitude = CITIES[name]
+    return obj
+
+
+class test_geo(unittest.TestCase):
+    """ Class to test distances and the grid index """
+
+    def test_distance(self):
+        """ Haversine distances match known values """
+        self.assertAlmostEqual(geo.distance(*CITIES['SF'], *CITIES['LA']),
+                               559, delta=1)
+        self.assertEqual(geo.distance(1.0, 2.0, 1.0, 2.0), 0)
+        self.assertEqual(geo.distances(*CITIES['SF'], [CITIES['SF']]), [0])
+
+    def test_bounds(self):
+        """ Boxes wrap around the antimeridian and stop at the poles """
+        south, west, north, east = geo.bounds(0, 179.9, 100)
+        self.assertGreater(west, east)
+        self.assertTrue(geo.in_box(0, -179.9, south, west, north, east))
+        self.assertEqual(geo.bounds(89.9, 0, 100)[1:4:2], (-180.0, 180.0))
+
+    def test_out_of_range(self):
+        """ Points off the globe and negative radii are refused """
+        for args in ((0, 500, 10), (-91, 0, 10), (float('nan'), 0, 10),
+                     (0, float('inf'), 10), (0, 0, -1)):
+            self.assertRaises(ValueError, geo.bounds, *args)
+        index = geo.GeoIndex(('latitude', 'longitude'))
+        self.assertRaises(ValueError, index.box, 0, 170, 10, 500)
+        self.assertRaises(ValueError, index.box, 0, 0, 100, 10)
+
+    @unittest.skipIf(geo.numpy is None, "NumPy is not installed")
+    def test_distances_numpy(self):
+        """ The vectorized distances match the scalar ones """
+        points = [(lat / 2, lon * 3) for lat in range(-10, 10)
+                  for lon in range(-5, 5)]
+        found = geo.distances(*CITIES['SF'], points)
+        self.assertEqual(len(found), len(points))
+        for d, point in zip(found, points):
+            self.assertAlmostEqual(d, geo.distance(*CITIES['SF'], *point),
+                                   places=6)
+
+    def test_index(self):
+        """ Keys move between cells and leave on remove """
+        index = geo.GeoIndex(('latitude', 'longitude'))
+        index.add('a', *CITIES['SF'])
+        index.add('b', *CITIES['Oakland'])
+        index.add('c', None, 3)
+        self.assertEqual(len(index), 2)
+        self.assertEqual([k for d, k in index.radius(*CITIES['SF'], 20)],
+                         ['a', 'b'])
+        index.add('b', *CITIES['LA'])
+        self.assertEqual([k for d, k in index.radius(*CITIES['SF'], 20)],
+                         ['a'])
+        index.remove('a')
+        self.assertEqual(index.radius(*CITIES['SF'], 20), [])
+
+    def test_antimeridian(self):
+        """ Searches reach across longitude 180 """
+        index = geo.GeoIndex(('latitude', 'longitude'))
+        index.add('suva', *CITIES['Suva'])
+        index.add('apia', *CITIES['Apia'])
+        self.assertEqual([k for d, k in index.radius(*CITIES['Suva'],
+                                                     1200)],
+                         ['suva', 'apia'])
+        self.assertEqual(len(index.box(-20, 170, -10, -170)), 2)
+
+
+class test_geo_file(unittest.TestCase):
+    """ Class to test spatial searches on file storage """
+
+    path = 'geo.json'
+
+    def setUp(self):
+        """ Set up a storage with a place in each city """
+        self.storage = FileStorage(self.path)
+        self.places = {name: place(name) for name in CITIES}
+        for obj in self.places.values():
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def names(self, pairs):
+        """ Returns the place names of (distance, place) pairs """
+        return [obj.name for distance, obj in pairs]
+
+    def test_near(self):
+        """ near returns the places within the radius, nearest first """
+        self.assertEqual(self.names(self.storage.near(
+            Place, *CITIES['SF'], 20)), ['SF', 'Oakland'])
+        self.assertEqual(self.names(self.storage.near(
+            'Place', *CITIES['SF'], 20, limit=1)), ['SF'])
+
+    def test_nearest(self):
+        """ nearest widens the search until k places are found """
+        pairs = self.storage.nearest(Place, *CITIES['LA'], 2)
+        self.assertEqual(self.names(pairs), ['LA', 'Oakland'])
+        self.assertAlmostEqual(pairs[1][0], 553, delta=1)
+        self.assertEqual(len(self.storage.nearest(Place, 0, 0, 10)), 5)
+
+    def test_within(self):
+        """ within returns the places inside a box """
+        self.assertEqual({p.name for p in self.storage.within(
+            Place, 30, -125, 40, -115)}, {'SF', 'Oakland', 'LA'})
+
+    def test_update_delete(self):
+        """ The index follows saved moves and deletes """
+        moved = self.places['Oakland']
+        moved.latitude, moved.longitude = CITIES['LA']
+        self.storage.new(moved)
+        self.storage.delete(self.places['LA'])
+        self.assertEqual(self.names(self.storage.near(
+            Place, *CITIES['LA'], 1)), ['Oakland'])
+
+    def test_lazy(self):
+        """ A lazy reload indexes the raw entries """
+        self.storage.save()
+        lazy = FileStorage(self.path, lazy=True)
+        lazy.reload()
+        self.assertEqual(self.names(lazy.near(Place, *CITIES['SF'], 20)),
+                         ['SF', 'Oakland'])
+        self.assertEqual(len(lazy._FileStorage__objects), 2)
+
+
+class test_geo_db(unittest.TestCase):
+    """ Class to test spatial searches on the SQLite storage """
+
+    path = 'test_geo.db'
+
+    def setUp(self):
+        """ Open a fresh database """
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close and remove the database files """
+        self.storage.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def test_near(self):
+        """ Saved and staged places are found through the box """
+        for name in ('SF', 'LA', 'Suva'):
+            self.storage.new(place(name))
+        self.storage.save()
+        self.storage.new(place('Oakland'))
+        self.storage.new(place('Apia'))
+        self.assertEqual([p.name for d, p in self.storage.near(
+            Place, *CITIES['SF'], 20)], ['SF', 'Oakland'])
+        self.assertEqual([p.name for d, p in self.storage.nearest(
+            Place, *CITIES['Suva'], 2)], ['Suva', 'Apia'])
+        self.assertEqual(len(self.storage.within(Place, -20, 170, -10,
+                                                 -170)), 2)
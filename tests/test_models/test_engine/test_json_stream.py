@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+""" Module for testing the streaming JSON parser"""
+import unittest
+from models.engine.json_stream import iter_items
+import io
+import json
+
+
+class test_iter_items(unittest.TestCase):
+    """ Class to test iter_items """
+
+    def items(self, text, chunk_size=4):
+        """ Returns the parsed (key, value) pairs of text """
+        stream = iter_items(io.StringIO(text), chunk_size)
+        return [(key, value) for key, value, position in stream]
+
+    def test_matches_json(self):
+        """ Members come out as json.loads decodes them """
+        data = {'a.1': {'x': [1, 2.5, None], 'y': 'z " }'},
+                'b.2': 12345678, 'c.3': True, 'd.4': 'é'}
+        text = json.dumps(data)
+        for size in (1, 3, 7, 1 << 20):
+            self.assertEqual(dict(self.items(text, size)), data)
+
+    def test_whitespace(self):
+        """ Whitespace between tokens is skipped """
+        text = ' {\n "a" :\t1 ,\n"b":  [ ] }\n'
+        self.assertEqual(self.items(text), [('a', 1), ('b', [])])
+
+    def test_number_at_boundary(self):
+        """ A number split across chunks is read whole """
+        self.assertEqual(self.items('{"a": 123456}', 8), [('a', 123456)])
+
+    def test_empty_object(self):
+        """ An empty object yields nothing """
+        self.assertEqual(self.items('{}'), [])
+
+    def test_position(self):
+        """ Position reports the characters consumed """
+        text = '{"a": 1, "b": 2}'
+        positions = [p for k, v, p in iter_items(io.StringIO(text), 2)]
+        self.assertEqual(positions, [text.index('"b"'), len(text)])
+
+    def test_empty_file(self):
+        """ Empty input raises ValueError """
+        with self.assertRaises(ValueError):
+            self.items('')
+
+    def test_malformed(self):
+        """ Malformed input raises ValueError """
+        for text in ('[1, 2]', '{"a" 1}', '{"a": 1', '{1: 2}', '{"a": }'):
+            with self.assertRaises(ValueError):
+                self.items(text)
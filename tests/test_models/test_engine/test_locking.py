@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+""" Module for testing storage shared between processes"""
+import unittest
+from models.base_model import BaseModel
+from models.engine import locking
+from models.engine.file_storage import FileStorage
+from models.engine.locking import FileLock
+import os
+
+
+class test_file_lock(unittest.TestCase):
+    """ Class to test the advisory lock and its generation """
+
+    path = 'test.lock'
+
+    def tearDown(self):
+        """ Remove the lock file """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def test_generation(self):
+        """ The generation starts at 0 and survives reopening """
+        lock = FileLock(self.path)
+        with lock.exclusive():
+            self.assertEqual(lock.generation(), 0)
+            self.assertEqual(lock.advance(), 1)
+            self.assertEqual(lock.advance(), 2)
+        lock.close()
+        other = FileLock(self.path)
+        with other.shared():
+            self.assertEqual(other.generation(), 2)
+        other.close()
+
+    @unittest.skipIf(locking.fcntl is None, "no fcntl")
+    def test_exclusive(self):
+        """ Another holder cannot lock while the lock is exclusive """
+        fcntl = locking.fcntl
+        lock = FileLock(self.path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        self.addCleanup(os.close, fd)
+        with lock.shared():
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            with lock.exclusive():
+                with self.assertRaises(BlockingIOError):
+                    fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        lock.close()
+
+
+class test_shared_storage(unittest.TestCase):
+    """ Class to test storages sharing one file """
+
+    path = 'shared.json'
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in (self.path, self.path + '.log', self.path + '.search',
+                     self.path + '.lock'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def pair(self, journal=False):
+        """ Returns two reloaded storages on the same file """
+        storages = []
+        for i in range(2):
+            storage = FileStorage(self.path, journal=journal, shared=True)
+            storage.reload()
+            self.addCleanup(storage.close)
+            storages.append(storage)
+        return storages
+
+    def check_merge(self, journal):
+        """ Saves of each storage keep the other's objects """
+        a, b = self.pair(journal)
+        x, y = BaseModel(), BaseModel()
+        a.new(x)
+        a.save()
+        b.new(y)
+        b.save()
+        a.refresh()
+        keys = {'BaseModel.' + x.id, 'BaseModel.' + y.id}
+        self.assertEqual(set(a.all()), keys)
+        self.assertEqual(set(b.all()), keys)
+        other = FileStorage(self.path, journal=journal)
+        other.reload()
+        self.assertEqual(set(other.all()), keys)
+
+    def test_merge_snapshot(self):
+        """ Snapshot saves merge the other storage's saves """
+        self.check_merge(False)
+
+    def test_merge_journal(self):
+        """ Journal saves merge the other storage's saves """
+        self.check_merge(True)
+
+    def test_changes_and_deletes(self):
+        """ Changed objects are rebuilt, unchanged ones kept, deleted
+        ones dropped """
+        a, b = self.pair()
+        kept, changed, gone = BaseModel(), BaseModel(), BaseModel()
+        for obj in (kept, changed, gone):
+            a.new(obj)
+        a.save()
+        b.refresh()
+        b_kept = b.all()['BaseModel.' + kept.id]
+        b_changed = b.all()['BaseModel.' + changed.id]
+        changed.name = 'new name'
+        a.new(changed)
+        a.delete(gone)
+        a.save()
+        b.refresh()
+        self.assertIs(b.all()['BaseModel.' + kept.id], b_kept)
+        self.assertIsNot(b.all()['BaseModel.' + changed.id], b_changed)
+        self.assertEqual(b.all()['BaseModel.' + changed.id].name,
+                         'new name')
+        self.assertNotIn('BaseModel.' + gone.id, b.all())
+
+    def test_local_changes_win(self):
+        """ Unsaved local changes are kept over other saves """
+        a, b = self.pair(journal=True)
+        obj = BaseModel()
+        a.new(obj)
+        a.save()
+        b.refresh()
+        mine = b.all()['BaseModel.' + obj.id]
+        mine.name = 'b'
+        b.new(mine)
+        obj.name = 'a'
+        a.new(obj)
+        a.save()
+        b.refresh()
+        self.assertEqual(b.all()['BaseModel.' + obj.id].name, 'b')
+        b.save()
+        a.refresh()
+        self.assertEqual(a.all()['BaseModel.' + obj.id].name, 'b')
+
+    def test_compaction(self):
+        """ A compaction by one storage is picked up by the other """
+        a, b = self.pair(journal=True)
+        x, y = BaseModel(), BaseModel()
+        a.new(x)
+        a.save()
+        b.new(y)
+        b.save()
+        a.compact()
+        self.assertEqual(os.path.getsize(a.log_path), 0)
+        z = BaseModel()
+        a.new(z)
+        a.save()
+        b.refresh()
+        self.assertEqual(set(b.all()), {'BaseModel.' + o.id
+                                        for o in (x, y, z)})
+
+    def test_not_shared(self):
+        """ Refresh does nothing on a storage that is not shared """
+        storage = FileStorage(self.path)
+        storage.refresh()
+        self.assertFalse(os.path.exists(storage.lock_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+""" Module for testing the memory-mapped read-only storage"""
+import unittest
+from models.base_model import BaseModel
+from models.engine import mapped
+from models.engine.file_storage import FileStorage
+from models.engine.mapped import MappedStorage
+from models.place import Place
+from models.review import Review
+import io
+import os
+
+
+class test_mapped_storage(unittest.TestCase):
+    """ Class to test serving a built snapshot """
+
+    path = 'mapped.json'
+    snap = 'mapped.json.snap'
+
+    def setUp(self):
+        """ Build the snapshot of a few places and reviews """
+        self.source = FileStorage(self.path)
+        self.places = []
+        for i in range(10):
+            place = Place()
+            place.name = 'Place {}'.format(i)
+            place.number_rooms = i
+            place.latitude = 10.0 + i / 100
+            place.longitude = 20.0
+            review = Review()
+            review.place_id = place.id
+            review.text = 'review of place {}'.format(i)
+            self.source.new(place)
+            self.source.new(review)
+            self.places.append(place)
+        odd = BaseModel()
+        odd.id = 'not-a-uuid'
+        self.source.new(odd)
+        self.assertEqual(mapped.build(self.source, self.snap), 21)
+        self.storage = self.open()
+
+    def tearDown(self):
+        """ Unmap and remove the files """
+        self.storage.close()
+        for path in (self.path, self.path + '.search', self.snap,
+                     self.snap + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def open(self):
+        """ Returns a reloaded storage on the snapshot """
+        storage = MappedStorage(self.snap)
+        storage.reload()
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_get(self):
+        """ Objects are found by id and built once """
+        place = self.storage.get(Place, self.places[4].id)
+        self.assertEqual(place.to_dict(), self.places[4].to_dict())
+        self.assertIs(self.storage.get('Place', self.places[4].id), place)
+        self.assertEqual(self.storage.get(BaseModel, 'not-a-uuid').id,
+                         'not-a-uuid')
+        self.assertIsNone(self.storage.get(Place, self.places[0].id[:-1] +
+                                           'x'))
+        self.assertIsNone(self.storage.get(Place, 'not-a-uuid'))
+
+    def test_listing(self):
+        """ Listings and counts cover every object in key order """
+        self.assertEqual(self.storage.count(), 21)
+        self.assertEqual(self.storage.count(Review), 10)
+        self.assertEqual(list(self.storage.all()), sorted(self.source.all()))
+        self.assertEqual(dict(self.storage.records(Place)),
+                         {'Place.' + p.id: p.to_dict() for p in self.places})
+        ids = sorted(p.id for p in self.places)
+        self.assertEqual([p.id for p in self.storage.page(Place, 3, 2)],
+                         ids[2:5])
+        self.assertEqual([p.id for p in self.storage.page(
+            Place, 2, after=ids[6])], ids[7:9])
+
+    def test_lookups(self):
+        """ Scans, ranking, geographic and text lookups """
+        self.assertEqual(
+            [p.name for p in self.storage.find(Place, 'name', 'Place 3')],
+            ['Place 3'])
+        self.assertEqual(len(list(self.storage.query(
+            Place, number_rooms__gte=7))), 3)
+        self.assertEqual([p.number_rooms for p in self.storage.top(
+            Place, 'number_rooms', 2, reverse=True)], [9, 8])
+        self.assertEqual(len(self.storage.within(Place, 10, 19, 10.045,
+                                                 21)), 5)
+        distance, place = self.storage.nearest(Place, 10.0, 20.0, 1)[0]
+        self.assertEqual(place.name, 'Place 0')
+        score, review = self.storage.search(Review, 'place 6', 1)[0]
+        self.assertEqual(review.text, 'review of place 6')
+
+    def test_read_only(self):
+        """ Writes are refused """
+        place = self.storage.get(Place, self.places[0].id)
+        for write in (lambda: self.storage.new(place), self.storage.save,
+                      lambda: self.storage.delete(place),
+                      self.storage.begin):
+            with self.assertRaises(io.UnsupportedOperation):
+                write()
+
+    def test_refresh(self):
+        """ A rebuilt snapshot is mapped again on refresh """
+        self.storage.refresh()
+        place = self.storage.get(Place, self.places[0].id)
+        self.storage.refresh()
+        self.assertIs(self.storage.get(Place, self.places[0].id), place)
+        extra = Place()
+        self.source.new(extra)
+        mapped.build(self.source, self.snap)
+        self.storage.refresh()
+        self.assertEqual(self.storage.count(Place), 11)
+        self.assertIsNotNone(self.storage.get(Place, extra.id))
+
+    def test_missing(self):
+        """ A missing snapshot is an empty storage; another file is
+        refused """
+        storage = MappedStorage('missing.snap')
+        storage.reload()
+        self.assertEqual(storage.count(), 0)
+        self.source.save()
+        with self.assertRaises(ValueError):
+            MappedStorage(self.path).reload()
+
+    def test_main(self):
+        """ The command line builds the snapshot of a storage file """
+        self.source.save()
+        os.remove(self.snap)
+        self.assertEqual(mapped.main([self.path]), 0)
+        self.assertEqual(self.open().count(), 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
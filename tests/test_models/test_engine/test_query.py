@@ -0,0 +1,199 @@
+#!/usr/bin/python3
+""" Module for testing storage queries"""
+import unittest
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.query import compile_filter, parse
+from models.place import Place
+from tests.test_models.test_engine.factory import make
+import os
+
+
+class test_query_terms(unittest.TestCase):
+    """ Class to test predicate parsing and filters """
+
+    def test_parse(self):
+        """ Suffixes select the op, equality is the default """
+        self.assertEqual(parse({'price_by_night__lt': 100, 'city_id': 'c',
+                                'max_guest__foo': 1}),
+                         [('price_by_night', 'lt', 100),
+                          ('city_id', 'eq', 'c'), ('max_guest__foo', 'eq', 1)])
+
+    def test_filter(self):
+        """ Every term must hold, class defaults included """
+        match = compile_filter(parse({'price_by_night__lt': 100,
+                                      'max_guest__gte': 4}))
+        self.assertTrue(match(make(Place, price_by_night=50, max_guest=4)))
+        self.assertFalse(match(make(Place, price_by_night=50, max_guest=3)))
+        self.assertFalse(match(make(Place, max_guest=3)))
+        self.assertTrue(match(make(Place, max_guest=5)))
+
+    def test_incompatible(self):
+        """ Comparisons between incompatible types do not match """
+        match = compile_filter(parse({'name__gt': 3}))
+        self.assertFalse(match(make(Place, name='x')))
+
+
+class test_query_file(unittest.TestCase):
+    """ Class to test queries on file storage """
+
+    path = 'query.json'
+
+    def setUp(self):
+        """ Save places in two cities and reload them lazily """
+        saved = FileStorage(self.path)
+        self.places = [
+            make(Place, city_id='a', price_by_night=50, max_guest=4),
+            make(Place, city_id='a', price_by_night=150, max_guest=6),
+            make(Place, city_id='b', price_by_night=80, max_guest=2),
+            make(Place, city_id='b', name='Free')]
+        for obj in self.places:
+            saved.new(obj)
+        saved.save()
+        self.storage = FileStorage(self.path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def ids(self, *args, **kwargs):
+        """ Returns the ids of a query's results """
+        return [obj.id for obj in self.storage.query(*args, **kwargs)]
+
+    def test_range(self):
+        """ Range terms come in the order of their range index """
+        self.assertEqual(self.ids(Place, price_by_night__lt=100,
+                                  max_guest__gte=4),
+                         [self.places[0].id])
+        self.assertEqual(self.ids(Place, price_by_night__lte=80),
+                         [self.places[3].id, self.places[0].id,
+                          self.places[2].id])
+        self.assertEqual(self.ids('Place', price_by_night__gt=1000), [])
+
+    def test_indexed(self):
+        """ Equality on an indexed field only builds its candidates """
+        self.assertEqual(self.ids(Place, city_id='b', name='Free'),
+                         [self.places[3].id])
+        self.assertEqual(set(self.storage._FileStorage__objects),
+                         {'Place.' + p.id for p in self.places[2:]})
+
+    def test_no_predicates(self):
+        """ Without predicates every object of the class is returned """
+        self.assertEqual(len(self.ids(Place)), 4)
+        self.assertEqual(self.ids('City'), [])
+
+
+class test_query_db(unittest.TestCase):
+    """ Class to test queries on the SQLite storage """
+
+    path = 'test_query.db'
+
+    def setUp(self):
+        """ Open a fresh database """
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close and remove the database files """
+        self.storage.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def test_query(self):
+        """ Pushed down terms agree with the class defaults """
+        cheap, dear, unset = make(Place, price_by_night=50), \
+            make(Place, price_by_night=150), make(Place, city_id='a')
+        for obj in (cheap, dear, unset):
+            self.storage.new(obj)
+        self.storage.save()
+        staged = make(Place, price_by_night=10, number_rooms=2)
+        self.storage.new(staged)
+        self.storage.delete(cheap)
+        ids = {obj.id for obj in self.storage.query(
+            Place, price_by_night__lt=100)}
+        self.assertEqual(ids, {unset.id, staged.id})
+        self.assertEqual([obj.id for obj in self.storage.query(
+            'Place', number_rooms__ne=0, city_id__eq='')], [staged.id])
+
+    def test_top(self):
+        """ top lets SQLite sort, staged objects merged in """
+        for price in (90, 30, 60):
+            self.storage.new(make(Place, price_by_night=price, city_id='a'))
+        self.storage.new(make(Place, city_id='a'))
+        self.storage.save()
+        self.storage.new(make(Place, price_by_night=40, city_id='a'))
+        self.assertEqual([p.price_by_night for p in self.storage.top(
+            Place, 'price_by_night', 3, city_id='a')], [0, 30, 40])
+        self.assertEqual([p.price_by_night for p in self.storage.top(
+            'Place', 'price_by_night', 2, reverse=True)], [90, 60])
+
+
+class test_query_range(unittest.TestCase):
+    """ Class to test range indexes on file storage """
+
+    path = 'range.json'
+
+    def setUp(self):
+        """ Set up places with distinct prices in two cities """
+        self.storage = FileStorage(self.path)
+        self.places = [make(Place, city_id='ab'[i % 2], price_by_night=price)
+                       for i, price in enumerate([90, 30, 60, 120, 10])]
+        for obj in self.places:
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage file """
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prices(self, objs):
+        """ Returns the prices of objs """
+        return [obj.price_by_night for obj in objs]
+
+    def test_range(self):
+        """ Range terms walk the index in value order """
+        self.assertEqual(self.prices(self.storage.query(
+            Place, price_by_night__gt=10, price_by_night__lte=90)),
+            [30, 60, 90])
+
+    def test_top(self):
+        """ top returns the cheapest or dearest places """
+        self.assertEqual(self.prices(self.storage.top(
+            Place, 'price_by_night', 2)), [10, 30])
+        self.assertEqual(self.prices(self.storage.top(
+            Place, 'price_by_night', 2, reverse=True)), [120, 90])
+        self.assertEqual(self.prices(self.storage.top(
+            Place, 'price_by_night', 2, city_id='a')), [10, 60])
+        self.assertEqual(self.prices(self.storage.top(
+            Place, 'price_by_night', 9, price_by_night__gt=50)),
+            [60, 90, 120])
+
+    def test_update_destroy(self):
+        """ The index follows saved updates and deletes """
+        self.places[3].price_by_night = 5
+        self.storage.new(self.places[3])
+        self.storage.delete(self.places[4])
+        self.assertEqual(self.prices(self.storage.top(
+            Place, 'price_by_night', 2)), [5, 30])
+        self.assertEqual(self.prices(self.storage.query(
+            Place, price_by_night__lt=20)), [5])
+
+    def test_reload(self):
+        """ A lazy reload rebuilds the index from the raw entries """
+        self.storage.save()
+        lazy = FileStorage(self.path, lazy=True)
+        lazy.reload()
+        self.assertEqual(self.prices(lazy.top(Place, 'price_by_night', 1)),
+                         [10])
+        self.assertEqual(len(lazy._FileStorage__objects), 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+""" Module for testing the snapshot file formats"""
+import unittest
+from models.base_model import BaseModel
+from models.engine import serializers, shards
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+import io
+import os
+import shutil
+
+
+def read(data, chunk_size=1 << 20):
+    """ Returns the (key, entry) pairs read from the bytes data """
+    f = io.BufferedReader(io.BytesIO(data))
+    return [(key, val)
+            for key, val, position in serializers.read(f, chunk_size)]
+
+
+class test_binary_format(unittest.TestCase):
+    """ Class to test packing entries """
+
+    def setUp(self):
+        """ A binary format of the model classes """
+        self.format = serializers.BinaryFormat(FileStorage.classes())
+
+    def roundtrip(self, pairs, chunk_size=1 << 20):
+        """ Checks that pairs read back unchanged, and returns the file """
+        data = self.format.document(
+            [self.format.entry(key, val) for key, val in pairs])
+        self.assertEqual(read(data, chunk_size), pairs)
+        return data
+
+    def test_models(self):
+        """ Model entries read back as they were written """
+        place = Place()
+        place.name = 'Chez Maria'
+        place.number_rooms = 3
+        place.latitude = 37.77
+        review = Review()
+        review.text = 'Café with a view'
+        data = self.roundtrip([('Place.' + place.id, place.to_dict()),
+                               ('Review.' + review.id, review.to_dict())])
+        self.assertTrue(data.startswith(serializers.MAGIC))
+
+    def test_misfits(self):
+        """ Values that do not fit their declared type are kept as is """
+        place = Place()
+        place.number_rooms = '3'
+        place.max_guest = 1 << 70
+        place.price_by_night = True
+        place.latitude = 2
+        place.name = None
+        place.description = 'lone \ud800 surrogate'
+        place.amenity_ids = ['a', 'b']
+        place.extra = {'nested': [1, 2.5]}
+        place.created_at = place.created_at.replace(microsecond=0)
+        val = place.to_dict()
+        val['updated_at'] = val['updated_at'].replace('T', ' ')
+        self.roundtrip([('Place.' + place.id, val)])
+
+    def test_odd_keys(self):
+        """ Unknown classes, odd ids and keys other than class.id are
+        kept whole """
+        self.roundtrip([
+            ('Unknown.1', {'__class__': 'Unknown', 'id': '1'}),
+            ('BaseModel.x', {'__class__': 'BaseModel', 'id': 'x',
+                             'created_at': 1, 'updated_at': 2}),
+            ('BaseModel.y', BaseModel().to_dict())])
+
+    def test_small_chunks(self):
+        """ Records spanning chunks are read whole """
+        self.roundtrip([('Review.' + r.id, r.to_dict())
+                        for r in (Review() for i in range(20))],
+                       chunk_size=7)
+
+    def test_epoch(self):
+        """ Epoch timestamps are packed as integers """
+        binary = serializers.BinaryFormat(FileStorage.classes(), epoch=True)
+        obj = BaseModel()
+        val = obj.to_dict(epoch=True)
+        data = binary.document([binary.entry('BaseModel.' + obj.id, val)])
+        self.assertEqual(read(data), [('BaseModel.' + obj.id, val)])
+
+    def test_smaller(self):
+        """ A packed entry is smaller than its JSON """
+        place = Place()
+        place.number_rooms = 4
+        place.latitude = 1.25
+        key, val = 'Place.' + place.id, place.to_dict()
+        self.assertLess(len(self.format.entry(key, val)),
+                        len(serializers.JSONFormat().entry(key, val)))
+
+    def test_truncated(self):
+        """ A truncated file raises ValueError """
+        obj = BaseModel()
+        data = self.format.document(
+            [self.format.entry('BaseModel.' + obj.id, obj.to_dict())])
+        with self.assertRaises(ValueError):
+            read(data[:-3])
+
+    def test_json(self):
+        """ JSON files are recognized and read """
+        self.assertEqual(read(b'{"a": {"b": 1}, "c": {}}'),
+                         [('a', {'b': 1}), ('c', {})])
+
+
+class test_storage_format(unittest.TestCase):
+    """ Class to test FileStorage in each format """
+
+    path = 'format.json'
+
+    def tearDown(self):
+        """ Remove storage files """
+        shutil.rmtree(self.path + '.d', ignore_errors=True)
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def fill(self, storage):
+        """ Saves a few places to storage and returns their keys """
+        for i in range(5):
+            place = Place()
+            place.name = 'Place {}'.format(i)
+            place.number_rooms = i
+            storage.new(place)
+        storage.save()
+        return set(storage.all())
+
+    def test_unknown(self):
+        """ An unknown format is refused """
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, format='xml')
+
+    def test_switch(self):
+        """ Each format reads the other's files """
+        binary = FileStorage(self.path, format='binary')
+        self.assertEqual(binary.format, 'binary')
+        keys = self.fill(binary)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(len(serializers.MAGIC)),
+                             serializers.MAGIC)
+        plain = FileStorage(self.path)
+        plain.reload()
+        self.assertEqual(set(plain.all()), keys)
+        plain.save()
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(1), b'{')
+        again = FileStorage(self.path, format='binary', lazy=True)
+        again.reload()
+        self.assertEqual(again.all()[next(iter(keys))].to_dict(),
+                         plain.all()[next(iter(keys))].to_dict())
+
+    def test_sharded(self):
+        """ Shards are written in the storage's format """
+        storage = FileStorage(self.path, sharded=True, format='binary')
+        keys = self.fill(storage)
+        with open(os.path.join(storage.shard_dir, 'Place.json'), 'rb') as f:
+            self.assertEqual(f.read(len(serializers.MAGIC)),
+                             serializers.MAGIC)
+        other = FileStorage(self.path, sharded=True)
+        other.reload()
+        self.assertEqual(set(other.all()), keys)
+
+    def test_migrate(self):
+        """ A JSON file migrates to binary shards """
+        keys = self.fill(FileStorage(self.path))
+        shards.migrate(self.path, self.path + '.d', format='binary')
+        sharded = FileStorage(self.path, sharded=True, format='binary')
+        sharded.reload()
+        self.assertEqual(set(sharded.all()), keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+""" Module for testing the sharded FileStorage layout"""
+import unittest
+from models.engine import shards
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from tests.test_models.test_engine.factory import make
+import json
+import os
+import shutil
+
+
+class test_shards(unittest.TestCase):
+    """ Class to test one file per class and hash buckets """
+
+    path = 'sharded.json'
+
+    def setUp(self):
+        """ Set up a sharded storage with a few objects """
+        self.storage = self.open()
+        self.states = [make(State, name=str(i)) for i in range(3)]
+        self.reviews = [make(Review, text='review {}'.format(i))
+                        for i in range(20)]
+        for obj in self.states + self.reviews:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def tearDown(self):
+        """ Remove storage files """
+        shutil.rmtree(self.path + '.d', ignore_errors=True)
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def open(self, buckets=None, **options):
+        """ Returns a sharded storage on the test path """
+        return FileStorage(self.path, sharded=True,
+                           buckets={'Review': 4} if buckets is None
+                           else buckets, **options)
+
+    def files(self):
+        """ Returns {file name: inode} of the shard directory """
+        directory = self.storage.shard_dir
+        return {name: os.stat(os.path.join(directory, name)).st_ino
+                for name in os.listdir(directory)}
+
+    def test_layout(self):
+        """ Each class has its own files, Review split in buckets """
+        names = {name for name in self.files() if name.endswith('.json')}
+        self.assertEqual(names, {'State.json'} | {
+            'Review.{}.json'.format(shards.bucket('Review.' + r.id, 4))
+            for r in self.reviews})
+        self.assertFalse(os.path.exists(self.path))
+        path = os.path.join(self.storage.shard_dir, 'State.json')
+        with open(path) as f:
+            self.assertEqual(set(json.load(f)),
+                             {'State.' + s.id for s in self.states})
+
+    def test_dirty_shards(self):
+        """ A save only replaces the shards holding dirty keys """
+        before = self.files()
+        review = self.reviews[0]
+        review.text = 'changed'
+        self.storage.new(review)
+        self.storage.save()
+        after = self.files()
+        key = 'Review.' + review.id
+        changed = 'Review.{}.json'.format(shards.bucket(key, 4))
+        self.assertNotEqual(before[changed], after[changed])
+        for name in before:
+            if name.endswith('.json') and name != changed:
+                self.assertEqual(before[name], after[name])
+
+    def test_on_demand(self):
+        """ Reload reads nothing; a class is read when first used """
+        other = self.open()
+        other.reload()
+        self.assertEqual(other._FileStorage__objects, {})
+        self.assertEqual(other.count(State), 3)
+        self.assertEqual({key.partition('.')[0]
+                          for key in other._FileStorage__objects}, {'State'})
+        self.assertEqual(other.get(Review, self.reviews[5].id).text,
+                         'review 5')
+        self.assertEqual(other.count(), 23)
+
+    def test_delete(self):
+        """ Deleted objects leave their shard """
+        other = self.open()
+        other.reload()
+        other.delete(other.get(State, self.states[0].id))
+        other.save()
+        again = self.open()
+        again.reload()
+        self.assertEqual(again.count(State), 2)
+
+    def test_search(self):
+        """ The full-text index of each class is kept with its shards """
+        other = self.open()
+        other.reload()
+        found = other.search(Review, 'review 7')
+        self.assertEqual(found[0][1].id, self.reviews[7].id)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.storage.shard_dir, 'Review.search')))
+
+    def test_text_only_save(self):
+        """ A save writing only full-text indexes creates the directory """
+        shutil.rmtree(self.storage.shard_dir)
+        fresh = self.open()
+        fresh.new(make(Place, name='Loft'))
+        fresh.begin()
+        fresh.rollback()
+        fresh.save()
+        self.assertTrue(os.path.exists(
+            os.path.join(fresh.shard_dir, 'Place.search')))
+
+    def test_restripe(self):
+        """ A class read in another bucket layout is rewritten in the
+        current one on its next save """
+        other = self.open(buckets={})
+        other.reload()
+        self.assertEqual(other.count(Review), 20)
+        other.new(make(Review, text='new'))
+        other.save()
+        names = {name for name in self.files()
+                 if name.startswith('Review') and name.endswith('.json')}
+        self.assertEqual(names, {'Review.json'})
+        again = self.open(buckets={})
+        again.reload()
+        self.assertEqual(again.count(Review), 21)
+
+    def test_journal_refused(self):
+        """ Sharding cannot be combined with the journal """
+        with self.assertRaises(ValueError):
+            self.open(journal=True)
+
+
+class test_migrate(unittest.TestCase):
+    """ Class to test migrating a single file to shards """
+
+    path = 'migrate.json'
+
+    def tearDown(self):
+        """ Remove storage files """
+        shutil.rmtree(self.path + '.d', ignore_errors=True)
+        for path in (self.path, self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_migrate(self):
+        """ Every object of the single file is found in the shards """
+        single = FileStorage(self.path)
+        objs = [make(State, name='CA')] + \
+            [make(Review, text=str(i)) for i in range(10)]
+        for obj in objs:
+            single.new(obj)
+        single.save()
+        count = shards.migrate(self.path, self.path + '.d', {'Review': 3})
+        self.assertEqual(count, 11)
+        sharded = FileStorage(self.path, sharded=True, buckets={'Review': 3})
+        sharded.reload()
+        self.assertEqual(set(sharded.all()), set(single.all()))
+        self.assertEqual(sharded.get(Review, objs[3].id).text, '2')
+        self.assertEqual(len(os.listdir(sharded.shard_dir)), 1 + len(
+            {shards.bucket('Review.' + r.id, 3) for r in objs[1:]}))
+
+    def test_main(self):
+        """ The command line migrates the named file """
+        single = FileStorage(self.path)
+        single.new(make(State, name='CA'))
+        single.save()
+        self.assertEqual(shards.main([self.path, 'Review=2']), 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.path + '.d', 'State.json')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+""" Module for testing the spill file of evicted entries"""
+import unittest
+from models.engine.spill import SpillFile
+
+
+class test_spill_file(unittest.TestCase):
+    """ Class to test writing and reading entries by location """
+
+    def setUp(self):
+        """ Create a spill file with a tiny buffer """
+        self.spill = SpillFile('.')
+        self.spill.buffer_size = 8
+        self.addCleanup(self.spill.close)
+
+    def test_read_back(self):
+        """ Entries are read back whether buffered or written """
+        first = self.spill.write('"a": {"x": 1}')
+        second = self.spill.write(b'tail')
+        self.assertEqual(first[1:], (0, 13))
+        self.assertEqual(second[1:], (13, 4))
+        self.assertEqual(self.spill.read(*first[1:]), b'"a": {"x": 1}')
+        self.assertEqual(self.spill.read(*second[1:]), b'tail')
+        self.assertEqual(self.spill.size, 17)
+
+    def test_repack(self):
+        """ Only the located entries are copied to the new file """
+        raw = {'a': self.spill.write('first')}
+        self.spill.write('garbage')
+        at = {'b': self.spill.write('second'), 'c': {'not': 'spilled'}}
+        packed = self.spill.repack(raw, at)
+        self.addCleanup(packed.close)
+        self.assertEqual(packed.size, 11)
+        self.assertIs(raw['a'][0], packed)
+        self.assertEqual(packed.read(*raw['a'][1:]), b'first')
+        self.assertEqual(packed.read(*at['b'][1:]), b'second')
+        self.assertEqual(at['c'], {'not': 'spilled'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+""" Module for testing full-text search"""
+import unittest
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.text import TextIndex, tokenize
+from models.place import Place
+from models.review import Review
+import os
+
+
+def review(text):
+    """ Returns a new review with text """
+    obj = Review()
+    obj.text = text
+    return obj
+
+
+class test_text_index(unittest.TestCase):
+    """ Class to test tokenizing and BM25 ranking """
+
+    def setUp(self):
+        """ Set up an index of three documents """
+        self.index = TextIndex(('text',))
+        self.index.add('a', 'Quiet room, quiet street')
+        self.index.add('b', 'A quiet room with a long description of '
+                            'everything around the place')
+        self.index.add('c', 'Noisy bar')
+
+    def test_tokenize(self):
+        """ Words are lower-cased and split on punctuation """
+        self.assertEqual(tokenize("Beach-side, 2 rooms!"),
+                         ['beach', 'side', '2', 'rooms'])
+
+    def test_rank(self):
+        """ Frequent words in short documents rank first """
+        self.assertEqual([k for s, k in self.index.search('quiet')],
+                         ['a', 'b'])
+        self.assertEqual([k for s, k in self.index.search('QUIET bar', 1)],
+                         ['c'])
+        self.assertEqual(self.index.search('missing'), [])
+
+    def test_update_remove(self):
+        """ Re-adding replaces a document, removing drops it """
+        self.index.add('c', 'Quiet quiet quiet')
+        self.assertEqual(self.index.search('bar'), [])
+        self.assertEqual(self.index.search('quiet')[0][1], 'c')
+        self.index.remove('c')
+        self.assertEqual(len(self.index.search('quiet')), 2)
+
+    def test_unchanged(self):
+        """ Adding the same text again leaves the index untouched """
+        self.index.changed = False
+        self.index.add('a', 'Quiet room, quiet street')
+        self.assertFalse(self.index.changed)
+
+    def test_dump_load(self):
+        """ A loaded index ranks like the original """
+        other = TextIndex(('text',))
+        other.load(self.index.dump())
+        self.assertEqual(other.search('quiet room'),
+                         self.index.search('quiet room'))
+        self.assertFalse(other.changed)
+        TextIndex(('name',)).load(self.index.dump())  # ignored
+
+
+class test_text_file(unittest.TestCase):
+    """ Class to test search on file storage """
+
+    path = 'text.json'
+
+    def setUp(self):
+        """ Set up a storage with a few reviews """
+        self.storage = FileStorage(self.path)
+        self.reviews = [review('Lovely quiet stay'), review('Too noisy'),
+                        review('Quiet, quiet, quiet')]
+        for obj in self.reviews:
+            self.storage.new(obj)
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in (self.path, self.storage.log_path,
+                     self.storage.search_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def texts(self, storage, *args):
+        """ Returns the texts of the reviews found """
+        return [obj.text for score, obj in storage.search(Review, *args)]
+
+    def test_search(self):
+        """ Matches come best first, other classes are not searched """
+        self.assertEqual(self.texts(self.storage, 'quiet'),
+                         ['Quiet, quiet, quiet', 'Lovely quiet stay'])
+        self.assertEqual(self.storage.search('BaseModel', 'quiet'), [])
+
+    def test_update_delete(self):
+        """ The index follows saved updates and deletes """
+        self.reviews[1].text = 'Quiet now'
+        self.storage.new(self.reviews[1])
+        self.storage.delete(self.reviews[2])
+        self.assertEqual(self.texts(self.storage, 'quiet now'),
+                         ['Quiet now', 'Lovely quiet stay'])
+
+    def test_persisted(self):
+        """ reload reads the saved index instead of tokenizing again """
+        self.storage.save()
+        self.assertTrue(os.path.exists(self.storage.search_path))
+        other = FileStorage(self.path, lazy=True)
+        other.reload()
+        self.assertFalse(other._FileStorage__text['Review'].changed)
+        self.assertEqual(self.texts(other, 'quiet'),
+                         ['Quiet, quiet, quiet', 'Lovely quiet stay'])
+
+    def test_stale_index(self):
+        """ Changes journaled after the index was saved are applied """
+        self.storage.save()
+        journal = FileStorage(self.path, journal=True)
+        journal.reload()
+        changed = journal.get(Review, self.reviews[1].id)
+        changed.text = 'Suddenly quiet'
+        journal.new(changed)
+        journal.delete(journal.get(Review, self.reviews[2].id))
+        journal.save()
+        other = FileStorage(self.path, journal=True)
+        other.reload()
+        self.assertEqual(self.texts(other, 'quiet'),
+                         ['Suddenly quiet', 'Lovely quiet stay'])
+
+
+class test_text_db(unittest.TestCase):
+    """ Class to test search on the SQLite storage """
+
+    path = 'test_text.db'
+
+    def setUp(self):
+        """ Open a fresh database """
+        self.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """ Close and remove the database files """
+        self.storage.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def test_search(self):
+        """ Saved text is ranked by FTS5, deletes drop out """
+        place = Place()
+        place.name = 'Beach house'
+        place.description = 'Quiet, by the beach'
+        other = Place()
+        other.name = 'Loft'
+        for obj in (place, other, review('beach')):
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertEqual({p.id for s, p in self.storage.search(
+            Place, 'beach loft')}, {place.id, other.id})
+        self.assertEqual([p.id for s, p in self.storage.search(
+            Place, 'quiet beach')], [place.id])
+        self.assertEqual(len(self.storage.search(Place, 'loft', 5)), 1)
+        self.storage.delete(other)
+        self.storage.save()
+        self.assertEqual(self.storage.search('Place', 'loft'), [])
+        self.assertEqual(self.storage.search(Place, '!!'), [])
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+""" Module for testing the write-behind flusher"""
+import unittest
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.engine.writebehind import WriteBehind
+import json
+import os
+import time
+
+
+class test_write_behind(unittest.TestCase):
+    """ Class to test queuing and flushing saves in the background """
+
+    def setUp(self):
+        """ Set up a flusher counting its flushes """
+        self.flushes = 0
+        self.fail = False
+        self.behind = WriteBehind(self.flush, interval=60, after=10)
+        self.addCleanup(self.behind.close)
+
+    def flush(self):
+        """ Counts a flush, failing when asked to """
+        if self.fail:
+            raise OSError('disk full')
+        self.flushes += 1
+
+    def test_coalesce(self):
+        """ Queued saves are written by a single flush """
+        for i in range(5):
+            self.behind.schedule()
+        self.assertEqual(self.behind.queued, 5)
+        self.behind.flush()
+        self.assertEqual(self.behind.queued, 0)
+        self.assertEqual(self.flushes, 1)
+
+    def test_after(self):
+        """ Reaching `after` queued saves wakes the flusher """
+        for i in range(10):
+            self.behind.schedule()
+        deadline = time.monotonic() + 5
+        while not self.flushes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.flushes, 1)
+
+    def test_interval(self):
+        """ A queued save is flushed once the interval is over """
+        self.behind.interval = 0.01
+        self.behind.schedule()
+        deadline = time.monotonic() + 5
+        while not self.flushes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.flushes, 1)
+
+    def test_nothing_queued(self):
+        """ A flush with nothing queued does not call the function """
+        self.behind.flush()
+        self.behind.schedule()
+        self.behind.flush()
+        self.behind.flush()
+        self.assertEqual(self.flushes, 1)
+
+    def test_error(self):
+        """ A failed flush is raised once and its saves stay queued """
+        self.fail = True
+        self.behind.schedule()
+        with self.assertRaises(OSError):
+            self.behind.flush()
+        self.assertEqual(self.behind.errors, 1)
+        self.assertEqual(self.behind.queued, 1)
+        self.fail = False
+        self.behind.flush()
+        self.assertEqual(self.flushes, 1)
+
+    def test_close(self):
+        """ Close flushes and stops the thread, which restarts on use """
+        self.behind.schedule()
+        self.behind.close()
+        self.assertEqual(self.flushes, 1)
+        self.behind.schedule()
+        self.behind.close()
+        self.assertEqual(self.flushes, 2)
+
+
+class test_storage_write_behind(unittest.TestCase):
+    """ Class to test FileStorage in write-behind mode """
+
+    path = 'behind.json'
+
+    def setUp(self):
+        """ Set up a write-behind storage that flushes on demand """
+        self.storage = FileStorage(self.path, write_behind=60)
+
+    def tearDown(self):
+        """ Stop the flusher and remove storage files """
+        self.storage.close()
+        for path in (self.path, self.path + '.log', self.path + '.search'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def saved(self):
+        """ Returns the keys in the snapshot file """
+        try:
+            with open(self.path) as f:
+                return set(json.load(f))
+        except FileNotFoundError:
+            return set()
+
+    def test_deferred(self):
+        """ Save returns before writing; flush writes every queued save """
+        objs = [BaseModel() for i in range(3)]
+        for obj in objs:
+            self.storage.new(obj)
+            self.storage.save()
+        self.assertEqual(self.saved(), set())
+        self.assertEqual(self.storage.metrics['queued'], 3)
+        self.storage.flush()
+        self.assertEqual(self.saved(),
+                         {'BaseModel.' + obj.id for obj in objs})
+        metrics = self.storage.metrics
+        self.assertEqual(metrics['queued'], 0)
+        self.assertEqual(metrics['dirty'], 0)
+        self.assertEqual(metrics['flushes'], 1)
+        self.assertGreater(metrics['max_ms'], 0)
+
+    def test_close(self):
+        """ Close writes queued saves """
+        new = BaseModel()
+        self.storage.new(new)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.saved(), {'BaseModel.' + new.id})
+
+    def test_journal(self):
+        """ Queued journal saves are appended together """
+        self.storage = FileStorage(self.path, journal=True, write_behind=60)
+        new = BaseModel()
+        for i in range(3):
+            new.number = i
+            self.storage.new(new)
+            self.storage.save()
+        self.storage.flush()
+        with open(self.storage.log_path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['obj']['number'], 2)
+
+    def test_rollback_keeps_queued(self):
+        """ A rollback does not discard saves queued before the batch """
+        kept, dropped = BaseModel(), BaseModel()
+        self.storage.new(kept)
+        self.storage.save()
+        self.storage.begin()
+        self.storage.new(dropped)
+        self.storage.rollback()
+        self.assertIn('BaseModel.' + kept.id, self.storage.all())
+        self.assertNotIn('BaseModel.' + dropped.id, self.storage.all())
+
+    def test_concurrent(self):
+        """ Objects added while the flusher writes are not lost """
+        self.storage = FileStorage(self.path, write_behind=0, flush_after=1)
+        objs = [BaseModel() for i in range(500)]
+        for obj in objs:
+            self.storage.new(obj)
+            self.storage.save()
+        self.storage.flush()
+        self.assertEqual(len(self.saved()), 500)
+        self.assertLessEqual(self.storage.metrics['flushes'], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
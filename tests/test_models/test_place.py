@@ -2,6 +2,7 @@
 """ """
 from tests.test_models.test_base_model import test_basemodel
 from models.place import Place
+from models.review import Review
 
 
 class test_Place(test_basemodel):
@@ -67,3 +68,11 @@ class test_Place(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.amenity_ids), list)
+
+    def test_reviews(self):
+        """ """
+        new = self.value()
+        review = Review()
+        review.place_id = new.id
+        review.save()
+        self.assertEqual(new.reviews, [review])
@@ -2,6 +2,7 @@
 """ """
 from tests.test_models.test_base_model import test_basemodel
 from models.state import State
+from models.city import City
 
 
 class test_state(test_basemodel):
@@ -17,3 +18,12 @@ class test_state(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.name), str)
+
+    def test_cities(self):
+        """ """
+        new = self.value()
+        city = City()
+        city.state_id = new.id
+        city.save()
+        self.assertEqual(new.cities, [city])
+        self.assertEqual(self.value().cities, [])
@@ -2,6 +2,8 @@
 """ """
 from tests.test_models.test_base_model import test_basemodel
 from models.user import User
+from models.place import Place
+from models.review import Review
 
 
 class test_User(test_basemodel):
@@ -32,3 +34,13 @@ class test_User(test_basemodel):
         """ """
         new = self.value()
         self.assertEqual(type(new.password), str)
+
+    def test_places_reviews(self):
+        """ """
+        new = self.value()
+        place, review = Place(), Review()
+        place.user_id = review.user_id = new.id
+        place.save()
+        review.save()
+        self.assertEqual(new.places, [place])
+        self.assertEqual(new.reviews, [review])